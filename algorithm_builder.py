@@ -13,8 +13,17 @@ from datetime import datetime
 class AlgorithmBuilder:
     """Builds and manages custom algorithms for stock screening and trading."""
     
+    # Fields evaluated against price history rather than looked up
+    TECHNICAL_FIELDS = ('rsi', 'sma', 'ema', 'macd', 'bb', 'price', 'close', 'volume')
+    # Prior cost (us) for conditions with no recorded results: a technical
+    # condition needs an indicator pass over the history, a fundamental one
+    # is a dict lookup
+    STATIC_COST_US = {'technical': 50000.0, 'fundamental': 1.0}
+    
     def __init__(self):
         self.algorithms = {}
+        # (field, operator) -> [n_seen, n_passed, total_cost_us]
+        self._condition_stats = {}
         self.available_functions = self._initialize_functions()
         self.available_indicators = self._initialize_indicators()
     
@@ -133,6 +142,52 @@ class AlgorithmBuilder:
         
         return ' '.join(expression_parts)
     
+    @classmethod
+    def is_technical(cls, field: str) -> bool:
+        """Whether a condition field needs price history to evaluate."""
+        return any(ind in field for ind in cls.TECHNICAL_FIELDS)
+    
+    @staticmethod
+    def is_and_chain(conditions: List[Dict]) -> bool:
+        """Whether every condition but the last joins with AND."""
+        return all((c.get('logical_operator') or 'AND').upper() == 'AND' for c in conditions[:-1])
+    
+    def record_condition_result(self, condition: Dict, passed: bool, cost_us: float):
+        """Track pass rate and evaluation cost of a condition."""
+        key = (condition['field'], condition['operator'])
+        stats = self._condition_stats.setdefault(key, [0, 0, 0.0])
+        stats[0] += 1
+        stats[1] += int(passed)
+        stats[2] += cost_us
+    
+    def order_conditions(self, conditions: List[Dict]) -> List[Dict]:
+        """
+        Order AND-only conditions so the cheapest, most selective ones run first.
+        
+        Conditions are ranked by avg_cost / reject_rate from previously
+        recorded results, i.e. the expected cost paid per stock rejected.
+        Conditions not seen yet are ranked by STATIC_COST_US at an even pass
+        rate. Lists containing OR are returned unchanged since reordering
+        would alter their meaning.
+        """
+        if not self.is_and_chain(conditions):
+            return conditions
+        
+        def rank(condition):
+            stats = self._condition_stats.get((condition['field'], condition['operator']))
+            if not stats or stats[0] == 0:
+                kind = 'technical' if self.is_technical(condition['field']) else 'fundamental'
+                return self.STATIC_COST_US[kind] / 0.5
+            n_seen, n_passed, total_cost = stats
+            return (total_cost / n_seen) / max(1 - n_passed / n_seen, 1e-3)
+        
+        ordered = sorted(conditions, key=rank)
+        # Keep the chain well-formed: every condition but the last joins with AND
+        return [
+            {**condition, 'logical_operator': 'AND' if i < len(ordered) - 1 else None}
+            for i, condition in enumerate(ordered)
+        ]
+    
     def save_algorithm(self, algorithm_id: str, filepath: str):
         """Save algorithm to JSON file."""
         if algorithm_id in self.algorithms:
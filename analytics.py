@@ -11,20 +11,64 @@ from ta.trend import SMAIndicator, EMAIndicator, MACD
 from ta.momentum import RSIIndicator
 from ta.volatility import BollingerBands
 
+# Prefer the AOT-compiled extension (python build_kernels.py), then the JIT kernels
+try:
+    from indi_kernels import sma as sma_kernel, ema as ema_kernel, rsi as rsi_kernel
+    from indi_kernels import rolling_std as rolling_std_kernel
+    HAS_KERNELS = True
+except ImportError:
+    try:
+        from indicator_kernels import sma as sma_kernel, ema as ema_kernel, rsi as rsi_kernel
+        from indicator_kernels import rolling_std as rolling_std_kernel
+        HAS_KERNELS = True
+    except ImportError:
+        HAS_KERNELS = False
+
+
+def warmup_kernels():
+    """Compile (or load from the numba cache) every indicator kernel on a tiny input."""
+    if not HAS_KERNELS:
+        return
+    sample = np.linspace(1.0, 2.0, 32).astype(np.float32)
+    sma_kernel(sample, 5)
+    ema_kernel(sample, 5)
+    rsi_kernel(sample, 5)
+    rolling_std_kernel(sample, 5, 1)
+
 
 class Analytics:
     """Computes technical indicators and analytics."""
     
-    def __init__(self, df: pd.DataFrame):
+    ENGINES = ('auto', 'numba', 'ta')
+    
+    def __init__(self, df: pd.DataFrame, engine: str = 'auto'):
         """
         Initialize with OHLCV DataFrame.
         
         Expected columns: date, open, high, low, close, volume
+        
+        Args:
+            df: OHLCV data
+            engine: 'numba' for the compiled kernels, 'ta' for the ta library,
+                or 'auto' to use kernels when available
         """
         self.df = df.copy()
         if 'date' in self.df.columns:
             self.df = self.df.set_index('date')
         self.df = self.df.sort_index()
+        self.set_engine(engine)
+    
+    def set_engine(self, engine: str):
+        """Select the indicator implementation ('auto', 'numba' or 'ta')."""
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {self.ENGINES}")
+        if engine == 'numba' and not HAS_KERNELS:
+            print("Numba kernels not available, falling back to the ta engine")
+        self.use_kernels = HAS_KERNELS and engine != 'ta'
+    
+    def _close_array(self) -> np.ndarray:
+        """Close prices as a contiguous float32 array for the indicator kernels."""
+        return np.ascontiguousarray(self.df['close'].to_numpy(), dtype=np.float32)
     
     def add_returns(self, periods: list = [1, 5, 10, 30, 60, 90, 252]) -> pd.DataFrame:
         """Add returns for various periods."""
@@ -34,6 +78,13 @@ class Analytics:
     
     def add_moving_averages(self, periods: list = [5, 10, 20, 50, 100, 200]) -> pd.DataFrame:
         """Add simple and exponential moving averages."""
+        if self.use_kernels:
+            close = self._close_array()
+            for period in periods:
+                self.df[f'sma_{period}'] = sma_kernel(close, period)
+                self.df[f'ema_{period}'] = ema_kernel(close, period)
+            return self.df
+        
         for period in periods:
             sma = SMAIndicator(close=self.df['close'], window=period)
             self.df[f'sma_{period}'] = sma.sma_indicator()
@@ -44,12 +95,25 @@ class Analytics:
     
     def add_rsi(self, period: int = 14) -> pd.DataFrame:
         """Add RSI indicator."""
+        if self.use_kernels:
+            self.df['rsi'] = rsi_kernel(self._close_array(), period)
+            return self.df
+        
         rsi = RSIIndicator(close=self.df['close'], window=period)
         self.df['rsi'] = rsi.rsi()
         return self.df
     
     def add_macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
         """Add MACD indicator."""
+        if self.use_kernels:
+            close = self._close_array()
+            macd_line = ema_kernel(close, fast) - ema_kernel(close, slow)
+            macd_signal = ema_kernel(macd_line, signal)
+            self.df['macd'] = macd_line
+            self.df['macd_signal'] = macd_signal
+            self.df['macd_diff'] = macd_line - macd_signal
+            return self.df
+        
         macd = MACD(close=self.df['close'], window_fast=fast, window_slow=slow, window_sign=signal)
         self.df['macd'] = macd.macd()
         self.df['macd_signal'] = macd.macd_signal()
@@ -58,6 +122,15 @@ class Analytics:
     
     def add_bollinger_bands(self, period: int = 20, std: float = 2) -> pd.DataFrame:
         """Add Bollinger Bands."""
+        if self.use_kernels:
+            close = self._close_array()
+            middle = sma_kernel(close, period)
+            band = rolling_std_kernel(close, period, 0) * std
+            self.df['bb_upper'] = middle + band
+            self.df['bb_middle'] = middle
+            self.df['bb_lower'] = middle - band
+            return self.df
+        
         bb = BollingerBands(close=self.df['close'], window=period, window_dev=std)
         self.df['bb_upper'] = bb.bollinger_hband()
         self.df['bb_middle'] = bb.bollinger_mavg()
@@ -66,6 +139,14 @@ class Analytics:
     
     def add_volatility(self, period: int = 20) -> pd.DataFrame:
         """Add volatility (standard deviation of returns)."""
+        if self.use_kernels:
+            close = self._close_array()
+            returns = np.empty_like(close)
+            returns[0] = np.nan
+            returns[1:] = close[1:] / close[:-1] - 1
+            self.df['volatility'] = rolling_std_kernel(returns, period, 1) * np.sqrt(252)  # Annualized
+            return self.df
+        
         returns = self.df['close'].pct_change()
         self.df['volatility'] = returns.rolling(window=period).std() * np.sqrt(252)  # Annualized
         return self.df
@@ -83,8 +164,10 @@ class Analytics:
         
         return self.df
     
-    def compute_all_indicators(self) -> pd.DataFrame:
-        """Compute all available indicators."""
+    def compute_all_indicators(self, engine: Optional[str] = None) -> pd.DataFrame:
+        """Compute all available indicators, optionally overriding the engine."""
+        if engine is not None:
+            self.set_engine(engine)
         self.add_returns()
         self.add_moving_averages()
         self.add_rsi()
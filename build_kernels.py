@@ -0,0 +1,40 @@
+"""
+Ahead-of-time compile the Numba kernels into extension modules.
+
+Run once after installing dependencies:
+
+    python build_kernels.py
+
+Analytics imports `indi_kernels` and Portfolio imports `portfolio_aot` when
+present, so fresh processes skip the Numba JIT warm-up entirely. Indicator
+signatures are float32 to match DataFetcher output; the portfolio simulation
+runs in float64.
+"""
+
+from numba.pycc import CC
+
+from indicator_kernels import sma_py, ema_py, rsi_py, rolling_std_py
+from portfolio_kernels import simulate_core_py, value_core_py
+
+
+cc = CC('indi_kernels')
+cc.verbose = True
+
+cc.export('sma', 'f4[:](f4[:], i8)')(sma_py)
+cc.export('ema', 'f4[:](f4[:], i8)')(ema_py)
+cc.export('rsi', 'f4[:](f4[:], i8)')(rsi_py)
+cc.export('rolling_std', 'f4[:](f4[:], i8, i8)')(rolling_std_py)
+
+portfolio_cc = CC('portfolio_aot')
+portfolio_cc.verbose = True
+
+portfolio_cc.export(
+    'simulate_core',
+    'Tuple((f8[:], f8[:], f8[:, :]))(f8[:, :], f8[:], i8[:], b1[:], f8, f8[:], f8)'
+)(simulate_core_py)
+portfolio_cc.export('value_core', 'UniTuple(f8, 2)(i8[:], f8[:], f8[:])')(value_core_py)
+
+
+if __name__ == '__main__':
+    cc.compile()
+    portfolio_cc.compile()
@@ -4,7 +4,8 @@ Comprehensive screener that processes all stocks with custom algorithms.
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Any
+from dataclasses import dataclass
 from datetime import datetime
 import time
 
@@ -14,17 +15,34 @@ from fundamental_data import FundamentalData
 from analytics import Analytics
 from rule_engine import RuleEngine
 from algorithm_builder import AlgorithmBuilder
+from utils import progress_iter, LRUCache
+
+
+@dataclass(slots=True)
+class ScreeningMatch:
+    """A stock that matched the algorithm, plus its screening metrics."""
+    symbol: str
+    exchange: str
+    name: str
+    sector: str
+    market_cap: Any
+    current_price: Optional[float]
+    metrics: Dict
 
 
 class ComprehensiveScreener:
     """Screens all stocks using custom algorithms."""
     
+    # Stocks screened between re-sorts of the conditions by recorded selectivity
+    REORDER_EVERY = 50
+    
     def __init__(self):
         self.data_fetcher = DataFetcher()
         self.stock_list_fetcher = StockListFetcher()
         self.fundamental_data = FundamentalData()
         self.algorithm_builder = AlgorithmBuilder()
-        self.cache = {}
+        # Bounded in-memory cache of fetched price history, keyed by (exchange, symbol, period)
+        self.cache = LRUCache(maxsize=256)
     
     def screen_stocks(
         self,
@@ -34,7 +52,8 @@ class ComprehensiveScreener:
         market_cap_filter: Optional[str] = None,
         max_stocks: Optional[int] = None,
         use_fundamentals: bool = True,
-        use_technical: bool = True
+        use_technical: bool = True,
+        progress: bool = True
     ) -> pd.DataFrame:
         """
         Screen stocks using a custom algorithm.
@@ -47,6 +66,7 @@ class ComprehensiveScreener:
             max_stocks: Maximum number of stocks to process
             use_fundamentals: Include fundamental data
             use_technical: Include technical indicators
+            progress: Show a progress bar (requires tqdm)
         
         Returns:
             DataFrame with matching stocks and their metrics
@@ -67,11 +87,20 @@ class ComprehensiveScreener:
         print(f"Processing {len(all_stocks)} stocks...")
         
         results = []
-        total = len(all_stocks)
+        rows = progress_iter(
+            all_stocks.iterrows(), total=len(all_stocks), desc='Screening', enabled=progress
+        )
         
-        for idx, row in all_stocks.iterrows():
+        for i, (_, row) in enumerate(rows):
             symbol = row['symbol']
-            print(f"Processing {symbol} ({idx+1}/{total})...", end='\r')
+            
+            # Run the cheapest, most selective conditions first, re-sorting
+            # every batch as results come in
+            if i % self.REORDER_EVERY == 0:
+                algorithm = {
+                    **algorithm,
+                    'conditions': self.algorithm_builder.order_conditions(algorithm.get('conditions', []))
+                }
             
             try:
                 # Fetch data
@@ -85,44 +114,65 @@ class ComprehensiveScreener:
                 )
                 
                 # Evaluate algorithm
-                matches = self._evaluate_algorithm(algorithm, screening_data)
+                matches = self._evaluate_algorithm(
+                    algorithm, screening_data, df if use_technical else None
+                )
                 
                 if matches:
-                    result = {
-                        'symbol': symbol,
-                        'exchange': exchange,
-                        'name': row.get('name', symbol),
-                        'sector': row.get('sector', 'N/A'),
-                        'market_cap': row.get('market_cap', 'N/A'),
-                        'current_price': screening_data.get('current_price', None),
-                        'matches': True,
-                    }
-                    
-                    # Add metrics
-                    result.update(screening_data)
-                    results.append(result)
+                    results.append(ScreeningMatch(
+                        symbol=symbol,
+                        exchange=exchange,
+                        name=row.get('name', symbol),
+                        sector=row.get('sector', 'N/A'),
+                        market_cap=row.get('market_cap', 'N/A'),
+                        current_price=screening_data.get('current_price', None),
+                        metrics=screening_data,
+                    ))
             
             except Exception as e:
-                print(f"\nError processing {symbol}: {e}")
+                print(f"Error processing {symbol}: {e}")
                 continue
             
             time.sleep(0.1)  # Rate limiting
         
-        print(f"\nScreening complete! Found {len(results)} matches.")
-        return pd.DataFrame(results)
+        print(f"Screening complete! Found {len(results)} matches.")
+        return self._matches_to_frame(results)
+    
+    @staticmethod
+    def _matches_to_frame(matches: List[ScreeningMatch]) -> pd.DataFrame:
+        """Assemble matches column-wise; metric values override same-named header fields."""
+        if not matches:
+            return pd.DataFrame()
+        
+        header = pd.DataFrame({
+            'symbol': [m.symbol for m in matches],
+            'exchange': [m.exchange for m in matches],
+            'name': [m.name for m in matches],
+            'sector': [m.sector for m in matches],
+            'market_cap': [m.market_cap for m in matches],
+            'current_price': [m.current_price for m in matches],
+            'matches': True,
+        })
+        metrics = pd.DataFrame.from_records([m.metrics for m in matches])
+        
+        overlap = metrics.columns.intersection(header.columns)
+        header[overlap] = metrics[overlap]
+        return pd.concat([header, metrics.drop(columns=overlap)], axis=1)
     
     def _get_stock_data(self, symbol: str, exchange: str, period: str = '1y') -> pd.DataFrame:
         """Get stock data with caching."""
-        cache_key = f"{exchange}_{symbol}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        cache_key = (exchange, symbol, period)
+        df = self.cache.get(cache_key)
+        if df is not None:
+            return df
         
         try:
             df = self.data_fetcher.fetch_data(symbol, exchange, period=period)
-            self.cache[cache_key] = df
-            return df
-        except:
+        except Exception:
             return pd.DataFrame()
+        
+        self.cache.put(cache_key, df)
+        return df
     
     def _prepare_screening_data(
         self,
@@ -169,83 +219,102 @@ class ComprehensiveScreener:
         """Evaluate if stock matches algorithm conditions."""
         try:
             conditions = algorithm.get('conditions', [])
+            builder = self.algorithm_builder
             
-            # Convert conditions to expression
-            expression = self.algorithm_builder.conditions_to_expression(conditions)
-            
-            # Create a simple evaluator
-            # For technical conditions, we need the full dataframe
-            # For fundamental conditions, we can evaluate directly
-            
-            # Split conditions into technical and fundamental
-            tech_conditions = []
-            fund_conditions = []
+            if not builder.is_and_chain(conditions):
+                return self._evaluate_grouped(conditions, data, df)
             
+            # AND chain: walk the conditions in their ranked order, recording
+            # each result, and stop at the first failure. Technical conditions
+            # pass when there is no history to evaluate them against.
+            rule_engine = None
+            indicators_ready = False
             for condition in conditions:
-                field = condition['field']
-                if any(ind in field for ind in ['rsi', 'sma', 'ema', 'macd', 'bb', 'price', 'close', 'volume']):
-                    tech_conditions.append(condition)
+                started = time.perf_counter()
+                if builder.is_technical(condition['field']):
+                    if df is None:
+                        continue
+                    if not indicators_ready:
+                        # The indicator pass is charged to the first technical condition
+                        rule_engine = self._rule_engine(df)
+                        indicators_ready = True
+                    if rule_engine is None:
+                        continue
+                    passed = self._check_rule(rule_engine, [condition])
                 else:
-                    fund_conditions.append(condition)
-            
-            # Evaluate fundamental conditions
-            fund_match = True
-            if fund_conditions:
-                for condition in fund_conditions:
-                    field = condition['field']
-                    operator = condition['operator']
-                    value = condition['value']
-                    
-                    field_value = data.get(field)
-                    if field_value is None:
-                        fund_match = False
-                        break
-                    
-                    # Evaluate condition
-                    if operator == '>':
-                        if not (field_value > value):
-                            fund_match = False
-                            break
-                    elif operator == '<':
-                        if not (field_value < value):
-                            fund_match = False
-                            break
-                    elif operator == '>=':
-                        if not (field_value >= value):
-                            fund_match = False
-                            break
-                    elif operator == '<=':
-                        if not (field_value <= value):
-                            fund_match = False
-                            break
-                    elif operator == '==':
-                        if not (field_value == value):
-                            fund_match = False
-                            break
-            
-            # Evaluate technical conditions if we have dataframe
-            tech_match = True
-            if df is not None and tech_conditions:
-                try:
-                    analytics = Analytics(df)
-                    analytics.compute_all_indicators()
-                    df_analytics = analytics.get_dataframe()
-                    
-                    if len(df_analytics) > 0:
-                        rule_engine = RuleEngine(df_analytics)
-                        # Convert technical conditions to expression
-                        tech_expression = self.algorithm_builder.conditions_to_expression(tech_conditions)
-                        tech_mask = rule_engine.evaluate_rule(tech_expression)
-                        tech_match = tech_mask.iloc[-1] if len(tech_mask) > 0 else False
-                except:
-                    tech_match = True  # Default to True if evaluation fails
+                    passed = self._check_condition(condition, data.get(condition['field']))
+                
+                builder.record_condition_result(condition, passed, (time.perf_counter() - started) * 1e6)
+                if not passed:
+                    return False
             
-            return fund_match and tech_match
+            return True
         
         except Exception as e:
             print(f"Error evaluating algorithm: {e}")
             return False
     
+    def _evaluate_grouped(self, conditions: List[Dict], data: Dict, df: Optional[pd.DataFrame]) -> bool:
+        """Evaluate a chain containing OR: fundamentals as an AND, then technicals as one expression."""
+        tech_conditions = []
+        fund_conditions = []
+        
+        for condition in conditions:
+            if self.algorithm_builder.is_technical(condition['field']):
+                tech_conditions.append(condition)
+            else:
+                fund_conditions.append(condition)
+        
+        # Evaluate fundamental conditions
+        for condition in fund_conditions:
+            if not self._check_condition(condition, data.get(condition['field'])):
+                return False
+        
+        # Evaluate technical conditions if we have dataframe
+        if df is None or not tech_conditions:
+            return True
+        rule_engine = self._rule_engine(df)
+        return rule_engine is None or self._check_rule(rule_engine, tech_conditions)
+    
+    @staticmethod
+    def _rule_engine(df: pd.DataFrame) -> Optional[RuleEngine]:
+        """Compute indicators over the history, or None if they are unavailable."""
+        try:
+            analytics = Analytics(df)
+            analytics.compute_all_indicators()
+            df_analytics = analytics.get_dataframe()
+        except Exception:
+            return None
+        return RuleEngine(df_analytics) if len(df_analytics) > 0 else None
+    
+    def _check_rule(self, rule_engine: RuleEngine, conditions: List[Dict]) -> bool:
+        """Evaluate technical conditions on the latest bar; True if evaluation fails."""
+        try:
+            mask = rule_engine.evaluate_rule(self.algorithm_builder.conditions_to_expression(conditions))
+            return bool(mask.iloc[-1]) if len(mask) > 0 else False
+        except Exception:
+            return True  # Default to True if evaluation fails
+    
+    @staticmethod
+    def _check_condition(condition: Dict, field_value) -> bool:
+        """Evaluate a single fundamental condition against a value."""
+        if field_value is None:
+            return False
+        
+        operator = condition['operator']
+        value = condition['value']
+        if operator == '>':
+            return field_value > value
+        elif operator == '<':
+            return field_value < value
+        elif operator == '>=':
+            return field_value >= value
+        elif operator == '<=':
+            return field_value <= value
+        elif operator == '==':
+            return field_value == value
+        return True
+    
     def batch_screen(
         self,
         algorithms: List[Dict],
@@ -4,6 +4,7 @@ Supports yfinance and nsepython for data retrieval.
 """
 
 import pandas as pd
+import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 import requests
@@ -102,6 +103,10 @@ class DataFetcher:
             df['symbol'] = symbol
             df['exchange'] = exchange
             
+            # Downcast OHLCV: prices fit in float32 and volume is integral
+            df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].astype(np.float32)
+            df['volume'] = df['volume'].fillna(0).astype(np.uint64)
+            
             return df[['date', 'open', 'high', 'low', 'close', 'volume', 'symbol', 'exchange']]
         
         except Exception as e:
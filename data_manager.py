@@ -10,9 +10,18 @@ import pickle
 import hashlib
 from typing import Optional, List, Dict, Tuple
 import sqlite3
+import threading
 import json
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 from data_fetcher import DataFetcher
+from utils import progress_iter
+
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
 
 
 class DataManager:
@@ -23,12 +32,30 @@ class DataManager:
         self.data_fetcher = DataFetcher()
         self.cache_dir = Config.CACHE_DIR
         self.db_path = Config.DB_PATH
+        self._lock = threading.Lock()
+        self._conn = self._connect()
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the persistent connection shared by all metadata access."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-65536')
+        return conn
+    
+    def close(self):
+        """Close the persistent database connection."""
+        with self._lock:
+            self._conn.close()
+    
     def _init_database(self):
         """Initialize database for metadata and cache tracking."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            self._create_tables(self._conn.cursor())
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """Create metadata, cache tracking and stock group tables."""
         
         # Stock metadata table
         cursor.execute('''
@@ -42,10 +69,16 @@ class DataManager:
                 first_available_date DATE,
                 last_updated_date DATE,
                 data_quality_score REAL,
+                last_close REAL,
                 PRIMARY KEY (symbol, exchange)
             )
         ''')
         
+        # Databases created before the last close was tracked
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(stock_metadata)')}
+        if 'last_close' not in columns:
+            cursor.execute('ALTER TABLE stock_metadata ADD COLUMN last_close REAL')
+        
         # Data cache tracking
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS data_cache (
@@ -70,9 +103,6 @@ class DataManager:
                 PRIMARY KEY (group_name, symbol, exchange)
             )
         ''')
-        
-        conn.commit()
-        conn.close()
     
     def get_historical_data(
         self,
@@ -146,13 +176,19 @@ class DataManager:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         years: Optional[int] = None,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        progress: bool = True
     ) -> Dict[str, pd.DataFrame]:
-        """Fetch data for multiple symbols with progress tracking."""
+        """Fetch data for multiple symbols with progress tracking.
+        
+        Shows a tqdm progress bar unless `progress` is False or a
+        `progress_callback` is supplied.
+        """
         results = {}
         total = len(symbols)
+        show_bar = progress and progress_callback is None
         
-        for idx, symbol in enumerate(symbols):
+        for idx, symbol in enumerate(progress_iter(symbols, total=total, desc='Fetching', enabled=show_bar)):
             if progress_callback:
                 progress_callback(idx + 1, total, symbol)
             
@@ -165,8 +201,86 @@ class DataManager:
         
         return results
     
+    def get_historical_data_batch(
+        self,
+        symbols: List[str],
+        exchange: str = 'NSE',
+        years: Optional[int] = None,
+        max_workers: int = 8
+    ) -> pd.DataFrame:
+        """
+        Get closing prices for several symbols as one wide frame.
+        
+        Returns:
+            DataFrame indexed by date with one close column per symbol;
+            symbols without data are omitted
+        """
+        if not symbols:
+            return pd.DataFrame()
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            frames = executor.map(lambda s: self.get_historical_data(s, exchange, years=years), symbols)
+            closes = {
+                symbol: pd.Series(df['close'].to_numpy(dtype=np.float64), index=pd.to_datetime(df['date']))
+                for symbol, df in zip(symbols, frames) if not df.empty
+            }
+        
+        if not closes:
+            return pd.DataFrame()
+        return pd.concat(closes, axis=1).sort_index()
+    
+    def get_last_close(self, symbol: str, exchange: str = 'NSE') -> Optional[float]:
+        """Get the latest close for a symbol, or None if no data is available."""
+        df = self.get_historical_data(symbol, exchange, years=1)
+        if df.empty or 'close' not in df.columns:
+            return None
+        return float(df['close'].iloc[-1])
+    
+    def get_last_closes(
+        self,
+        symbols: List[str],
+        exchange: str = 'NSE',
+        max_workers: int = 8
+    ) -> Dict[str, float]:
+        """
+        Get the latest close for several symbols in one call.
+        
+        Prices live in the per-symbol pickle cache rather than SQLite, so the
+        lookups are fanned out over a thread pool. Symbols without data are
+        omitted from the result.
+        """
+        if not symbols:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            closes = dict(zip(symbols, executor.map(lambda s: self.get_last_close(s, exchange), symbols)))
+        
+        return {symbol: close for symbol, close in closes.items() if close is not None}
+    
+    def get_latest_close(self, symbols: List[str], exchange: str = 'NSE') -> Dict[str, Tuple[float, str]]:
+        """
+        Get the last recorded close and its date for several symbols in one query.
+        
+        Reads the close stored in stock_metadata by the most recent fetch, so no
+        history is loaded. Symbols that were never fetched are omitted.
+        """
+        if not symbols:
+            return {}
+        
+        placeholders = ','.join('?' * len(symbols))
+        with self._lock:
+            rows = self._conn.execute(f'''
+                SELECT symbol, last_close, last_updated_date FROM stock_metadata
+                WHERE exchange = ? AND last_close IS NOT NULL AND symbol IN ({placeholders})
+            ''', [exchange, *symbols]).fetchall()
+        
+        return {symbol: (close, str(last_date)) for symbol, close, last_date in rows}
+    
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean and validate stock data."""
+        if HAS_POLARS:
+            return self._clean_data_polars(df)
+        
         df = df.copy()
         
         # Remove duplicates
@@ -176,7 +290,7 @@ class DataManager:
         df = df.sort_values('date')
         
         # Fill missing values (forward fill for OHLCV)
-        df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].fillna(method='ffill')
+        df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].ffill()
         
         # Remove rows with invalid prices
         df = df[
@@ -188,6 +302,22 @@ class DataManager:
         
         return df
     
+    def _clean_data_polars(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Same cleaning pipeline as _clean_data, run as a single polars lazy query."""
+        lf = (
+            pl.from_pandas(df).lazy()
+            .unique(subset=['date'], keep='last', maintain_order=True)
+            .sort('date')
+            .with_columns(pl.col(['open', 'high', 'low', 'close', 'volume']).forward_fill())
+            .filter(
+                (pl.col('close') > 0) &
+                (pl.col('high') >= pl.col('low')) &
+                (pl.col('high') >= pl.col('close')) &
+                (pl.col('low') <= pl.col('close'))
+            )
+        )
+        return lf.collect().to_pandas()
+    
     def _get_cache_key(self, symbol: str, exchange: str, start_date: str, end_date: str) -> str:
         """Generate cache key."""
         key_string = f"{exchange}_{symbol}_{start_date}_{end_date}"
@@ -209,18 +339,15 @@ class DataManager:
             df.to_pickle(cache_file)
             
             # Update cache tracking
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO data_cache
-                (cache_key, symbol, exchange, start_date, end_date, cached_date, row_count, file_path)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                cache_key, symbol, exchange, start_date, end_date,
-                datetime.now(), len(df), str(cache_file)
-            ))
-            conn.commit()
-            conn.close()
+            with self._lock:
+                self._conn.execute('''
+                    INSERT OR REPLACE INTO data_cache
+                    (cache_key, symbol, exchange, start_date, end_date, cached_date, row_count, file_path)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    cache_key, symbol, exchange, start_date, end_date,
+                    datetime.now(), len(df), str(cache_file)
+                ))
         except Exception as e:
             print(f"Error caching data: {e}")
     
@@ -247,63 +374,66 @@ class DataManager:
         if df.empty:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        first_date = df['date'].min()
-        last_date = df['date'].max()
+        # ISO strings: sqlite3 cannot bind pd.Timestamp
+        first_date = pd.Timestamp(df['date'].min()).date().isoformat()
+        last_date = pd.Timestamp(df['date'].max()).date().isoformat()
+        last_close = float(df.loc[df['date'].idxmax(), 'close'])
         
         # Calculate data quality score
         total_days = (pd.to_datetime(last_date) - pd.to_datetime(first_date)).days
         actual_days = len(df)
-        quality_score = (actual_days / total_days) * 100 if total_days > 0 else 0
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO stock_metadata
-            (symbol, exchange, first_available_date, last_updated_date, data_quality_score)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (symbol, exchange, first_date, last_date, quality_score))
-        
-        conn.commit()
-        conn.close()
+        quality_score = float((actual_days / total_days) * 100) if total_days > 0 else 0.0
+        
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO stock_metadata
+                (symbol, exchange, first_available_date, last_updated_date, data_quality_score, last_close)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (symbol, exchange, first_date, last_date, quality_score, last_close))
     
     def create_stock_group(self, group_name: str, symbols: List[str], exchange: str = 'NSE'):
         """Create a custom stock group."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for symbol in symbols:
-            cursor.execute('''
-                INSERT OR REPLACE INTO stock_groups (group_name, symbol, exchange)
-                VALUES (?, ?, ?)
-            ''', (group_name, symbol, exchange))
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('''
+                    INSERT OR REPLACE INTO stock_groups (group_name, symbol, exchange)
+                    VALUES (?, ?, ?)
+                ''', [(group_name, symbol, exchange) for symbol in symbols])
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
     
     def get_stock_group(self, group_name: str) -> List[Tuple[str, str]]:
         """Get stocks in a group."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT symbol, exchange FROM stock_groups
-            WHERE group_name = ?
-        ''', (group_name,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self._lock:
+            results = self._conn.execute('''
+                SELECT symbol, exchange FROM stock_groups
+                WHERE group_name = ?
+            ''', (group_name,)).fetchall()
         
         return results
     
+    def get_all_stock_groups(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Get every stock group with its members in one query."""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT group_name, symbol, exchange FROM stock_groups
+                ORDER BY group_name
+            ''').fetchall()
+        
+        groups = {}
+        for group_name, symbol, exchange in rows:
+            groups.setdefault(group_name, []).append((symbol, exchange))
+        
+        return groups
+    
     def list_stock_groups(self) -> List[str]:
         """List all stock groups."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT DISTINCT group_name FROM stock_groups')
-        results = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT group_name FROM stock_groups').fetchall()
+        results = [row[0] for row in rows]
         
         return results
     
@@ -315,8 +445,6 @@ class DataManager:
         group_name: Optional[str] = None
     ) -> pd.DataFrame:
         """Get filtered stock universe."""
-        conn = sqlite3.connect(self.db_path)
-        
         query = "SELECT DISTINCT symbol, exchange FROM stock_metadata WHERE 1=1"
         params = []
         
@@ -332,8 +460,8 @@ class DataManager:
             query += " AND market_cap_category = ?"
             params.append(market_cap)
         
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
         
         # If group specified, filter by group
         if group_name:
@@ -1,42 +1,130 @@
 """
 Data storage module using SQLite for local storage.
+OHLCV bars can optionally be kept in per-symbol Parquet shards, with SQLite
+holding only the metadata.
 """
 
 import pandas as pd
+import numpy as np
 import sqlite3
+import threading
+import weakref
 from datetime import datetime
-from typing import Optional, List, Tuple
+from pathlib import Path
+from typing import Optional, List, Tuple, Union
 import os
 
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    HAS_ADBC = True
+except ImportError:
+    HAS_ADBC = False
+
 
 class DataStorage:
     """Handles data storage and retrieval from SQLite database."""
     
-    def __init__(self, db_path: str = 'stock_data.db'):
+    # Dates are days since 1970-01-01, prices are integer paise (x100)
+    STOCK_DATA_SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS stock_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            exchange TEXT NOT NULL,
+            open INTEGER,
+            high INTEGER,
+            low INTEGER,
+            close INTEGER,
+            volume INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(date, symbol, exchange)
+        )
+    '''
+    
+    # get_data SQL for each (has start_date, has end_date) shape
+    _GET_DATA_BASE = '''
+        SELECT date, open, high, low, close, volume
+        FROM stock_data
+        WHERE symbol = ? AND exchange = ?'''
+    GET_DATA_QUERIES = {
+        (False, False): _GET_DATA_BASE + ' ORDER BY date',
+        (True, False): _GET_DATA_BASE + ' AND date >= ? ORDER BY date',
+        (False, True): _GET_DATA_BASE + ' AND date <= ? ORDER BY date',
+        (True, True): _GET_DATA_BASE + ' AND date >= ? AND date <= ? ORDER BY date',
+    }
+    
+    def __init__(self, db_path: str = 'stock_data.db', storage_format: str = 'sqlite'):
+        """
+        Args:
+            db_path: SQLite database path
+            storage_format: 'sqlite' to store bars in the stock_data table, or
+                'parquet' for per-symbol Parquet shards next to the database
+        """
+        if storage_format not in ('sqlite', 'parquet'):
+            raise ValueError(f"Unsupported storage format: {storage_format}")
+        if storage_format == 'parquet' and not HAS_PYARROW:
+            raise ImportError("pyarrow is required for parquet storage")
+        
         self.db_path = db_path
+        self.storage_format = storage_format
+        self.shard_dir = Path(db_path).parent / 'ohlcv_shards'
+        self.analytics_dir = Path(db_path).parent / 'analytics_cache'
+        # One connection per thread, reused across calls and closed on GC/exit
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, DataStorage._close_connections, self._connections)
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it with performance PRAGMAs on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA cache_size=-65536')
+            conn.execute('PRAGMA mmap_size=268435456')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @staticmethod
+    def _close_connections(connections: list):
+        """Close every pooled connection."""
+        for conn in connections:
+            conn.close()
+        connections.clear()
+    
+    def close(self):
+        """Close all connections opened by this instance."""
+        with self._connections_lock:
+            DataStorage._close_connections(self._connections)
+        self._local = threading.local()
+    
     def init_database(self):
         """Initialize database with required tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        # WAL is persistent in the database file, so it only needs setting once
+        conn.execute('PRAGMA journal_mode=WAL')
         cursor = conn.cursor()
         
+        # Migrate legacy text dates / REAL prices before (re)creating the table
+        columns = {row[1]: row[2].upper() for row in cursor.execute('PRAGMA table_info(stock_data)')}
+        if columns and any(columns.get(col) != 'INTEGER' for col in ('date', 'open', 'high', 'low', 'close')):
+            self._migrate_stock_data(conn, columns)
+        
         # Create main data table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stock_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE NOT NULL,
-                symbol TEXT NOT NULL,
-                exchange TEXT NOT NULL,
-                open REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                volume INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(date, symbol, exchange)
-            )
-        ''')
+        cursor.execute(self.STOCK_DATA_SCHEMA)
         
         # Create index for faster queries
         cursor.execute('''
@@ -56,42 +144,169 @@ class DataStorage:
             )
         ''')
         
+        # Covering index for exchange-filtered symbol listing
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_meta_exchange
+            ON metadata(exchange, symbol)
+        ''')
+        
         conn.commit()
-        conn.close()
+        
+        if self.storage_format == 'parquet':
+            self.shard_dir.mkdir(parents=True, exist_ok=True)
+    
+    def _migrate_stock_data(self, conn: sqlite3.Connection, columns: dict):
+        """One-time rebuild of stock_data into epoch-day dates and integer-paise prices."""
+        if columns.get('date') == 'INTEGER':
+            date_expr = 'date'
+        else:
+            date_expr = 'CAST(julianday(substr(date, 1, 10)) - 2440587.5 AS INTEGER)'
+        price_exprs = [
+            col if columns.get(col) == 'INTEGER' else f'CAST(ROUND({col} * 100) AS INTEGER)'
+            for col in ('open', 'high', 'low', 'close')
+        ]
+        
+        try:
+            conn.execute('BEGIN')
+            conn.execute('DROP INDEX IF EXISTS idx_symbol_date')
+            conn.execute('ALTER TABLE stock_data RENAME TO stock_data_legacy')
+            conn.execute(self.STOCK_DATA_SCHEMA)
+            conn.execute(f'''
+                INSERT OR REPLACE INTO stock_data
+                (date, symbol, exchange, open, high, low, close, volume, created_at)
+                SELECT {date_expr}, symbol, exchange, {', '.join(price_exprs)}, volume, created_at
+                FROM stock_data_legacy
+            ''')
+            conn.execute('DROP TABLE stock_data_legacy')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    @staticmethod
+    def _to_epoch_day(date) -> int:
+        """Convert a date string or timestamp to days since 1970-01-01."""
+        return int(pd.Timestamp(date).normalize().value // 86_400_000_000_000)
+    
+    def _shard_path(self, symbol: str, exchange: str) -> Path:
+        """Parquet shard holding one symbol's bars."""
+        return self.shard_dir / f"{symbol}_{exchange}.parquet"
+    
+    def _store_parquet(self, df: pd.DataFrame, symbol: str, exchange: str) -> Tuple[str, str]:
+        """Merge bars into the symbol's shard; returns the stored (first, last) dates."""
+        cols = ['date', 'open', 'high', 'low', 'close', 'volume']
+        new = df[cols].copy()
+        new['date'] = pd.to_datetime(new['date']).dt.tz_localize(None).dt.normalize()
+        
+        path = self._shard_path(symbol, exchange)
+        if path.exists():
+            new = pd.concat([pd.read_parquet(path), new], ignore_index=True)
+        new = new.drop_duplicates(subset=['date'], keep='last').sort_values('date')
+        
+        tmp_path = path.with_suffix('.parquet.tmp')
+        new.to_parquet(tmp_path, compression='zstd', index=False)
+        os.replace(tmp_path, path)
+        
+        return new['date'].iloc[0].strftime('%Y-%m-%d'), new['date'].iloc[-1].strftime('%Y-%m-%d')
+    
+    def _get_parquet(
+        self,
+        symbol: str,
+        exchange: str,
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> pd.DataFrame:
+        """Read a date range from the symbol's shard."""
+        cols = ['date', 'open', 'high', 'low', 'close', 'volume']
+        path = self._shard_path(symbol, exchange)
+        if not path.exists():
+            return pd.DataFrame(columns=cols)
+        
+        date_filter = None
+        if start_date:
+            date_filter = ds.field('date') >= pd.Timestamp(start_date).to_pydatetime()
+        if end_date:
+            end_filter = ds.field('date') <= pd.Timestamp(end_date).to_pydatetime()
+            date_filter = end_filter if date_filter is None else date_filter & end_filter
+        
+        table = ds.dataset(path, format='parquet').to_table(columns=cols, filter=date_filter)
+        return table.to_pandas()
     
     def store_data(self, df: pd.DataFrame, symbol: str, exchange: str):
         """Store DataFrame to database."""
         if df.empty:
             return
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        
+        # Memoized indicators were computed from the bars being replaced
+        self._analytics_path(symbol, exchange).unlink(missing_ok=True)
+        
+        if self.storage_format == 'parquet':
+            first_date, last_date = self._store_parquet(df, symbol, exchange)
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO metadata (symbol, exchange, first_date, last_date, last_updated)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (symbol, exchange, first_date, last_date, datetime.now()))
+            return
+        
+        # Prepare data (local calendar dates as epoch days)
+        dates = pd.to_datetime(df['date'])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        epoch_days = dates.to_numpy(dtype='datetime64[D]').astype('int64').tolist()
         
-        # Prepare data
-        df_to_store = df.copy()
-        df_to_store['symbol'] = symbol
-        df_to_store['exchange'] = exchange
+        # Prices as whole paise; floats with integral values are stored as
+        # INTEGER by the column affinity and NaN binds as NULL
+        paise = np.rint(df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64) * 100).tolist()
+        volumes = df['volume'].tolist()
         
-        # Store data (replace on conflict)
-        df_to_store[['date', 'symbol', 'exchange', 'open', 'high', 'low', 'close', 'volume']].to_sql(
-            'stock_data',
-            conn,
-            if_exists='append',
-            index=False,
-            method='multi'
+        # symbol/exchange are bound per row; no copy of the frame is made
+        rows = (
+            (day, symbol, exchange, o, h, l, c, v)
+            for day, (o, h, l, c), v in zip(epoch_days, paise, volumes)
         )
         
-        # Update metadata
-        first_date = df_to_store['date'].min()
-        last_date = df_to_store['date'].max()
+        # Store data and metadata in a single transaction (replace on conflict).
+        # Metadata is aggregated from the table so it covers all stored rows,
+        # not just this batch.
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO stock_data (date, symbol, exchange, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.execute('''
+                INSERT INTO metadata (symbol, exchange, first_date, last_date, last_updated)
+                SELECT symbol, exchange,
+                       date(MIN(date) * 86400, 'unixepoch'),
+                       date(MAX(date) * 86400, 'unixepoch'),
+                       ?
+                FROM stock_data
+                WHERE symbol = ? AND exchange = ?
+                GROUP BY symbol, exchange
+                ON CONFLICT(symbol, exchange) DO UPDATE SET
+                    first_date = excluded.first_date,
+                    last_date = excluded.last_date,
+                    last_updated = excluded.last_updated
+            ''', (datetime.now(), symbol, exchange))
+    
+    def _query_arrow(self, query: str, params: list) -> pd.DataFrame:
+        """Run a query through this thread's ADBC connection, returning columnar results."""
+        conn = getattr(self._local, 'adbc_conn', None)
+        if conn is None:
+            conn = adbc_sqlite.connect(str(self.db_path))
+            self._local.adbc_conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
         
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO metadata (symbol, exchange, first_date, last_date, last_updated)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (symbol, exchange, first_date, last_date, datetime.now()))
-        
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute(query, params)
+            table = cursor.fetch_arrow_table()
+        finally:
+            cursor.close()
+        return table.to_pandas()
     
     def get_data(
         self,
@@ -101,51 +316,108 @@ class DataStorage:
         end_date: Optional[str] = None
     ) -> pd.DataFrame:
         """Retrieve data from database."""
-        conn = sqlite3.connect(self.db_path)
+        if self.storage_format == 'parquet':
+            return self._get_parquet(symbol, exchange, start_date, end_date)
         
-        query = '''
-            SELECT date, open, high, low, close, volume
-            FROM stock_data
-            WHERE symbol = ? AND exchange = ?
-        '''
+        # Identical SQL strings hit sqlite3's per-connection statement cache
+        query = self.GET_DATA_QUERIES[(bool(start_date), bool(end_date))]
         params = [symbol, exchange]
         
         if start_date:
-            query += ' AND date >= ?'
-            params.append(start_date)
+            params.append(self._to_epoch_day(start_date))
         
         if end_date:
-            query += ' AND date <= ?'
-            params.append(end_date)
+            params.append(self._to_epoch_day(end_date))
+        
+        df = None
+        if HAS_ADBC:
+            try:
+                df = self._query_arrow(query, params)
+            except Exception as e:
+                print(f"ADBC query failed, falling back to sqlite3: {e}")
         
-        query += ' ORDER BY date'
+        if df is None:
+            rows = self._connect().execute(query, params).fetchall()
+            df = pd.DataFrame.from_records(
+                rows, columns=['date', 'open', 'high', 'low', 'close', 'volume'], coerce_float=True
+            )
         
-        df = pd.read_sql_query(query, conn, params=params, parse_dates=['date'])
-        conn.close()
+        df['date'] = pd.to_datetime(df['date'], unit='D')
+        price_cols = ['open', 'high', 'low', 'close']
+        df[price_cols] = df[price_cols].astype(np.float64) / 100.0
         
         return df
     
+    def _analytics_path(self, symbol: str, exchange: str) -> Path:
+        """Parquet file memoizing a symbol's computed indicators."""
+        return self.analytics_dir / f"{symbol}_{exchange}.parquet"
+    
+    @staticmethod
+    def _analytics_key(source: pd.DataFrame) -> bytes:
+        """Identify the price frame indicators were computed from by its last date and row count."""
+        return f"{pd.Timestamp(source['date'].max()).date().isoformat()}:{len(source)}".encode()
+    
+    def store_analytics(self, df: pd.DataFrame, symbol: str, exchange: str, source: pd.DataFrame):
+        """
+        Persist an indicator-enriched DataFrame (Analytics.get_dataframe output).
+        
+        Args:
+            source: Price frame the indicators were computed from
+        """
+        if df.empty or source.empty or not HAS_PYARROW:
+            return
+        
+        self.analytics_dir.mkdir(parents=True, exist_ok=True)
+        path = self._analytics_path(symbol, exchange)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b'source_key': self._analytics_key(source)}
+        )
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    
+    def get_analytics(self, symbol: str, exchange: str, source: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Load memoized indicators for a symbol.
+        
+        Args:
+            source: Price frame the caller would compute indicators from;
+                cached results built from a source with a different last
+                date or row count are treated as stale
+        
+        Returns:
+            Cached DataFrame, or None if missing or stale
+        """
+        path = self._analytics_path(symbol, exchange)
+        if not HAS_PYARROW or source.empty or not path.exists():
+            return None
+        
+        metadata = pq.read_schema(path).metadata or {}
+        if metadata.get(b'source_key') != self._analytics_key(source):
+            return None
+        
+        df = pd.read_parquet(path)
+        return None if df.empty else df
+    
     def get_available_symbols(self, exchange: Optional[str] = None) -> List[Tuple[str, str]]:
         """Get list of available symbols."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         
+        # (symbol, exchange) is the primary key, so rows are already unique
+        cursor = conn.cursor()
         if exchange:
-            query = 'SELECT DISTINCT symbol, exchange FROM metadata WHERE exchange = ?'
-            cursor = conn.cursor()
-            cursor.execute(query, (exchange,))
+            cursor.execute('SELECT symbol, exchange FROM metadata WHERE exchange = ?', (exchange,))
         else:
-            query = 'SELECT DISTINCT symbol, exchange FROM metadata'
-            cursor = conn.cursor()
-            cursor.execute(query)
+            cursor.execute('SELECT symbol, exchange FROM metadata')
         
         results = cursor.fetchall()
-        conn.close()
         
         return results
     
     def get_date_range(self, symbol: str, exchange: str) -> Tuple[Optional[str], Optional[str]]:
         """Get available date range for a symbol."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -155,26 +427,63 @@ class DataStorage:
         ''', (symbol, exchange))
         
         result = cursor.fetchone()
-        conn.close()
         
         if result:
             return result[0], result[1]
         return None, None
     
-    def clear_data(self, symbol: Optional[str] = None, exchange: Optional[str] = None):
-        """Clear data for a symbol or all data."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def clear_data(
+        self,
+        symbols: Optional[Union[str, List[str]]] = None,
+        exchange: Optional[str] = None
+    ):
+        """
+        Clear stored data.
         
-        if symbol and exchange:
-            cursor.execute('DELETE FROM stock_data WHERE symbol = ? AND exchange = ?', (symbol, exchange))
-            cursor.execute('DELETE FROM metadata WHERE symbol = ? AND exchange = ?', (symbol, exchange))
-        else:
-            cursor.execute('DELETE FROM stock_data')
-            cursor.execute('DELETE FROM metadata')
+        Args:
+            symbols: Symbol or list of symbols to clear (all symbols if None)
+            exchange: Restrict deletion to one exchange (all exchanges if None)
+        """
+        conn = self._connect()
         
-        conn.commit()
-        conn.close()
-
-
-
+        if symbols is None and exchange is None:
+            # Full wipe: dropping and recreating beats row-by-row deletes
+            conn.executescript('''
+                DROP TABLE IF EXISTS stock_data;
+                DROP TABLE IF EXISTS metadata;
+            ''')
+            self.init_database()
+            dirs = [self.analytics_dir] + ([self.shard_dir] if self.storage_format == 'parquet' else [])
+            for directory in dirs:
+                for path in directory.glob('*.parquet'):
+                    path.unlink()
+            return
+        
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        
+        with conn:
+            if symbols is None:
+                conn.execute('DELETE FROM stock_data WHERE exchange = ?', (exchange,))
+                conn.execute('DELETE FROM metadata WHERE exchange = ?', (exchange,))
+            elif exchange is None:
+                params = [(symbol,) for symbol in symbols]
+                conn.executemany('DELETE FROM stock_data WHERE symbol = ?', params)
+                conn.executemany('DELETE FROM metadata WHERE symbol = ?', params)
+            else:
+                params = [(symbol, exchange) for symbol in symbols]
+                conn.executemany('DELETE FROM stock_data WHERE symbol = ? AND exchange = ?', params)
+                conn.executemany('DELETE FROM metadata WHERE symbol = ? AND exchange = ?', params)
+        
+        # Shards and memoized indicators share the {symbol}_{exchange}.parquet naming
+        dirs = [self.analytics_dir] + ([self.shard_dir] if self.storage_format == 'parquet' else [])
+        for directory in dirs:
+            if symbols is None:
+                paths = directory.glob(f"*_{exchange}.parquet")
+            elif exchange is None:
+                paths = [path for symbol in symbols for path in directory.glob(f"{symbol}_*.parquet")]
+            else:
+                paths = [directory / f"{symbol}_{exchange}.parquet" for symbol in symbols]
+            for path in paths:
+                if path.exists():
+                    path.unlink()
@@ -3,6 +3,9 @@ Example usage of the NSE/BSE Backtester modules.
 This demonstrates how to use the modules programmatically.
 """
 
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
 from data_fetcher import DataFetcher
 from data_storage import DataStorage
 from analytics import Analytics
@@ -52,36 +55,58 @@ def example_screening():
     print("=" * 50)
     
     fetcher = DataFetcher()
+    storage = DataStorage()
     
     # Fetch data for multiple stocks
     symbols = ["RELIANCE", "TCS", "HDFCBANK"]
     print(f"\nFetching data for {symbols}...")
     
-    for symbol in symbols:
-        try:
-            df = fetcher.fetch_data(symbol, exchange="NSE", period="1y")
-            
-            # Compute analytics
+    def load_analytics(symbol):
+        df = fetcher.fetch_data(symbol, exchange="NSE", period="1y")
+        
+        # Compute analytics (reuse memoized indicators if built from the same bars)
+        df_analytics = storage.get_analytics(symbol, "NSE", source=df)
+        if df_analytics is None:
             analytics = Analytics(df)
             analytics.compute_all_indicators()
             df_analytics = analytics.get_dataframe()
-            
-            # Apply screening rule
-            rule_engine = RuleEngine(df_analytics)
-            rule = "rsi(14) < 30 and price > sma(200)"
-            filtered = rule_engine.filter_by_rule(rule)
-            
-            if len(filtered) > 0:
-                latest = filtered.iloc[-1]
-                print(f"\n{symbol}: MATCHES RULE")
-                print(f"  Current Price: ₹{latest['close']:.2f}")
-                print(f"  RSI: {latest.get('rsi', 'N/A'):.2f}")
-                print(f"  SMA 200: ₹{latest.get('sma_200', 'N/A'):.2f}")
-            else:
-                print(f"\n{symbol}: Does not match rule")
-        
+            storage.store_analytics(df_analytics, symbol, "NSE", source=df)
+        # Screen the same bar range that was just fetched
+        return df_analytics[df_analytics['date'] >= df['date'].min()]
+    
+    # Fetch concurrently (network bound)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {symbol: executor.submit(load_analytics, symbol) for symbol in symbols}
+    
+    frames = {}
+    for symbol, future in futures.items():
+        try:
+            frames[symbol] = future.result()
         except Exception as e:
             print(f"\n{symbol}: Error - {str(e)}")
+    
+    if not frames:
+        return
+    
+    # Apply screening rule once over all symbols; the rule only compares
+    # precomputed indicator columns row by row, so stacking is safe
+    panel = pd.concat(
+        [df.assign(symbol=symbol) for symbol, df in frames.items()], ignore_index=True
+    )
+    rule_engine = RuleEngine(panel)
+    rule = "rsi(14) < 30 and price > sma(200)"
+    filtered = rule_engine.filter_by_rule(rule)
+    matches = {symbol: group.sort_values('date') for symbol, group in filtered.groupby('symbol')}
+    
+    for symbol in frames:
+        if symbol in matches:
+            latest = matches[symbol].iloc[-1]
+            print(f"\n{symbol}: MATCHES RULE")
+            print(f"  Current Price: ₹{latest['close']:.2f}")
+            print(f"  RSI: {latest.get('rsi', 'N/A'):.2f}")
+            print(f"  SMA 200: ₹{latest.get('sma_200', 'N/A'):.2f}")
+        else:
+            print(f"\n{symbol}: Does not match rule")
 
 
 def example_backtest():
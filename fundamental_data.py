@@ -4,97 +4,186 @@ Fetches company fundamentals: P/E, P/B, ROE, Debt/Equity, etc.
 """
 
 import pandas as pd
+import numpy as np
 import yfinance as yf
 from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import shelve
+import asyncio
 import requests
 import time
+from config import Config
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+
+# One lock per shelf path, shared by every FundamentalData instance in the
+# process: dbm shelves do not tolerate concurrent writers. Separate processes
+# must not share a cache path.
+_SHELF_LOCKS = {}
+_SHELF_LOCKS_GUARD = threading.Lock()
+
+
+def _shelf_lock(path: str) -> threading.Lock:
+    """Return the process-wide lock for a shelf path."""
+    with _SHELF_LOCKS_GUARD:
+        return _SHELF_LOCKS.setdefault(path, threading.Lock())
 
 
 class FundamentalData:
     """Fetches and processes fundamental data for stocks."""
     
+    # Upper bound on concurrent Yahoo requests across all threads
+    MAX_CONCURRENT_REQUESTS = 16
+    CACHE_TTL_SECONDS = 6 * 3600
+    
+    # Yahoo quoteSummary endpoint used by the async batch path
+    QUOTE_SUMMARY_URL = "https://query1.finance.yahoo.com/v10/finance/quoteSummary/{}"
+    QUOTE_SUMMARY_MODULES = "price,assetProfile,summaryDetail,defaultKeyStatistics,financialData"
+    CRUMB_URL = "https://query1.finance.yahoo.com/v1/test/getcrumb"
+    
     def __init__(self):
+        Config.initialize_directories()
+        # (symbol, exchange) -> (fetched_at, fundamentals), backed by an on-disk shelf
         self.cache = {}
+        self.cache_path = str(Config.CACHE_DIR / 'fundamentals')
+        self._cache_lock = _shelf_lock(self.cache_path)
+        self._request_slots = threading.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+    
+    def _get_cached(self, symbol: str, exchange: str) -> Optional[Dict]:
+        """Return cached fundamentals if younger than CACHE_TTL_SECONDS."""
+        key = (symbol, exchange)
+        with self._cache_lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                try:
+                    with shelve.open(self.cache_path, flag='r') as shelf:
+                        entry = shelf.get(f"{exchange}:{symbol}")
+                except Exception:
+                    entry = None
+                if entry is not None:
+                    self.cache[key] = entry
+        
+        if entry is not None and time.time() - entry[0] < self.CACHE_TTL_SECONDS:
+            return entry[1]
+        return None
+    
+    def _set_cached(self, symbol: str, exchange: str, fundamentals: Dict):
+        """Store fundamentals in memory and on disk."""
+        entry = (time.time(), fundamentals)
+        with self._cache_lock:
+            self.cache[(symbol, exchange)] = entry
+            try:
+                with shelve.open(self.cache_path) as shelf:
+                    shelf[f"{exchange}:{symbol}"] = entry
+            except Exception as e:
+                print(f"Error caching fundamentals for {symbol}: {e}")
+    
+    def clear_fundamentals_cache(self):
+        """Drop all cached fundamentals, in memory and on disk."""
+        with self._cache_lock:
+            self.cache.clear()
+            with shelve.open(self.cache_path, flag='n'):
+                pass
     
     def get_fundamentals(self, symbol: str, exchange: str = 'NSE') -> Dict:
         """
         Get fundamental data for a stock.
         
         Returns:
-            Dictionary with fundamental metrics
+            Dictionary with fundamental metrics (defaults if the fetch fails)
         """
         try:
-            # Format symbol for yfinance
-            if exchange == 'NSE':
-                yf_symbol = f"{symbol}.NS"
-            elif exchange == 'BSE':
-                yf_symbol = f"{symbol}.BO"
-            else:
-                raise ValueError(f"Unsupported exchange: {exchange}")
-            
-            ticker = yf.Ticker(yf_symbol)
-            info = ticker.info
-            
-            fundamentals = {
-                'symbol': symbol,
-                'exchange': exchange,
-                'company_name': info.get('longName', 'N/A'),
-                'sector': info.get('sector', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                
-                # Valuation metrics
-                'pe_ratio': info.get('trailingPE', None),
-                'forward_pe': info.get('forwardPE', None),
-                'peg_ratio': info.get('pegRatio', None),
-                'price_to_book': info.get('priceToBook', None),
-                'price_to_sales': info.get('priceToSalesTrailing12Months', None),
-                'enterprise_value': info.get('enterpriseValue', None),
-                'market_cap': info.get('marketCap', None),
-                
-                # Profitability
-                'roe': info.get('returnOnEquity', None),
-                'roa': info.get('returnOnAssets', None),
-                'profit_margin': info.get('profitMargins', None),
-                'operating_margin': info.get('operatingMargins', None),
-                'gross_margin': info.get('grossMargins', None),
-                
-                # Financial health
-                'debt_to_equity': info.get('debtToEquity', None),
-                'current_ratio': info.get('currentRatio', None),
-                'quick_ratio': info.get('quickRatio', None),
-                'cash_per_share': info.get('totalCashPerShare', None),
-                
-                # Growth
-                'revenue_growth': info.get('revenueGrowth', None),
-                'earnings_growth': info.get('earningsGrowth', None),
-                'earnings_quarterly_growth': info.get('earningsQuarterlyGrowth', None),
-                
-                # Dividends
-                'dividend_yield': info.get('dividendYield', None),
-                'payout_ratio': info.get('payoutRatio', None),
-                
-                # Price data
-                'current_price': info.get('currentPrice', None),
-                '52w_high': info.get('fiftyTwoWeekHigh', None),
-                '52w_low': info.get('fiftyTwoWeekLow', None),
-                'beta': info.get('beta', None),
-                
-                # Volume
-                'average_volume': info.get('averageVolume', None),
-                'average_volume_10days': info.get('averageVolume10days', None),
-                
-                # Other
-                'book_value': info.get('bookValue', None),
-                'eps': info.get('trailingEps', None),
-                'forward_eps': info.get('forwardEps', None),
-            }
-            
-            return fundamentals
-        
+            return self.fetch_fundamentals(symbol, exchange)
         except Exception as e:
             print(f"Error fetching fundamentals for {symbol}: {e}")
             return self._get_default_fundamentals(symbol, exchange)
     
+    def fetch_fundamentals(self, symbol: str, exchange: str = 'NSE') -> Dict:
+        """Like get_fundamentals, but upstream errors propagate instead of returning defaults."""
+        cached = self._get_cached(symbol, exchange)
+        if cached is not None:
+            return cached
+        
+        ticker = yf.Ticker(self._yf_symbol(symbol, exchange))
+        with self._request_slots:
+            info = ticker.info
+        
+        fundamentals = self._build_fundamentals(symbol, exchange, info)
+        self._set_cached(symbol, exchange, fundamentals)
+        return fundamentals
+    
+    @staticmethod
+    def _yf_symbol(symbol: str, exchange: str) -> str:
+        """Format symbol for yfinance."""
+        if exchange == 'NSE':
+            return f"{symbol}.NS"
+        elif exchange == 'BSE':
+            return f"{symbol}.BO"
+        raise ValueError(f"Unsupported exchange: {exchange}")
+    
+    @staticmethod
+    def _build_fundamentals(symbol: str, exchange: str, info: Dict) -> Dict:
+        """Map a Yahoo info payload to our fundamental metric names."""
+        return {
+            'symbol': symbol,
+            'exchange': exchange,
+            'company_name': info.get('longName', 'N/A'),
+            'sector': info.get('sector', 'N/A'),
+            'industry': info.get('industry', 'N/A'),
+            
+            # Valuation metrics
+            'pe_ratio': info.get('trailingPE', None),
+            'forward_pe': info.get('forwardPE', None),
+            'peg_ratio': info.get('pegRatio', None),
+            'price_to_book': info.get('priceToBook', None),
+            'price_to_sales': info.get('priceToSalesTrailing12Months', None),
+            'enterprise_value': info.get('enterpriseValue', None),
+            'market_cap': info.get('marketCap', None),
+            
+            # Profitability
+            'roe': info.get('returnOnEquity', None),
+            'roa': info.get('returnOnAssets', None),
+            'profit_margin': info.get('profitMargins', None),
+            'operating_margin': info.get('operatingMargins', None),
+            'gross_margin': info.get('grossMargins', None),
+            
+            # Financial health
+            'debt_to_equity': info.get('debtToEquity', None),
+            'current_ratio': info.get('currentRatio', None),
+            'quick_ratio': info.get('quickRatio', None),
+            'cash_per_share': info.get('totalCashPerShare', None),
+            
+            # Growth
+            'revenue_growth': info.get('revenueGrowth', None),
+            'earnings_growth': info.get('earningsGrowth', None),
+            'earnings_quarterly_growth': info.get('earningsQuarterlyGrowth', None),
+            
+            # Dividends
+            'dividend_yield': info.get('dividendYield', None),
+            'payout_ratio': info.get('payoutRatio', None),
+            
+            # Price data
+            'current_price': info.get('currentPrice', None),
+            '52w_high': info.get('fiftyTwoWeekHigh', None),
+            '52w_low': info.get('fiftyTwoWeekLow', None),
+            'beta': info.get('beta', None),
+            
+            # Volume
+            'average_volume': info.get('averageVolume', None),
+            'average_volume_10days': info.get('averageVolume10days', None),
+            
+            # Other
+            'book_value': info.get('bookValue', None),
+            'eps': info.get('trailingEps', None),
+            'forward_eps': info.get('forwardEps', None),
+        }
+    
     def _get_default_fundamentals(self, symbol: str, exchange: str) -> Dict:
         """Return default/empty fundamentals if fetch fails."""
         return {
@@ -109,52 +198,129 @@ class FundamentalData:
             # Add other fields as None
         }
     
-    def get_fundamentals_batch(self, symbols: list, exchange: str = 'NSE') -> pd.DataFrame:
-        """Get fundamentals for multiple symbols."""
-        results = []
-        for symbol in symbols:
+    def get_fundamentals_batch(self, symbols: list, exchange: str = 'NSE', max_workers: int = 16) -> pd.DataFrame:
+        """
+        Get fundamentals for multiple symbols.
+        
+        Uncached symbols are fetched concurrently on one event loop with aiohttp
+        when available; anything that fails there falls back to a thread pool
+        over get_fundamentals.
+        """
+        results = {symbol: self._get_cached(symbol, exchange) for symbol in symbols}
+        missing = [symbol for symbol in symbols if results[symbol] is None]
+        
+        if missing and HAS_AIOHTTP:
+            try:
+                fetched = asyncio.run(self._fetch_batch_async(missing, exchange))
+            except Exception as e:
+                print(f"Async fundamentals fetch failed, falling back to threads: {e}")
+                fetched = []
+            for symbol, fundamentals in fetched:
+                if fundamentals is not None:
+                    self._set_cached(symbol, exchange, fundamentals)
+                    results[symbol] = fundamentals
+            missing = [symbol for symbol in missing if results[symbol] is None]
+        
+        def fetch(symbol):
             try:
-                fundamentals = self.get_fundamentals(symbol, exchange)
-                results.append(fundamentals)
-                time.sleep(0.2)  # Rate limiting
+                return self.get_fundamentals(symbol, exchange)
             except Exception as e:
                 print(f"Error fetching {symbol}: {e}")
-                continue
+                return None
+        
+        if missing:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for symbol, fundamentals in zip(missing, executor.map(fetch, missing)):
+                    results[symbol] = fundamentals
         
-        return pd.DataFrame(results)
+        return pd.DataFrame([r for r in (results[s] for s in symbols) if r is not None])
+    
+    async def _fetch_batch_async(self, symbols: list, exchange: str) -> list:
+        """Fetch quoteSummary for all symbols over one pooled aiohttp session."""
+        connector = aiohttp.TCPConnector(limit_per_host=8)
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            crumb = await self._get_crumb(session)
+            
+            async def fetch_one(symbol):
+                try:
+                    info = await self._fetch_info_async(session, self._yf_symbol(symbol, exchange), crumb)
+                    return symbol, self._build_fundamentals(symbol, exchange, info)
+                except Exception:
+                    return symbol, None
+            
+            return await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+    
+    async def _get_crumb(self, session) -> Optional[str]:
+        """Obtain the cookie + crumb pair Yahoo requires for quoteSummary."""
+        try:
+            async with session.get('https://fc.yahoo.com'):
+                pass
+            async with session.get(self.CRUMB_URL) as resp:
+                resp.raise_for_status()
+                return await resp.text()
+        except Exception:
+            return None
+    
+    async def _fetch_info_async(self, session, yf_symbol: str, crumb: Optional[str]) -> Dict:
+        """Fetch and flatten the quoteSummary modules into an info-style dict."""
+        params = {'modules': self.QUOTE_SUMMARY_MODULES}
+        if crumb:
+            params['crumb'] = crumb
+        
+        async with session.get(self.QUOTE_SUMMARY_URL.format(yf_symbol), params=params) as resp:
+            resp.raise_for_status()
+            payload = await resp.json()
+        
+        info = {}
+        for module in payload['quoteSummary']['result'][0].values():
+            if not isinstance(module, dict):
+                continue
+            for key, value in module.items():
+                # Numeric fields come as {'raw': ..., 'fmt': ...}
+                info[key] = value.get('raw') if isinstance(value, dict) else value
+        return info
     
     def calculate_additional_metrics(self, fundamentals_df: pd.DataFrame) -> pd.DataFrame:
         """Calculate additional derived metrics."""
         df = fundamentals_df.copy()
         
-        # Price to earnings growth
+        # Coerce numeric inputs once up front
+        valuation_cols = ['pe_ratio', 'price_to_book', 'price_to_sales']
+        for col in valuation_cols + ['earnings_growth']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        # Price to earnings growth (NaN where growth is missing or zero)
         if 'pe_ratio' in df.columns and 'earnings_growth' in df.columns:
-            df['peg_ratio_calc'] = df['pe_ratio'] / (df['earnings_growth'] * 100) if df['earnings_growth'].notna().any() else None
+            growth = df['earnings_growth'].to_numpy(dtype=np.float64) * 100.0
+            pe = df['pe_ratio'].to_numpy(dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                df['peg_ratio_calc'] = np.where(growth != 0, pe / growth, np.nan)
         
-        # Market cap category
+        # Market cap category (thresholds in crores)
         if 'market_cap' in df.columns:
-            def categorize_market_cap(mcap):
-                if pd.isna(mcap):
-                    return 'Unknown'
-                mcap_cr = mcap / 1e7  # Convert to crores
-                if mcap_cr >= 20000:
-                    return 'Large Cap'
-                elif mcap_cr >= 5000:
-                    return 'Mid Cap'
-                else:
-                    return 'Small Cap'
-            
-            df['market_cap_category'] = df['market_cap'].apply(categorize_market_cap)
+            mcap_cr = pd.to_numeric(df['market_cap'], errors='coerce').to_numpy(dtype=np.float64) / 1e7
+            categories = pd.cut(
+                mcap_cr,
+                bins=[-np.inf, 5000, 20000, np.inf],
+                labels=['Small Cap', 'Mid Cap', 'Large Cap'],
+                right=False
+            ).astype(object)
+            categories[np.isnan(mcap_cr)] = 'Unknown'
+            df['market_cap_category'] = categories
         
-        # Valuation score (lower is better)
-        valuation_cols = ['pe_ratio', 'price_to_book', 'price_to_sales']
-        df['valuation_score'] = 0
-        for col in valuation_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                # Normalize and add to score
-                normalized = (df[col] - df[col].min()) / (df[col].max() - df[col].min() + 1e-10)
-                df['valuation_score'] += normalized.fillna(0)
+        # Valuation score (lower is better): sum of per-column min-max normalized values
+        present_cols = [col for col in valuation_cols if col in df.columns]
+        if present_cols and len(df) > 0:
+            mat = df[present_cols].to_numpy(dtype=np.float32)
+            with np.errstate(invalid='ignore'):
+                col_min = np.where(np.isnan(mat), np.inf, mat).min(axis=0)
+                col_max = np.where(np.isnan(mat), -np.inf, mat).max(axis=0)
+                normalized = (mat - col_min) / (col_max - col_min + 1e-10)
+            df['valuation_score'] = np.nansum(normalized, axis=1)
+        else:
+            df['valuation_score'] = 0
         
         return df
 
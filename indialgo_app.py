@@ -4,28 +4,69 @@ Professional Indian Stock Market Analysis & Strategy Platform
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
-from datetime import datetime, timedelta
-import json
+import importlib
+import os
+import threading
+from itertools import cycle
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
+from typing import Optional, TYPE_CHECKING
+from datetime import date
 
-# Core modules
+# Core modules (page-specific modules are imported inside their render function)
 from config import Config
-from data_manager import DataManager
-from data_fetcher import DataFetcher
-from analytics import Analytics
-from rule_engine import RuleEngine
-from advanced_backtester import AdvancedBacktester
-from portfolio_manager import PortfolioManager
-from paper_trading import PaperTrading
-from ai_mentor import AIMentor
-from strategy_manager import StrategyManager
-from stock_grouper import StockGrouper
-from fundamental_data import FundamentalData
-from premium_features import PremiumFeatures
-from nse_stock_list import NSEStockList
+from utils import LRUCache
+
+if TYPE_CHECKING:
+    from data_manager import DataManager
+    from fundamental_data import FundamentalData
+
+# Custom stylesheet injected on every run
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'styles.css')
+
+# Charts longer than the threshold are downsampled (LTTB) to MAX_CHART_POINTS
+CHART_DOWNSAMPLE_THRESHOLD = 2000
+MAX_CHART_POINTS = 1500
+
+# Price bar colours for the Stock Analyzer chart
+CANDLE_UP_COLOR = '#26a69a'
+CANDLE_DOWN_COLOR = '#ef5350'
+
+# Parallel downloads for the Data Management bulk fetch
+FETCH_WORKERS = 16
+
+# Years of history visible when the Stock Analyzer chart first renders
+DEFAULT_VIEW_YEARS = 2
+
+# Frames kept in st.session_state.loaded_data per session (least recently used evicted)
+LOADED_DATA_MAX = 16
+
+# Built Stock Analyzer figures kept per session
+ANALYZER_FIGS_MAX = 8
+
+# Home page headline metrics, laid out row by row across three columns
+HOME_METRICS = [
+    ("Stocks Analyzed", "2000+"),
+    ("Strategies Tested", "100+"),
+    ("Data Coverage", "10+ Years"),
+    ("Indicators Available", "20+"),
+    ("Users", "Growing!"),
+    ("Exchanges", "NSE & BSE"),
+]
+
+# Stock Analyzer line traces: (column, legend name, subplot row)
+INDICATOR_TRACES = [
+    ('sma_50', 'SMA 50', 1),
+    ('sma_200', 'SMA 200', 1),
+    ('rsi', 'RSI', 2),
+    ('macd', 'MACD', 3),
+    ('macd_signal', 'Signal', 3),
+]
+CHART_FLOAT_COLUMNS = ['open', 'high', 'low', 'close'] + [col for col, _, _ in INDICATOR_TRACES]
+PLOT_COLUMNS = ['date'] + CHART_FLOAT_COLUMNS
 
 # Page configuration
 st.set_page_config(
@@ -35,64 +76,265 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better UX
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 1rem;
-    }
-    .premium-badge {
-        background-color: #ffd700;
-        color: #000;
-        padding: 0.2rem 0.5rem;
-        border-radius: 0.3rem;
-        font-size: 0.8rem;
-        font-weight: bold;
-    }
-    .info-box {
-        background-color: #e8f4f8;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better UX (read from disk once per process)
+@st.cache_resource
+def _load_css() -> str:
+    """Stylesheet wrapped in a <style> tag, ready for st.markdown."""
+    with open(CSS_PATH, encoding='utf-8') as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+st.markdown(_load_css(), unsafe_allow_html=True)
+
+# Cached data access (leading-underscore args are not hashed by Streamlit)
+@st.cache_data(persist='disk', max_entries=512, show_spinner=False)
+def _cached_hist(_data_manager: 'DataManager', symbol: str, exchange: str, years: int, as_of: str) -> pd.DataFrame:
+    """
+    Historical OHLCV data, memoized per (symbol, exchange, years, as_of).
+    
+    Persisted to disk so restarts reuse it. Streamlit ignores ttl on persisted
+    caches, so callers pass today's date as as_of to expire entries daily.
+    """
+    return _data_manager.get_historical_data(symbol, exchange, years=years, use_cache=True)
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_analytics(_df: pd.DataFrame, symbol: str, exchange: str, years: int, last_date):
+    """
+    Indicator DataFrame and summary stats for a price frame.
+    
+    The frame itself is not hashed; the key is (symbol, exchange, years, last_date),
+    so a refreshed history with a new bar recomputes while reruns are free.
+    """
+    from analytics import Analytics
+    
+    analytics = Analytics(_df)
+    analytics.compute_all_indicators(engine='numba')
+    return analytics.get_dataframe(), analytics.get_summary_stats()
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_indicator_kernels() -> bool:
+    """JIT-compile the numba indicator kernels once per process."""
+    from analytics import warmup_kernels, HAS_KERNELS
+    
+    warmup_kernels()
+    return HAS_KERNELS
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def _cached_fund(_fundamental_data: 'FundamentalData', symbol: str, exchange: str) -> Optional[dict]:
+    """
+    Fundamental data, memoized per (symbol, exchange).
+    
+    Lookup, parsing and network failures return None, which is cached too
+    so an unavailable symbol does not re-incur the network timeout on every
+    click. OSError covers requests/curl_cffi errors, timeouts and refused
+    connections.
+    """
+    try:
+        return _fundamental_data.fetch_fundamentals(symbol, exchange)
+    except (KeyError, ValueError, TypeError, OSError):
+        return None
+
+
+@st.cache_resource
+def _prefetch_pool() -> ThreadPoolExecutor:
+    """Process-wide worker pool for overlapping independent data fetches."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix='prefetch')
+
+
+def _with_script_ctx(fn):
+    """
+    Wrap fn to run under the calling script's ScriptRunContext, so the
+    st.cache_* functions it calls work on pool threads without warnings.
+    """
+    ctx = get_script_run_ctx()
+    
+    def run(*args, **kwargs):
+        # Pool threads are shared across sessions, so bind on every call
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+    return run
+
+
+def _fmt_number(value, suffix: str = '') -> str:
+    """Format a numeric value to 2 decimals, or 'N/A' when missing."""
+    if isinstance(value, (int, float)) and value == value:
+        return f"{value:.2f}{suffix}"
+    return "N/A"
+
+
+@st.cache_data(show_spinner=False)
+def _comparison_df() -> pd.DataFrame:
+    """Free vs Premium feature table; static for the life of the process."""
+    from premium_features import PremiumFeatures
+    
+    comparison = PremiumFeatures.get_feature_comparison()
+    
+    return pd.DataFrame({
+        'Feature': [
+            'Backtests per Month',
+            'Export Formats',
+            'Data Access',
+            'Support',
+            'Custom Indicators',
+            'API Access'
+        ],
+        'Free': [
+            comparison['free']['backtests_per_month'],
+            ', '.join(comparison['free']['export_formats']),
+            comparison['free']['data_access'],
+            comparison['free']['support'],
+            '❌',
+            '❌'
+        ],
+        'Premium': [
+            comparison['premium']['backtests_per_month'],
+            ', '.join(comparison['premium']['export_formats']),
+            comparison['premium']['data_access'],
+            comparison['premium']['support'],
+            '✅',
+            '✅'
+        ]
+    })
+
+
+def _build_price_figure(df_analytics: pd.DataFrame):
+    """Three-row price/RSI/MACD figure for the Stock Analyzer."""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from utils import downsample_ohlc, segment_arrays
+    
+    # Only the charted columns go through downsampling and serialization
+    plot_cols = [c for c in PLOT_COLUMNS if c in df_analytics.columns]
+    df_plot = downsample_ohlc(df_analytics[plot_cols], MAX_CHART_POINTS, threshold=CHART_DOWNSAMPLE_THRESHOLD)
+    
+    # float32 halves the payload plotly serializes to the browser
+    df_plot = df_plot.astype({c: 'float32' for c in CHART_FLOAT_COLUMNS if c in df_plot.columns})
+    if pd.api.types.is_datetime64_dtype(df_plot['date']):
+        df_plot['date'] = df_plot['date'].astype('datetime64[s]')
+    
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        row_heights=[0.6, 0.2, 0.2],
+        subplot_titles=("Price", "RSI", "MACD")
+    )
+    
+    # Plain NumPy arrays avoid per-trace Series copies during serialization
+    x = df_plot['date'].to_numpy()
+    
+    # OHLC as WebGL line segments: a thin low-high wick and a thick
+    # open-close body per bar, one trace pair per direction
+    opens, highs = df_plot['open'].to_numpy(), df_plot['high'].to_numpy()
+    lows, closes = df_plot['low'].to_numpy(), df_plot['close'].to_numpy()
+    rising = closes >= opens
+    for mask, color, label in ((rising, CANDLE_UP_COLOR, "Up"), (~rising, CANDLE_DOWN_COLOR, "Down")):
+        wick_x, wick_y = segment_arrays(x[mask], lows[mask], highs[mask])
+        fig.add_trace(
+            go.Scattergl(x=wick_x, y=wick_y, mode='lines', line=dict(color=color, width=1),
+                         legendgroup=label, showlegend=False, hoverinfo='skip'),
+            row=1, col=1
+        )
+        body_x, body_y = segment_arrays(x[mask], opens[mask], closes[mask])
+        fig.add_trace(
+            go.Scattergl(x=body_x, y=body_y, mode='lines', line=dict(color=color, width=4),
+                         legendgroup=label, name=f"Price ({label})"),
+            row=1, col=1
+        )
+    
+    # Indicator lines (row 1: moving averages, row 2: RSI, row 3: MACD)
+    cols = frozenset(df_plot.columns)
+    for col, name, row in INDICATOR_TRACES:
+        if col in cols:
+            fig.add_trace(
+                go.Scattergl(x=x, y=df_plot[col].to_numpy(), name=name),
+                row=row, col=1
+            )
+    
+    # RSI bands as GL segments rather than layout shapes
+    if 'rsi' in cols and len(x):
+        for level, color in ((70, "red"), (30, "green")):
+            fig.add_trace(
+                go.Scattergl(x=[x[0], x[-1]], y=[level, level], mode='lines',
+                             line=dict(color=color, dash='dash', width=1),
+                             showlegend=False, hoverinfo='skip'),
+                row=2, col=1
+            )
+    
+    # Open on the most recent years; the rest of the history is a zoom-out away
+    if pd.api.types.is_datetime64_any_dtype(df_plot['date']):
+        view_end = df_plot['date'].iloc[-1]
+        view_start = view_end - pd.DateOffset(years=DEFAULT_VIEW_YEARS)
+        if df_plot['date'].iloc[0] < view_start:
+            fig.update_xaxes(range=[view_start, view_end])
+    
+    fig.update_layout(height=800, xaxis_rangeslider_visible=False)
+    
+    return fig
+
+
+# Managers: key -> (module, class, takes data_manager)
+# Shared managers hold no per-user state and are built once per process
+_SHARED_MANAGERS = {
+    'data_manager': ('data_manager', 'DataManager', False),
+    'data_fetcher': ('data_fetcher', 'DataFetcher', False),
+    'fundamental_data': ('fundamental_data', 'FundamentalData', False),
+    'strategy_manager': ('strategy_manager', 'StrategyManager', False),
+    'stock_grouper': ('stock_grouper', 'StockGrouper', True),
+    'nse_stock_list': ('nse_stock_list', 'NSEStockList', False),
+}
+# Session managers keep user state (portfolios, paper accounts, chat history)
+_SESSION_MANAGERS = {
+    'portfolio_manager': ('portfolio_manager', 'PortfolioManager', True),
+    'paper_trading': ('paper_trading', 'PaperTrading', True),
+    'ai_mentor': ('ai_mentor', 'AIMentor', False),
+}
+
+
+def _build_manager(spec: tuple, data_manager=None):
+    """Import and construct a manager from its (module, class, takes data_manager) spec."""
+    module_name, class_name, takes_data_manager = spec
+    manager_cls = getattr(importlib.import_module(module_name), class_name)
+    return manager_cls(data_manager) if takes_data_manager else manager_cls()
+
+
+@st.cache_resource
+def _managers() -> SimpleNamespace:
+    """Shared managers, constructed once per process and reused by every session."""
+    mgr = SimpleNamespace()
+    for key, spec in _SHARED_MANAGERS.items():
+        setattr(mgr, key, _build_manager(spec, getattr(mgr, 'data_manager', None)))
+    return mgr
+
+
+def get_manager(key: str):
+    """Return this session's manager for key, importing and constructing it on first use."""
+    if key not in st.session_state:
+        st.session_state[key] = _build_manager(_SESSION_MANAGERS[key], mgr.data_manager)
+    return st.session_state[key]
+
+
+# Per-user session state: key -> factory for its initial value
+_SESSION_DEFAULTS = {
+    'user_tier': lambda: 'free',  # 'free' or 'premium'
+    'loaded_data': lambda: LRUCache(maxsize=LOADED_DATA_MAX),
+    'portfolios': dict,
+    'stock_database': lambda: None,
+    'analyzer_figs': lambda: LRUCache(maxsize=ANALYZER_FIGS_MAX),
+}
+
 
 # Initialize session state
 def init_session_state():
-    """Initialize all session state variables."""
-    if 'data_manager' not in st.session_state:
-        st.session_state.data_manager = DataManager()
-    if 'data_fetcher' not in st.session_state:
-        st.session_state.data_fetcher = DataFetcher()
-    if 'fundamental_data' not in st.session_state:
-        st.session_state.fundamental_data = FundamentalData()
-    if 'strategy_manager' not in st.session_state:
-        st.session_state.strategy_manager = StrategyManager()
-    if 'stock_grouper' not in st.session_state:
-        st.session_state.stock_grouper = StockGrouper(st.session_state.data_manager)
-    if 'portfolio_manager' not in st.session_state:
-        st.session_state.portfolio_manager = PortfolioManager(st.session_state.data_manager)
-    if 'paper_trading' not in st.session_state:
-        st.session_state.paper_trading = PaperTrading(st.session_state.data_manager)
-    if 'ai_mentor' not in st.session_state:
-        st.session_state.ai_mentor = AIMentor()
-    if 'user_tier' not in st.session_state:
-        st.session_state.user_tier = 'free'  # 'free' or 'premium'
-    if 'loaded_data' not in st.session_state:
-        st.session_state.loaded_data = {}
-    if 'portfolios' not in st.session_state:
-        st.session_state.portfolios = {}
-    if 'nse_stock_list' not in st.session_state:
-        st.session_state.nse_stock_list = NSEStockList()
-    if 'stock_database' not in st.session_state:
-        st.session_state.stock_database = None
+    """Initialize per-user session state; shared managers live in mgr."""
+    for key, factory in _SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = factory()
 
+mgr = _managers()
 init_session_state()
 
 # Sidebar
@@ -108,40 +350,14 @@ else:
 
 st.sidebar.markdown("---")
 
-# Navigation
-page = st.sidebar.radio(
-    "Navigation",
-    [
-        "Home",
-        "Stock Analyzer",
-        "Stock Screener",
-        "Strategy Backtester",
-        "Portfolio Manager",
-        "Paper Trading",
-        "AI Mentor",
-        "Data Management",
-        "Settings"
-    ]
-)
-
 # Home Page
-if page == "Home":
+def render_home():
+    """Home page."""
     st.markdown('<div class="main-header">indiAlgo</div>', unsafe_allow_html=True)
     st.markdown("### Professional Stock Analysis & Strategy Platform")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("Stocks Analyzed", "2000+")
-        st.metric("Indicators Available", "20+")
-    
-    with col2:
-        st.metric("Strategies Tested", "100+")
-        st.metric("Users", "Growing!")
-    
-    with col3:
-        st.metric("Data Coverage", "10+ Years")
-        st.metric("Exchanges", "NSE & BSE")
+    for (label, value), col in zip(HOME_METRICS, cycle(st.columns(3))):
+        col.metric(label, value)
     
     st.markdown("---")
     
@@ -182,39 +398,12 @@ if page == "Home":
     st.markdown("---")
     st.subheader("Free vs Premium")
     
-    comparison = PremiumFeatures.get_feature_comparison()
-    
-    comp_df = pd.DataFrame({
-        'Feature': [
-            'Backtests per Month',
-            'Export Formats',
-            'Data Access',
-            'Support',
-            'Custom Indicators',
-            'API Access'
-        ],
-        'Free': [
-            comparison['free']['backtests_per_month'],
-            ', '.join(comparison['free']['export_formats']),
-            comparison['free']['data_access'],
-            comparison['free']['support'],
-            '❌',
-            '❌'
-        ],
-        'Premium': [
-            comparison['premium']['backtests_per_month'],
-            ', '.join(comparison['premium']['export_formats']),
-            comparison['premium']['data_access'],
-            comparison['premium']['support'],
-            '✅',
-            '✅'
-        ]
-    })
-    
-    st.dataframe(comp_df, use_container_width=True, hide_index=True)
+    st.dataframe(_comparison_df(), use_container_width=True, hide_index=True)
+
 
 # Stock Analyzer Page
-elif page == "Stock Analyzer":
+def render_stock_analyzer():
+    """Stock Analyzer page: price history, indicators and fundamentals for one symbol."""
     st.title("Stock Analyzer")
     st.markdown("Analyze any NSE/BSE stock with comprehensive metrics. Data is fetched from online sources (yfinance).")
     
@@ -233,13 +422,24 @@ elif page == "Stock Analyzer":
         suggestions = ["RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK", "SBIN", "BHARTIARTL"]
         st.info(f"Quick suggestions: {', '.join(suggestions[:5])}")
     
+    # Remember the analyzed inputs so later reruns (e.g. toggling fundamentals)
+    # re-render from the caches instead of requiring another click
     if st.button("Analyze Stock", type="primary"):
+        st.session_state.analyzer_request = (symbol, exchange, years)
+    
+    if st.session_state.get('analyzer_request') is not None:
+        symbol, exchange, years = st.session_state.analyzer_request
         with st.spinner("Fetching data from online sources..."):
             try:
-                # Fetch data using data manager (which uses yfinance)
-                df = st.session_state.data_manager.get_historical_data(
-                    symbol, exchange, years=years, use_cache=True
-                )
+                # Fetch history and fundamentals concurrently (both are network-bound)
+                pool = _prefetch_pool()
+                hist_future = pool.submit(_with_script_ctx(_cached_hist), mgr.data_manager, symbol, exchange, years, date.today().isoformat())
+                fund_future = None
+                if use_fundamentals:
+                    fund_future = pool.submit(_with_script_ctx(_cached_fund), mgr.fundamental_data, symbol, exchange)
+                # Numba compiles the indicator kernels while the network fetch is in flight
+                pool.submit(_with_script_ctx(_warm_indicator_kernels))
+                df = hist_future.result()
                 
                 if df.empty:
                     st.error(f"No data found for {symbol} on {exchange}. Please check:")
@@ -248,116 +448,60 @@ elif page == "Stock Analyzer":
                     st.write("- Stock is listed and actively traded")
                     st.write("- Internet connection is working")
                 else:
-                    st.session_state.loaded_data[f"{exchange}_{symbol}"] = df
+                    st.session_state.loaded_data.put(f"{exchange}_{symbol}", df)
                     
                     st.success(f"Successfully fetched {len(df)} days of data for {symbol}")
                     
-                    # Compute analytics
-                    analytics = Analytics(df)
-                    analytics.compute_all_indicators()
-                    df_analytics = analytics.get_dataframe()
-                    
-                    # Display summary
-                    stats = analytics.get_summary_stats()
+                    # Compute analytics (cached per symbol/exchange/years/last bar)
+                    last_date = df['date'].iloc[-1] if 'date' in df.columns else df.index[-1]
+                    df_analytics, stats = _cached_analytics(df, symbol, exchange, years, last_date)
                     
                     st.success(f"✅ Analyzed {symbol} - {len(df)} days of data")
                     
-                    # Metrics
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Total Return", f"{stats['total_return']:.2f}%")
-                        st.metric("CAGR", f"{stats['annualized_return']:.2f}%")
-                    with col2:
-                        st.metric("Current Price", f"₹{stats['current_price']:.2f}")
-                        st.metric("Volatility", f"{stats['volatility']:.2f}%" if stats['volatility'] else "N/A")
-                    with col3:
-                        st.metric("Max Drawdown", f"{stats['max_drawdown']:.2f}%" if stats['max_drawdown'] else "N/A")
-                        st.metric("Sharpe Ratio", f"{stats['sharpe_ratio']:.2f}" if stats['sharpe_ratio'] else "N/A")
-                    with col4:
-                        st.metric("52W High", f"₹{stats['high_52w']:.2f}")
-                        st.metric("52W Low", f"₹{stats['low_52w']:.2f}")
-                    
-                    # Charts
-                    st.subheader("Price Chart with Indicators")
-                    
-                    fig = make_subplots(
-                        rows=3, cols=1,
-                        shared_xaxes=True,
-                        vertical_spacing=0.03,
-                        row_heights=[0.6, 0.2, 0.2],
-                        subplot_titles=("Price", "RSI", "MACD")
-                    )
-                    
-                    # Candlestick
-                    fig.add_trace(
-                        go.Candlestick(
-                            x=df_analytics['date'],
-                            open=df_analytics['open'],
-                            high=df_analytics['high'],
-                            low=df_analytics['low'],
-                            close=df_analytics['close'],
-                            name="Price"
-                        ),
-                        row=1, col=1
-                    )
+                    # Headline metrics, then the remaining stats as one table
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Total Return", f"{stats['total_return']:.2f}%")
+                    col2.metric("CAGR", f"{stats['annualized_return']:.2f}%")
+                    col3.metric("Current Price", f"₹{stats['current_price']:.2f}")
                     
-                    # Moving averages
-                    if 'sma_50' in df_analytics.columns:
-                        fig.add_trace(
-                            go.Scatter(x=df_analytics['date'], y=df_analytics['sma_50'], name="SMA 50"),
-                            row=1, col=1
-                        )
-                    if 'sma_200' in df_analytics.columns:
-                        fig.add_trace(
-                            go.Scatter(x=df_analytics['date'], y=df_analytics['sma_200'], name="SMA 200"),
-                            row=1, col=1
-                        )
+                    stats_df = pd.DataFrame([
+                        ("Volatility", _fmt_number(stats['volatility'], '%')),
+                        ("Max Drawdown", _fmt_number(stats['max_drawdown'], '%')),
+                        ("Sharpe Ratio", _fmt_number(stats['sharpe_ratio'])),
+                        ("52W High", f"₹{stats['high_52w']:.2f}"),
+                        ("52W Low", f"₹{stats['low_52w']:.2f}"),
+                    ], columns=["Metric", "Value"])
+                    st.dataframe(stats_df, use_container_width=True, hide_index=True)
                     
-                    # RSI
-                    if 'rsi' in df_analytics.columns:
-                        fig.add_trace(
-                            go.Scatter(x=df_analytics['date'], y=df_analytics['rsi'], name="RSI"),
-                            row=2, col=1
-                        )
-                        fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
-                        fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
-                    
-                    # MACD
-                    if 'macd' in df_analytics.columns:
-                        fig.add_trace(
-                            go.Scatter(x=df_analytics['date'], y=df_analytics['macd'], name="MACD"),
-                            row=3, col=1
-                        )
-                        if 'macd_signal' in df_analytics.columns:
-                            fig.add_trace(
-                                go.Scatter(x=df_analytics['date'], y=df_analytics['macd_signal'], name="Signal"),
-                                row=3, col=1
-                            )
-                    
-                    fig.update_layout(height=800, xaxis_rangeslider_visible=False)
-                    st.plotly_chart(fig, use_container_width=True)
+                    # Charts (st.expander still runs its body, so the build is gated by a toggle)
+                    with st.expander("Price Chart with Indicators", expanded=True):
+                        if st.toggle("Render chart", value=True, key="analyzer_render_chart"):
+                            # Figures are kept per analyzed input so unrelated reruns skip the rebuild
+                            fig_key = (symbol, exchange, years, last_date)
+                            fig = st.session_state.analyzer_figs.get(fig_key)
+                            if fig is None:
+                                fig = _build_price_figure(df_analytics)
+                                st.session_state.analyzer_figs.put(fig_key, fig)
+                            
+                            st.plotly_chart(fig, use_container_width=True)
                     
                     # Fundamental data
                     if use_fundamentals:
                         st.subheader("Fundamental Data")
-                        try:
-                            fundamentals = st.session_state.fundamental_data.get_fundamentals(symbol, exchange)
-                            
-                            fund_col1, fund_col2 = st.columns(2)
-                            
-                            with fund_col1:
-                                st.write("**Valuation**")
-                                st.write(f"P/E Ratio: {fundamentals.get('pe_ratio', 'N/A')}")
-                                st.write(f"P/B Ratio: {fundamentals.get('price_to_book', 'N/A')}")
-                                st.write(f"Market Cap: ₹{fundamentals.get('market_cap', 0)/1e7:.2f} Cr" if fundamentals.get('market_cap') else "N/A")
-                            
-                            with fund_col2:
-                                st.write("**Profitability**")
-                                st.write(f"ROE: {fundamentals.get('roe', 'N/A')}%")
-                                st.write(f"ROA: {fundamentals.get('roa', 'N/A')}%")
-                                st.write(f"Profit Margin: {fundamentals.get('profit_margin', 'N/A')}%")
-                        except Exception as e:
-                            st.info(f"Fundamental data not available for this stock. Error: {str(e)}")
+                        fundamentals = fund_future.result()
+                        if fundamentals is None:
+                            st.info("Fundamental data not available for this stock.")
+                        else:
+                            market_cap = fundamentals.get('market_cap')
+                            fund_df = pd.DataFrame([
+                                ("Valuation", "P/E Ratio", _fmt_number(fundamentals.get('pe_ratio'))),
+                                ("Valuation", "P/B Ratio", _fmt_number(fundamentals.get('price_to_book'))),
+                                ("Valuation", "Market Cap", f"₹{market_cap / 1e7:,.2f} Cr" if market_cap else "N/A"),
+                                ("Profitability", "ROE", _fmt_number(fundamentals.get('roe'), '%')),
+                                ("Profitability", "ROA", _fmt_number(fundamentals.get('roa'), '%')),
+                                ("Profitability", "Profit Margin", _fmt_number(fundamentals.get('profit_margin'), '%')),
+                            ], columns=["Category", "Metric", "Value"])
+                            st.table(fund_df.set_index(["Category", "Metric"]))
             
             except Exception as e:
                 st.error(f"Error fetching data: {str(e)}")
@@ -369,34 +513,53 @@ elif page == "Stock Analyzer":
                 - Data is fetched from yfinance - there may be rate limits
                 """)
 
-# Continue with other pages...
-# For brevity, I'll create a comprehensive deployment guide document
 
-elif page == "AI Mentor":
+# AI Mentor Page
+def render_ai_mentor():
+    """AI Mentor page."""
     st.title("AI Mentor")
     st.markdown("Get educational guidance on trading concepts and strategies")
     
     st.info("Ask questions about trading, indicators, backtesting, or portfolio management.")
     
-    # Chat interface
+    _ai_mentor_chat()
+
+
+def _queue_mentor_question(question: str):
+    """Button callback: ask a suggested question on the fragment's next run."""
+    st.session_state.mentor_pending = question
+
+
+@st.fragment
+def _ai_mentor_chat():
+    """Chat block; reruns on its own so suggestion clicks skip the full page."""
     user_message = st.text_input("Ask a question:", placeholder="e.g., Explain RSI indicator")
     
+    question = st.session_state.pop('mentor_pending', None)
     if st.button("Ask AI Mentor") and user_message:
+        question = user_message
+    
+    if question:
         with st.spinner("Thinking..."):
-            response = st.session_state.ai_mentor.chat(user_message)
-            
-            st.markdown("### AI Mentor Response:")
-            st.markdown(response['answer'])
-            
-            if 'suggestions' in response:
-                st.markdown("**Suggested Questions:**")
-                for suggestion in response['suggestions']:
-                    if st.button(suggestion, key=f"sugg_{suggestion}"):
-                        st.session_state.user_message = suggestion
-                        st.rerun()
+            st.session_state.mentor_response = get_manager('ai_mentor').chat(question)
+    
+    response = st.session_state.get('mentor_response')
+    if response:
+        st.markdown("### AI Mentor Response:")
+        st.markdown(response['answer'])
+        
+        if 'suggestions' in response:
+            st.markdown("**Suggested Questions:**")
+            for suggestion in response['suggestions']:
+                st.button(suggestion, key=f"sugg_{suggestion}",
+                          on_click=_queue_mentor_question, args=(suggestion,))
+
 
 # Data Management Page
-elif page == "Data Management":
+def render_data_management():
+    """Data Management page: stock list and historical data updates."""
+    import numpy as np
+    
     st.title("Data Management")
     st.markdown("Update and manage stock data from online sources")
     
@@ -409,14 +572,14 @@ elif page == "Data Management":
         if st.button("Fetch Latest Stock List", type="primary"):
             with st.spinner("Fetching stock list from NSE..."):
                 try:
-                    stock_list = st.session_state.nse_stock_list.fetch_all_nse_stocks()
+                    stock_list = mgr.nse_stock_list.fetch_all_nse_stocks()
                     st.session_state.stock_database = stock_list
                     st.success(f"Successfully fetched {len(stock_list)} stocks!")
                     st.dataframe(stock_list.head(50), use_container_width=True)
                 except Exception as e:
                     st.error(f"Error fetching stock list: {e}")
                     st.info("Using fallback comprehensive list")
-                    stock_list = st.session_state.nse_stock_list._get_comprehensive_fallback_list()
+                    stock_list = mgr.nse_stock_list._get_comprehensive_fallback_list()
                     st.session_state.stock_database = stock_list
                     st.dataframe(stock_list, use_container_width=True)
     
@@ -442,25 +605,42 @@ elif page == "Data Management":
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
-                results = []
-                for i, symbol in enumerate(symbols):
-                    status_text.text(f"Fetching {symbol}... ({i+1}/{len(symbols)})")
-                    try:
-                        df = st.session_state.data_manager.get_historical_data(
-                            symbol, exchange, years=years, use_cache=True
-                        )
-                        if not df.empty:
-                            results.append({'symbol': symbol, 'status': 'Success', 'records': len(df)})
-                        else:
-                            results.append({'symbol': symbol, 'status': 'No Data', 'records': 0})
-                    except Exception as e:
-                        results.append({'symbol': symbol, 'status': f'Error: {str(e)[:50]}', 'records': 0})
-                    
-                    progress_bar.progress((i + 1) / len(symbols))
+                # Fetches are network-bound, so overlap them on a thread pool;
+                # results and progress are only touched from this (script) thread
+                # Per-symbol outcomes in preallocated columns, indexed by input position
+                n = len(symbols)
+                statuses = np.empty(n, dtype=object)
+                records = np.zeros(n, dtype=np.int32)
+                as_of = date.today().isoformat()
+                fetch_hist = _with_script_ctx(_cached_hist)
+                with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+                    futures = {
+                        pool.submit(fetch_hist, mgr.data_manager, symbol, exchange, years, as_of): i
+                        for i, symbol in enumerate(symbols)
+                    }
+                    for done_count, future in enumerate(as_completed(futures), 1):
+                        i = futures[future]
+                        try:
+                            df = future.result()
+                            if not df.empty:
+                                statuses[i], records[i] = 'Success', len(df)
+                            else:
+                                statuses[i] = 'No Data'
+                        except Exception as e:
+                            statuses[i] = f'Error: {str(e)[:50]}'
+                        
+                        status_text.text(f"Fetched {symbols[i]} ({done_count}/{n})")
+                        progress_bar.progress(done_count / n)
+                
+                results = pd.DataFrame({
+                    'symbol': symbols,
+                    'status': pd.Categorical(statuses),
+                    'records': records
+                })
                 
                 status_text.text("Complete!")
-                st.success(f"Fetched data for {len([r for r in results if r['status'] == 'Success'])} stocks")
-                st.dataframe(pd.DataFrame(results), use_container_width=True)
+                st.success(f"Fetched data for {int((results['status'] == 'Success').sum())} stocks")
+                st.dataframe(results, use_container_width=True)
     
     with tab3:
         st.subheader("Stock Database")
@@ -470,8 +650,10 @@ elif page == "Data Management":
         else:
             st.info("Click 'Fetch Latest Stock List' to load stocks")
 
+
 # Settings Page
-elif page == "Settings":
+def render_settings():
+    """Settings page."""
     st.title("Settings")
     
     st.subheader("Data Settings")
@@ -493,21 +675,26 @@ elif page == "Settings":
         st.session_state.user_tier = user_tier.lower()
         st.info("Tier updated (Premium features require subscription)")
 
-# Placeholder for other pages
-elif page == "Stock Screener":
-    st.title("Stock Screener")
-    st.info("Stock screener feature - Coming soon with full functionality")
 
-elif page == "Strategy Backtester":
-    st.title("Strategy Backtester")
-    st.info("Strategy backtester feature - Coming soon with full functionality")
+# Pages not built out yet
+def render_placeholder(title: str, feature: str):
+    """Coming-soon page for a feature that is not available in this app yet."""
+    st.title(title)
+    st.info(f"{feature} feature - Coming soon with full functionality")
 
-elif page == "Portfolio Manager":
-    st.title("Portfolio Manager")
-    st.info("Portfolio manager feature - Coming soon with full functionality")
 
-elif page == "Paper Trading":
-    st.title("Paper Trading")
-    st.info("Paper trading feature - Coming soon with full functionality")
-# Paper Trading, Portfolio Manager, etc. would follow similar patterns
+# Navigation: page label -> renderer (only the selected page's code runs)
+PAGES = {
+    "Home": render_home,
+    "Stock Analyzer": render_stock_analyzer,
+    "Stock Screener": partial(render_placeholder, "Stock Screener", "Stock screener"),
+    "Strategy Backtester": partial(render_placeholder, "Strategy Backtester", "Strategy backtester"),
+    "Portfolio Manager": partial(render_placeholder, "Portfolio Manager", "Portfolio manager"),
+    "Paper Trading": partial(render_placeholder, "Paper Trading", "Paper trading"),
+    "AI Mentor": render_ai_mentor,
+    "Data Management": render_data_management,
+    "Settings": render_settings,
+}
 
+page = st.sidebar.radio("Navigation", list(PAGES))
+PAGES[page]()
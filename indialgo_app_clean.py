@@ -5,26 +5,17 @@ Professional Indian Stock Market Analysis & Strategy Platform
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
-from datetime import datetime, timedelta
-import json
 
-# Core modules
+# Core modules (plotly, Analytics and PremiumFeatures are imported by the pages using them)
 from config import Config
 from data_manager import DataManager
 from data_fetcher import DataFetcher
-from analytics import Analytics
-from rule_engine import RuleEngine
-from advanced_backtester import AdvancedBacktester
 from portfolio_manager import PortfolioManager
 from paper_trading import PaperTrading
 from ai_mentor import AIMentor
 from strategy_manager import StrategyManager
 from stock_grouper import StockGrouper
 from fundamental_data import FundamentalData
-from premium_features import PremiumFeatures
 from nse_stock_list import NSEStockList
 
 # Page configuration
@@ -63,6 +54,41 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Free vs Premium table (static, built once per process)
+@st.cache_data(show_spinner=False)
+def _comparison_df() -> pd.DataFrame:
+    """Free vs Premium feature comparison table for the Home page."""
+    from premium_features import PremiumFeatures
+    
+    comparison = PremiumFeatures.get_feature_comparison()
+    
+    return pd.DataFrame({
+        'Feature': [
+            'Backtests per Month',
+            'Export Formats',
+            'Data Access',
+            'Support',
+            'Custom Indicators',
+            'API Access'
+        ],
+        'Free': [
+            comparison['free']['backtests_per_month'],
+            ', '.join(comparison['free']['export_formats']),
+            comparison['free']['data_access'],
+            comparison['free']['support'],
+            'No',
+            'No'
+        ],
+        'Premium': [
+            comparison['premium']['backtests_per_month'],
+            ', '.join(comparison['premium']['export_formats']),
+            comparison['premium']['data_access'],
+            comparison['premium']['support'],
+            'Yes',
+            'Yes'
+        ]
+    })
+
 # Initialize session state
 def init_session_state():
     """Initialize all session state variables."""
@@ -181,39 +207,14 @@ if page == "Home":
     st.markdown("---")
     st.subheader("Free vs Premium")
     
-    comparison = PremiumFeatures.get_feature_comparison()
-    
-    comp_df = pd.DataFrame({
-        'Feature': [
-            'Backtests per Month',
-            'Export Formats',
-            'Data Access',
-            'Support',
-            'Custom Indicators',
-            'API Access'
-        ],
-        'Free': [
-            comparison['free']['backtests_per_month'],
-            ', '.join(comparison['free']['export_formats']),
-            comparison['free']['data_access'],
-            comparison['free']['support'],
-            'No',
-            'No'
-        ],
-        'Premium': [
-            comparison['premium']['backtests_per_month'],
-            ', '.join(comparison['premium']['export_formats']),
-            comparison['premium']['data_access'],
-            comparison['premium']['support'],
-            'Yes',
-            'Yes'
-        ]
-    })
-    
-    st.dataframe(comp_df, use_container_width=True, hide_index=True)
+    st.dataframe(_comparison_df(), use_container_width=True, hide_index=True)
 
 # Stock Analyzer Page
 elif page == "Stock Analyzer":
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from analytics import Analytics
+    
     st.title("Stock Analyzer")
     st.markdown("Analyze any NSE/BSE stock with comprehensive metrics")
     
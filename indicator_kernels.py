@@ -0,0 +1,110 @@
+"""
+Numba kernels for technical indicators.
+Pure loop implementations matching the `ta` library semantics, JIT-compiled
+at first use. build_kernels.py compiles the same functions ahead of time.
+"""
+
+import numpy as np
+from numba import njit
+
+
+def sma_py(close, period):
+    """Simple moving average; NaN until a full window is available."""
+    n = close.shape[0]
+    out = np.empty_like(close)
+    total = 0.0
+    for i in range(n):
+        total += close[i]
+        if i >= period:
+            total -= close[i - period]
+        if i >= period - 1:
+            out[i] = total / period
+        else:
+            out[i] = np.nan
+    return out
+
+
+def ema_py(close, period):
+    """Exponential moving average (span=period, adjust=False), skipping leading NaNs."""
+    n = close.shape[0]
+    out = np.empty_like(close)
+    alpha = 2.0 / (period + 1.0)
+    value = 0.0
+    count = 0
+    for i in range(n):
+        x = close[i]
+        if count == 0:
+            if np.isnan(x):
+                out[i] = np.nan
+                continue
+            value = x
+        elif not np.isnan(x):
+            value = alpha * x + (1.0 - alpha) * value
+        count += 1
+        if count >= period:
+            out[i] = value
+        else:
+            out[i] = np.nan
+    return out
+
+
+def rsi_py(close, period):
+    """Wilder RSI (alpha=1/period, adjust=False), as computed by ta.momentum.RSIIndicator."""
+    n = close.shape[0]
+    out = np.empty_like(close)
+    alpha = 1.0 / period
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(n):
+        delta = close[i] - close[i - 1] if i > 0 else 0.0
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if i == 0:
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            avg_gain = alpha * gain + (1.0 - alpha) * avg_gain
+            avg_loss = alpha * loss + (1.0 - alpha) * avg_loss
+        if i < period - 1:
+            out[i] = np.nan
+        elif avg_loss == 0.0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+def rolling_std_py(values, period, ddof):
+    """Rolling standard deviation; NaN until a full window without NaNs is available."""
+    n = values.shape[0]
+    out = np.empty_like(values)
+    total = 0.0
+    total_sq = 0.0
+    nan_count = 0
+    for i in range(n):
+        x = values[i]
+        if np.isnan(x):
+            nan_count += 1
+        else:
+            total += x
+            total_sq += x * x
+        if i >= period:
+            old = values[i - period]
+            if np.isnan(old):
+                nan_count -= 1
+            else:
+                total -= old
+                total_sq -= old * old
+        if i < period - 1 or nan_count > 0:
+            out[i] = np.nan
+        else:
+            mean = total / period
+            var = (total_sq - period * mean * mean) / (period - ddof)
+            out[i] = np.sqrt(var) if var > 0.0 else 0.0
+    return out
+
+
+sma = njit(cache=True)(sma_py)
+ema = njit(cache=True)(ema_py)
+rsi = njit(cache=True)(rsi_py)
+rolling_std = njit(cache=True)(rolling_std_py)
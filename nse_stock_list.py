@@ -5,169 +5,240 @@ Fetches all NSE listed stocks from online sources.
 
 import pandas as pd
 import requests
-from typing import List, Dict
+import hashlib
+import time
+import io
+from itertools import chain
+from typing import List, Dict, Optional, Tuple
 import json
 
+from config import Config
+
+try:
+    import pyarrow  # Enables the pyarrow CSV engine and Arrow-backed dtypes
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# The NSE equity list changes at most daily; skip the network within this window
+LIST_TTL_SECONDS = 12 * 3600
+LIST_COLUMNS = {'SYMBOL': 'symbol', 'NAME OF COMPANY': 'name'}
+# Arrow-backed strings make Streamlit's Arrow serialization of the list near zero-copy
+STRING_DTYPE = 'string[pyarrow]' if HAS_PYARROW else object
+
+
+# Fallback universe by sector, used when the NSE equity list cannot be downloaded
+_FALLBACK_SECTORS = {
+    'Nifty 50': (
+        'RELIANCE', 'TCS', 'HDFCBANK', 'INFY', 'HINDUNILVR', 'ICICIBANK', 'KOTAKBANK',
+        'LT', 'SBIN', 'BHARTIARTL', 'ITC', 'AXISBANK', 'ASIANPAINT', 'MARUTI', 'TITAN',
+        'ULTRACEMCO', 'NESTLEIND', 'WIPRO', 'ONGC', 'POWERGRID', 'BAJFINANCE', 'HDFC',
+        'SBILIFE', 'HDFCLIFE', 'SUNPHARMA', 'DRREDDY', 'CIPLA', 'TATASTEEL', 'JSWSTEEL',
+        'HINDALCO', 'VEDL', 'NTPC', 'TATAPOWER', 'M&M', 'TATAMOTORS', 'BAJAJ-AUTO',
+        'EICHERMOT', 'HEROMOTOCO', 'ADANIENT', 'ADANIPORTS', 'APOLLOHOSP', 'BAJAJFINSV',
+        'BPCL', 'COALINDIA', 'DIVISLAB', 'GRASIM', 'HCLTECH', 'INDUSINDBK', 'JINDALSTEL',
+        'MARICO', 'NTPC', 'RELIANCE', 'TECHM', 'ULTRACEMCO',
+    ),
+    'Banking': (
+        'HDFCBANK', 'ICICIBANK', 'KOTAKBANK', 'AXISBANK', 'SBIN', 'INDUSINDBK',
+        'FEDERALBNK', 'BANDHANBNK', 'PNB', 'UNIONBANK', 'IDFCFIRSTB', 'RBLBANK',
+        'YESBANK', 'SOUTHBANK', 'CANBK', 'BANKBARODA', 'CENTRALBK', 'INDIANB',
+    ),
+    'IT': (
+        'TCS', 'INFY', 'WIPRO', 'HCLTECH', 'TECHM', 'LTIM', 'MPHASIS', 'PERSISTENT',
+        'MINDTREE', 'COFORGE', 'LTI', 'ZENSAR', 'CYIENT', 'HEXAWARE', 'NIITTECH',
+    ),
+    'Pharma': (
+        'SUNPHARMA', 'DRREDDY', 'CIPLA', 'LUPIN', 'TORNTPHARM', 'GLENMARK', 'CADILAHC',
+        'DIVISLAB', 'BIOCON', 'AUROPHARMA', 'ALKEM', 'REDDY', 'ZYDUSLIFE', 'LAURUSLABS',
+    ),
+    'FMCG': (
+        'HINDUNILVR', 'ITC', 'NESTLEIND', 'BRITANNIA', 'DABUR', 'MARICO', 'GODREJCP',
+        'EMAMILTD', 'COLPAL', 'JUBLFOOD', 'TATACONSUM', 'RADICO', 'UNITEDSPIRIT',
+    ),
+    'Auto': (
+        'MARUTI', 'M&M', 'TATAMOTORS', 'BAJAJ-AUTO', 'EICHERMOT', 'HEROMOTOCO',
+        'ASHOKLEY', 'TVSMOTOR', 'BAJAJHOLD', 'FORCEMOT', 'MAHSCOOTER',
+    ),
+    'Oil & Gas': (
+        'RELIANCE', 'ONGC', 'IOC', 'BPCL', 'GAIL', 'HPCL', 'PETRONET', 'IGL', 'MGL',
+    ),
+    'Metals': (
+        'TATASTEEL', 'JSWSTEEL', 'HINDALCO', 'VEDL', 'JINDALSTEL', 'SAIL', 'NMDC',
+        'MOIL', 'NALCO', 'HINDZINC',
+    ),
+    'Power': (
+        'NTPC', 'POWERGRID', 'TATAPOWER', 'ADANIPOWER', 'TORNTPOWER', 'NHPC', 'SJVN',
+    ),
+    'Telecom': (
+        'BHARTIARTL', 'RELIANCE', 'IDEA',
+    ),
+    'Infrastructure': (
+        'LT', 'ADANIPORTS', 'IRCTC', 'RVNL', 'IRFC', 'CONCOR', 'GMRINFRA',
+    ),
+    'Consumer Durables': (
+        'TITAN', 'WHIRLPOOL', 'VOLTAS', 'BLUEDART', 'ORIENTELEC',
+    ),
+    'Cement': (
+        'ULTRACEMCO', 'SHREECEM', 'ACC', 'AMBUJACEM', 'RAMCOCEM', 'JKLAKSHMI',
+    ),
+    'Paints': (
+        'ASIANPAINT', 'BERGEPAINT', 'KANSAINER', 'AKZOINDIA',
+    ),
+    'Financial Services': (
+        'BAJFINANCE', 'HDFC', 'SBILIFE', 'HDFCLIFE', 'ICICIPRULI', 'SHRIRAMFIN',
+        'M&MFIN', 'CHOLAFIN', 'LICHSGFIN',
+    ),
+}
+
+# Built once at import: order-preserving dedup across sectors
+_FALLBACK_SYMBOLS = list(dict.fromkeys(chain.from_iterable(_FALLBACK_SECTORS.values())))
+_FALLBACK_DF = pd.DataFrame({
+    'symbol': pd.array(_FALLBACK_SYMBOLS, dtype=STRING_DTYPE),
+    'name': pd.array(_FALLBACK_SYMBOLS, dtype=STRING_DTYPE),  # Name would come from actual data
+    'exchange': pd.array(['NSE'] * len(_FALLBACK_SYMBOLS), dtype=STRING_DTYPE)
+})
+
+
+class _HashingReader(io.RawIOBase):
+    """Read-through wrapper that SHA-256 hashes a stream as it is consumed."""
+    
+    def __init__(self, raw):
+        self._raw = raw
+        self._sha = hashlib.sha256()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        self._sha.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+    
+    def hexdigest(self) -> str:
+        """Digest of everything read so far."""
+        return self._sha.hexdigest()
+
 
 class NSEStockList:
     """Fetches comprehensive NSE stock list."""
     
+    # Core constituents per sector, and the reverse symbol -> sectors index
+    SECTOR_MAP = {
+        'Banking': ('HDFCBANK', 'ICICIBANK', 'KOTAKBANK', 'AXISBANK', 'SBIN', 'INDUSINDBK'),
+        'IT': ('TCS', 'INFY', 'WIPRO', 'HCLTECH', 'TECHM', 'LTIM'),
+        'Pharma': ('SUNPHARMA', 'DRREDDY', 'CIPLA', 'LUPIN', 'TORNTPHARM'),
+        'FMCG': ('HINDUNILVR', 'ITC', 'NESTLEIND', 'BRITANNIA', 'DABUR'),
+        'Auto': ('MARUTI', 'M&M', 'TATAMOTORS', 'BAJAJ-AUTO', 'EICHERMOT'),
+        'Oil & Gas': ('RELIANCE', 'ONGC', 'IOC', 'BPCL', 'GAIL'),
+        'Metals': ('TATASTEEL', 'JSWSTEEL', 'HINDALCO', 'VEDL'),
+        'Power': ('NTPC', 'POWERGRID', 'TATAPOWER'),
+        'Telecom': ('BHARTIARTL', 'RELIANCE'),
+        'Infrastructure': ('LT', 'ADANIPORTS')
+    }
+    SYMBOL_TO_SECTORS = {}
+    for _sector, _symbols in SECTOR_MAP.items():
+        for _symbol in _symbols:
+            SYMBOL_TO_SECTORS[_symbol] = SYMBOL_TO_SECTORS.get(_symbol, ()) + (_sector,)
+    del _sector, _symbols, _symbol
+    
     def __init__(self):
         self.nse_equity_list_url = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/csv',
         }
+        self.session = requests.Session()
+        Config.initialize_directories()
+        self.list_cache_path = Config.CACHE_DIR / "nse_equity_list.pkl"
+        self.list_meta_path = Config.CACHE_DIR / "nse_equity_list.json"
     
     def fetch_all_nse_stocks(self) -> pd.DataFrame:
         """
         Fetch all NSE listed stocks from NSE website.
         Returns DataFrame with symbol, name, and other details.
+        
+        The parsed list is cached on disk. Within LIST_TTL_SECONDS it is returned
+        without a request; after that a conditional GET (ETag/Last-Modified) is
+        sent and the CSV is only re-parsed when its content hash changes.
         """
         try:
-            # Try to fetch from NSE
-            response = requests.get(self.nse_equity_list_url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                # Read CSV
-                from io import StringIO
-                df = pd.read_csv(StringIO(response.text))
+            meta, cached = self._load_cached_list()
+            if cached is not None and time.time() - meta.get('fetched_at', 0) < LIST_TTL_SECONDS:
+                return cached
+            
+            headers = dict(self.headers)
+            if cached is not None:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+            
+            # Try to fetch from NSE; the body is parsed as it streams in
+            with self.session.get(self.nse_equity_list_url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    meta['fetched_at'] = time.time()
+                    self._save_cached_list(meta)
+                    return cached
                 
-                # Standardize columns
-                if 'SYMBOL' in df.columns:
-                    df = df.rename(columns={'SYMBOL': 'symbol', 'NAME OF COMPANY': 'name'})
-                
-                df['exchange'] = 'NSE'
-                return df[['symbol', 'name', 'exchange']]
+                if response.status_code == 200:
+                    response.raw.decode_content = True
+                    body = _HashingReader(response.raw)
+                    df = self._parse_equity_list(io.BufferedReader(body))
+                    digest = body.hexdigest()
+                    
+                    unchanged = cached is not None and digest == meta.get('sha256')
+                    self._save_cached_list({
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'sha256': digest,
+                        'fetched_at': time.time(),
+                    }, None if unchanged else df)
+                    return df
         except Exception as e:
             print(f"Error fetching from NSE: {e}")
         
         # Fallback to comprehensive list
         return self._get_comprehensive_fallback_list()
     
+    @staticmethod
+    def _parse_equity_list(stream) -> pd.DataFrame:
+        """Parse EQUITY_L.csv from a binary stream, keeping only symbol and company name."""
+        # pyarrow engine: multithreaded parse into Arrow-backed columns
+        read_options = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'} if HAS_PYARROW else {}
+        df = pd.read_csv(stream, usecols=list(LIST_COLUMNS), **read_options)
+        df = df.rename(columns=LIST_COLUMNS).assign(exchange='NSE')
+        return df[['symbol', 'name', 'exchange']].astype({'exchange': STRING_DTYPE})
+    
+    def _load_cached_list(self):
+        """Return (metadata, DataFrame) from the disk cache, or ({}, None)."""
+        try:
+            with open(self.list_meta_path, 'r') as f:
+                meta = json.load(f)
+            return meta, pd.read_pickle(self.list_cache_path)
+        except (OSError, ValueError, EOFError):
+            return {}, None
+    
+    def _save_cached_list(self, meta: Dict, df: Optional[pd.DataFrame] = None):
+        """Persist cache metadata, and the parsed list when it changed."""
+        try:
+            if df is not None:
+                df.to_pickle(self.list_cache_path)
+            with open(self.list_meta_path, 'w') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"Error caching NSE stock list: {e}")
+    
     def _get_comprehensive_fallback_list(self) -> pd.DataFrame:
         """Comprehensive fallback list of NSE stocks."""
-        stocks = []
-        
-        # Nifty 50 stocks
-        nifty50 = [
-            'RELIANCE', 'TCS', 'HDFCBANK', 'INFY', 'HINDUNILVR', 'ICICIBANK', 'KOTAKBANK',
-            'LT', 'SBIN', 'BHARTIARTL', 'ITC', 'AXISBANK', 'ASIANPAINT', 'MARUTI', 'TITAN',
-            'ULTRACEMCO', 'NESTLEIND', 'WIPRO', 'ONGC', 'POWERGRID', 'BAJFINANCE', 'HDFC',
-            'SBILIFE', 'HDFCLIFE', 'SUNPHARMA', 'DRREDDY', 'CIPLA', 'TATASTEEL', 'JSWSTEEL',
-            'HINDALCO', 'VEDL', 'NTPC', 'TATAPOWER', 'M&M', 'TATAMOTORS', 'BAJAJ-AUTO',
-            'EICHERMOT', 'HEROMOTOCO', 'ADANIENT', 'ADANIPORTS', 'APOLLOHOSP', 'BAJAJFINSV',
-            'BPCL', 'COALINDIA', 'DIVISLAB', 'GRASIM', 'HCLTECH', 'INDUSINDBK', 'JINDALSTEL',
-            'MARICO', 'NTPC', 'RELIANCE', 'TECHM', 'ULTRACEMCO'
-        ]
-        
-        # Banking
-        banking = [
-            'HDFCBANK', 'ICICIBANK', 'KOTAKBANK', 'AXISBANK', 'SBIN', 'INDUSINDBK',
-            'FEDERALBNK', 'BANDHANBNK', 'PNB', 'UNIONBANK', 'IDFCFIRSTB', 'RBLBANK',
-            'YESBANK', 'SOUTHBANK', 'CANBK', 'BANKBARODA', 'CENTRALBK', 'INDIANB'
-        ]
-        
-        # IT
-        it = [
-            'TCS', 'INFY', 'WIPRO', 'HCLTECH', 'TECHM', 'LTIM', 'MPHASIS', 'PERSISTENT',
-            'MINDTREE', 'COFORGE', 'LTI', 'ZENSAR', 'CYIENT', 'HEXAWARE', 'NIITTECH'
-        ]
-        
-        # Pharma
-        pharma = [
-            'SUNPHARMA', 'DRREDDY', 'CIPLA', 'LUPIN', 'TORNTPHARM', 'GLENMARK', 'CADILAHC',
-            'DIVISLAB', 'BIOCON', 'AUROPHARMA', 'ALKEM', 'REDDY', 'ZYDUSLIFE', 'LAURUSLABS'
-        ]
-        
-        # FMCG
-        fmcg = [
-            'HINDUNILVR', 'ITC', 'NESTLEIND', 'BRITANNIA', 'DABUR', 'MARICO', 'GODREJCP',
-            'EMAMILTD', 'COLPAL', 'JUBLFOOD', 'TATACONSUM', 'RADICO', 'UNITEDSPIRIT'
-        ]
-        
-        # Auto
-        auto = [
-            'MARUTI', 'M&M', 'TATAMOTORS', 'BAJAJ-AUTO', 'EICHERMOT', 'HEROMOTOCO',
-            'ASHOKLEY', 'TVSMOTOR', 'BAJAJHOLD', 'FORCEMOT', 'MAHSCOOTER'
-        ]
-        
-        # Oil & Gas
-        oil_gas = [
-            'RELIANCE', 'ONGC', 'IOC', 'BPCL', 'GAIL', 'HPCL', 'PETRONET', 'IGL', 'MGL'
-        ]
-        
-        # Metals
-        metals = [
-            'TATASTEEL', 'JSWSTEEL', 'HINDALCO', 'VEDL', 'JINDALSTEL', 'SAIL', 'NMDC',
-            'MOIL', 'NALCO', 'HINDZINC'
-        ]
-        
-        # Power
-        power = [
-            'NTPC', 'POWERGRID', 'TATAPOWER', 'ADANIPOWER', 'TORNTPOWER', 'NHPC', 'SJVN'
-        ]
-        
-        # Telecom
-        telecom = [
-            'BHARTIARTL', 'RELIANCE', 'IDEA'
-        ]
-        
-        # Infrastructure
-        infra = [
-            'LT', 'ADANIPORTS', 'IRCTC', 'RVNL', 'IRFC', 'CONCOR', 'GMRINFRA'
-        ]
-        
-        # Consumer Durables
-        consumer = [
-            'TITAN', 'WHIRLPOOL', 'VOLTAS', 'BLUEDART', 'ORIENTELEC'
-        ]
-        
-        # Cement
-        cement = [
-            'ULTRACEMCO', 'SHREECEM', 'ACC', 'AMBUJACEM', 'RAMCOCEM', 'JKLAKSHMI'
-        ]
-        
-        # Paints
-        paints = [
-            'ASIANPAINT', 'BERGEPAINT', 'KANSAINER', 'AKZOINDIA'
-        ]
-        
-        # Financial Services
-        financial = [
-            'BAJFINANCE', 'HDFC', 'SBILIFE', 'HDFCLIFE', 'ICICIPRULI', 'SHRIRAMFIN',
-            'M&MFIN', 'CHOLAFIN', 'LICHSGFIN'
-        ]
-        
-        # Combine all
-        all_symbols = list(set(
-            nifty50 + banking + it + pharma + fmcg + auto + oil_gas + metals + 
-            power + telecom + infra + consumer + cement + paints + financial
-        ))
-        
-        # Create DataFrame
-        stocks = []
-        for symbol in all_symbols:
-            stocks.append({
-                'symbol': symbol,
-                'name': symbol,  # Name would come from actual data
-                'exchange': 'NSE'
-            })
-        
-        return pd.DataFrame(stocks)
+        # Shallow copy so callers cannot mutate the shared frame's columns
+        return _FALLBACK_DF.copy(deep=False)
     
     def get_stocks_by_sector(self, sector: str) -> List[str]:
         """Get stocks by sector."""
-        sector_map = {
-            'Banking': ['HDFCBANK', 'ICICIBANK', 'KOTAKBANK', 'AXISBANK', 'SBIN', 'INDUSINDBK'],
-            'IT': ['TCS', 'INFY', 'WIPRO', 'HCLTECH', 'TECHM', 'LTIM'],
-            'Pharma': ['SUNPHARMA', 'DRREDDY', 'CIPLA', 'LUPIN', 'TORNTPHARM'],
-            'FMCG': ['HINDUNILVR', 'ITC', 'NESTLEIND', 'BRITANNIA', 'DABUR'],
-            'Auto': ['MARUTI', 'M&M', 'TATAMOTORS', 'BAJAJ-AUTO', 'EICHERMOT'],
-            'Oil & Gas': ['RELIANCE', 'ONGC', 'IOC', 'BPCL', 'GAIL'],
-            'Metals': ['TATASTEEL', 'JSWSTEEL', 'HINDALCO', 'VEDL'],
-            'Power': ['NTPC', 'POWERGRID', 'TATAPOWER'],
-            'Telecom': ['BHARTIARTL', 'RELIANCE'],
-            'Infrastructure': ['LT', 'ADANIPORTS']
-        }
-        return sector_map.get(sector, [])
-
+        return list(self.SECTOR_MAP.get(sector, ()))
+    
+    def get_sectors_for_symbol(self, symbol: str) -> Tuple[str, ...]:
+        """Get the sectors a stock belongs to."""
+        return self.SYMBOL_TO_SECTORS.get(symbol, ())
@@ -3,6 +3,11 @@ Paper Trading module for indiAlgo.
 Virtual trading with realistic simulation.
 """
 
+import time
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
@@ -11,6 +16,175 @@ from config import Config
 from data_manager import DataManager
 
 
+class Holdings:
+    """Open positions for one account, stored as parallel arrays."""
+    
+    def __init__(self, capacity: int = 8):
+        self.symbols = []
+        self.index = {}
+        self._shares = np.zeros(capacity, dtype=np.int64)
+        self._avg_price = np.zeros(capacity, dtype=np.float64)
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+    
+    @property
+    def shares(self) -> np.ndarray:
+        """Shares held, aligned with `symbols`."""
+        return self._shares[:len(self.symbols)]
+    
+    @property
+    def avg_price(self) -> np.ndarray:
+        """Average entry price, aligned with `symbols`."""
+        return self._avg_price[:len(self.symbols)]
+    
+    def get(self, symbol: str) -> Optional[tuple]:
+        """Return (shares, avg_price) for a symbol, or None if not held."""
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        return int(self._shares[i]), float(self._avg_price[i])
+    
+    def buy(self, symbol: str, quantity: int, price: float):
+        """Add shares, updating the average entry price."""
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            if i == len(self._shares):
+                self._shares = np.resize(self._shares, max(2 * i, 8))
+                self._avg_price = np.resize(self._avg_price, max(2 * i, 8))
+            self.symbols.append(symbol)
+            self.index[symbol] = i
+            self._shares[i] = quantity
+            self._avg_price[i] = price
+            return
+        
+        new_shares = self._shares[i] + quantity
+        self._avg_price[i] = (self._shares[i] * self._avg_price[i] + quantity * price) / new_shares
+        self._shares[i] = new_shares
+    
+    def sell(self, symbol: str, quantity: int):
+        """Remove shares, dropping the position once it is flat."""
+        i = self.index[symbol]
+        self._shares[i] -= quantity
+        if self._shares[i] > 0:
+            return
+        
+        # Move the last position into the freed slot to keep the arrays dense
+        last = len(self.symbols) - 1
+        if i != last:
+            moved = self.symbols[last]
+            self.symbols[i] = moved
+            self.index[moved] = i
+            self._shares[i] = self._shares[last]
+            self._avg_price[i] = self._avg_price[last]
+        self.symbols.pop()
+        del self.index[symbol]
+    
+    def to_dict(self) -> Dict[str, Dict]:
+        """Positions as {symbol: {'shares': int, 'avg_price': float}}."""
+        return {
+            symbol: {'shares': int(shares), 'avg_price': float(avg_price)}
+            for symbol, shares, avg_price in zip(self.symbols, self.shares, self.avg_price)
+        }
+
+
+class TradeLog:
+    """Executed trades for one account, stored column-wise in growable arrays."""
+    
+    SIDES = ('BUY', 'SELL')
+    
+    def __init__(self, user_id: str, capacity: int = 64):
+        self.user_id = user_id
+        self.size = 0
+        self.index = {}  # {trade_id: row}
+        self.journal = {}  # {row: journal entry}
+        self.trade_id = np.empty(capacity, dtype=object)
+        self.symbol = np.empty(capacity, dtype=object)
+        self.exchange = np.empty(capacity, dtype=object)
+        self.side = np.empty(capacity, dtype=np.int8)  # index into SIDES
+        self.quantity = np.empty(capacity, dtype=np.int64)
+        self.price = np.empty(capacity, dtype=np.float64)
+        self.value = np.empty(capacity, dtype=np.float64)
+        self.pnl = np.empty(capacity, dtype=np.float64)  # NaN for buys
+        self.timestamp = np.empty(capacity, dtype='datetime64[us]')
+        self.day = np.empty(capacity, dtype=np.int32)  # days since epoch
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def _grow(self):
+        """Double the capacity of every column."""
+        capacity = max(2 * len(self.side), 64)
+        for name in ('trade_id', 'symbol', 'exchange', 'side', 'quantity', 'price', 'value', 'pnl', 'timestamp', 'day'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+    
+    def append(
+        self,
+        trade_id: str,
+        symbol: str,
+        side: str,
+        quantity: int,
+        price: float,
+        value: float,
+        pnl: Optional[float],
+        timestamp: datetime,
+        exchange: str
+    ) -> int:
+        """Append a trade and return its row."""
+        if self.size == len(self.side):
+            self._grow()
+        
+        row = self.size
+        self.trade_id[row] = trade_id
+        self.symbol[row] = symbol
+        self.exchange[row] = exchange
+        self.side[row] = self.SIDES.index(side)
+        self.quantity[row] = quantity
+        self.price[row] = price
+        self.value[row] = value
+        self.pnl[row] = np.nan if pnl is None else pnl
+        self.timestamp[row] = timestamp
+        self.day[row] = self.timestamp[row].astype('datetime64[D]').astype(np.int64)
+        self.index[trade_id] = row
+        self.size += 1
+        return row
+    
+    def record(self, row: int) -> Dict:
+        """Build the dict view of one trade."""
+        pnl = self.pnl[row]
+        trade = {
+            'trade_id': self.trade_id[row],
+            'user_id': self.user_id,
+            'symbol': self.symbol[row],
+            'side': self.SIDES[self.side[row]],
+            'quantity': int(self.quantity[row]),
+            'price': float(self.price[row]),
+            'value': float(self.value[row]),
+            'pnl': None if np.isnan(pnl) else float(pnl),
+            'timestamp': self.timestamp[row].astype(datetime).isoformat(),
+            'exchange': self.exchange[row]
+        }
+        if row in self.journal:
+            trade['journal'] = self.journal[row]
+        return trade
+    
+    def records(self, rows) -> List[Dict]:
+        """Build dict views for the given rows."""
+        return [self.record(row) for row in rows]
+    
+    def day_mask(self, date_str: str) -> np.ndarray:
+        """Boolean mask of the trades executed on a YYYY-MM-DD date."""
+        target = np.datetime64(date_str, 'D').astype(np.int64)
+        return self.day[:self.size] == target
+
+
 class PaperTrading:
     """Paper trading system with virtual money."""
     
@@ -19,7 +193,16 @@ class PaperTrading:
         self.user_id = user_id
         self.accounts = {}
         self.orders = {}
-        self.trades = {}
+        self.trades = {}  # {user_id: TradeLog}
+        self._price_cache = {}  # {(symbol, exchange): (price, monotonic timestamp)}
+        self._price_ttl = 5.0
+        self._order_seq = count(1)
+        self._trade_seq = count(1)
+        self._executors = {}  # {user_id: single-thread executor}
+        self._accounts_lock = threading.Lock()
+        # Stops the order threads when this object is collected (e.g. its
+        # session is dropped) or at interpreter exit, whichever comes first
+        self._finalizer = weakref.finalize(self, PaperTrading._shutdown_executors, self._executors)
         self._initialize_account(user_id)
     
     def _initialize_account(self, user_id: str, initial_balance: float = 100000):
@@ -28,14 +211,62 @@ class PaperTrading:
             'user_id': user_id,
             'cash': initial_balance,
             'initial_balance': initial_balance,
-            'holdings': {},  # {symbol: {'shares': int, 'avg_price': float}}
+            'holdings': Holdings(),
             'created_at': datetime.now().isoformat(),
             'total_trades': 0,
             'realized_pnl': 0
         }
         
         self.orders[user_id] = []
-        self.trades[user_id] = []
+        self.trades[user_id] = TradeLog(user_id)
+        self._executors[user_id] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'paper-{user_id}')
+    
+    @staticmethod
+    def _shutdown_executors(executors: Dict[str, ThreadPoolExecutor], wait: bool = False):
+        for executor in list(executors.values()):
+            executor.shutdown(wait=wait)
+    
+    def close(self):
+        """Shut down the per-account order threads, waiting for queued orders."""
+        if self._finalizer.detach():
+            self._shutdown_executors(self._executors, wait=True)
+    
+    def _run(self, user_id: str, fn, *args):
+        """Run fn on the account's worker thread so it never sees a half-applied fill."""
+        return self._executors[user_id].submit(fn, *args).result()
+    
+    def get_last_close(self, symbol: str, exchange: str = 'NSE') -> Optional[float]:
+        """Get the latest close for a symbol, cached for a few seconds."""
+        key = (symbol, exchange)
+        now = time.monotonic()
+        hit = self._price_cache.get(key)
+        if hit and now - hit[1] < self._price_ttl:
+            return hit[0]
+        
+        price = self.data_manager.get_last_close(symbol, exchange)
+        if price is not None:
+            self._price_cache[key] = (price, now)
+        return price
+    
+    def get_last_closes(self, symbols: List[str], exchange: str = 'NSE') -> Dict[str, float]:
+        """Get latest closes for several symbols, fetching cache misses in one batch."""
+        now = time.monotonic()
+        prices = {}
+        missing = []
+        for symbol in symbols:
+            hit = self._price_cache.get((symbol, exchange))
+            if hit and now - hit[1] < self._price_ttl:
+                prices[symbol] = hit[0]
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            fetched = self.data_manager.get_last_closes(missing, exchange)
+            for symbol, price in fetched.items():
+                self._price_cache[(symbol, exchange)] = (price, now)
+            prices.update(fetched)
+        
+        return prices
     
     def place_order(
         self,
@@ -64,18 +295,39 @@ class PaperTrading:
             exchange: NSE or BSE
             commission: Commission rate
             slippage: Slippage rate
+        
+        Orders for one account run on that account's own worker thread, so
+        different accounts can trade concurrently without locking.
         """
-        if user_id not in self.accounts:
-            self._initialize_account(user_id)
+        with self._accounts_lock:
+            if user_id not in self.accounts:
+                self._initialize_account(user_id)
+        
+        return self._run(
+            user_id, self._place_order, user_id, symbol, order_type, side, quantity,
+            price, stop_price, exchange, commission, slippage
+        )
+    
+    def _place_order(
+        self,
+        user_id: str,
+        symbol: str,
+        order_type: str,
+        side: str,
+        quantity: int,
+        price: Optional[float],
+        stop_price: Optional[float],
+        exchange: str,
+        commission: float,
+        slippage: float
+    ) -> Dict:
+        """Price and execute (or queue) an order on the account's worker thread."""
+        now = datetime.now()
         
         # Get current market price
-        try:
-            df = self.data_manager.get_historical_data(symbol, exchange, years=1)
-            if df.empty:
-                return {'success': False, 'error': 'No data available for symbol'}
-            current_price = df['close'].iloc[-1]
-        except:
-            return {'success': False, 'error': 'Error fetching price data'}
+        current_price = self.get_last_close(symbol, exchange)
+        if current_price is None:
+            return {'success': False, 'error': 'No data available for symbol'}
         
         # Determine execution price
         if order_type == 'MARKET':
@@ -106,7 +358,7 @@ class PaperTrading:
         # If order can't execute, store as pending
         if execution_price is None:
             order = {
-                'order_id': f"ORD_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                'order_id': f"ORD_{now.strftime('%Y%m%d%H%M%S')}_{next(self._order_seq)}",
                 'user_id': user_id,
                 'symbol': symbol,
                 'order_type': order_type,
@@ -115,7 +367,7 @@ class PaperTrading:
                 'price': price,
                 'stop_price': stop_price,
                 'status': 'PENDING',
-                'created_at': datetime.now().isoformat(),
+                'created_at': now.isoformat(),
                 'exchange': exchange
             }
             self.orders[user_id].append(order)
@@ -124,7 +376,7 @@ class PaperTrading:
         # Execute order
         return self._execute_order(
             user_id, symbol, side, quantity, execution_price,
-            exchange, commission, slippage
+            exchange, commission, slippage, now
         )
     
     def _execute_order(
@@ -136,137 +388,135 @@ class PaperTrading:
         price: float,
         exchange: str,
         commission: float,
-        slippage: float
+        slippage: float,
+        now: Optional[datetime] = None
     ) -> Dict:
         """Execute an order."""
         account = self.accounts[user_id]
+        if now is None:
+            now = datetime.now()
         
-        # Apply slippage
-        if side == 'BUY':
-            execution_price = price * (1 + slippage)
-            total_cost = quantity * execution_price * (1 + commission)
-            
-            if total_cost > account['cash']:
+        # Apply slippage and commission against the trade direction
+        sign = 1 if side == 'BUY' else -1
+        execution_price = price * (1 + sign * slippage)
+        cash_delta = -sign * quantity * execution_price * (1 + sign * commission)
+        pnl = None
+        
+        if sign > 0:
+            if -cash_delta > account['cash']:
                 return {'success': False, 'error': 'Insufficient funds'}
             
             # Update holdings
-            if symbol in account['holdings']:
-                old_shares = account['holdings'][symbol]['shares']
-                old_avg_price = account['holdings'][symbol]['avg_price']
-                new_shares = old_shares + quantity
-                new_avg_price = ((old_shares * old_avg_price) + (quantity * execution_price)) / new_shares
-                
-                account['holdings'][symbol] = {
-                    'shares': new_shares,
-                    'avg_price': new_avg_price
-                }
-            else:
-                account['holdings'][symbol] = {
-                    'shares': quantity,
-                    'avg_price': execution_price
-                }
-            
-            account['cash'] -= total_cost
+            account['holdings'].buy(symbol, quantity, execution_price)
         
         else:  # SELL
-            if symbol not in account['holdings']:
+            position = account['holdings'].get(symbol)
+            if position is None:
                 return {'success': False, 'error': 'No position to sell'}
             
-            holding = account['holdings'][symbol]
-            if quantity > holding['shares']:
+            held_shares, avg_price = position
+            if quantity > held_shares:
                 return {'success': False, 'error': 'Insufficient shares'}
             
-            execution_price = price * (1 - slippage)
-            proceeds = quantity * execution_price * (1 - commission)
-            cost_basis = quantity * holding['avg_price'] * (1 + commission)
-            pnl = proceeds - cost_basis
+            cost_basis = quantity * avg_price
+            pnl = cash_delta - cost_basis
             
             # Update holdings
-            if quantity == holding['shares']:
-                del account['holdings'][symbol]
-            else:
-                holding['shares'] -= quantity
-            
-            account['cash'] += proceeds
+            account['holdings'].sell(symbol, quantity)
             account['realized_pnl'] += pnl
         
-        # Record trade
-        trade = {
-            'trade_id': f"TRD_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            'user_id': user_id,
-            'symbol': symbol,
-            'side': side,
-            'quantity': quantity,
-            'price': execution_price,
-            'value': total_cost if side == 'BUY' else proceeds,
-            'pnl': pnl if side == 'SELL' else None,
-            'timestamp': datetime.now().isoformat(),
-            'exchange': exchange
-        }
+        account['cash'] += cash_delta
         
-        self.trades[user_id].append(trade)
+        # Record trade
+        trade_id = f"TRD_{now.strftime('%Y%m%d%H%M%S')}_{next(self._trade_seq)}"
+        self.trades[user_id].append(
+            trade_id, symbol, side, quantity, execution_price,
+            abs(cash_delta), pnl, now, exchange
+        )
         account['total_trades'] += 1
         
         return {
             'success': True,
-            'trade_id': trade['trade_id'],
+            'trade_id': trade_id,
             'execution_price': execution_price,
-            'pnl': pnl if side == 'SELL' else None
+            'pnl': pnl
         }
     
-    def get_account_summary(self, user_id: str) -> Dict:
-        """Get account summary with current positions and P&L."""
+    def get_cash_summary(self, user_id: str) -> Dict:
+        """Get cash, realized P&L and positions without fetching any prices."""
         if user_id not in self.accounts:
             return {}
         
+        return self._run(user_id, self._cash_summary, user_id)
+    
+    def _cash_summary(self, user_id: str) -> Dict:
         account = self.accounts[user_id]
-        holdings = account['holdings']
-        
-        # Get current prices
-        current_prices = {}
-        total_holdings_value = 0
-        unrealized_pnl = 0
-        
-        for symbol, holding in holdings.items():
-            try:
-                df = self.data_manager.get_historical_data(symbol, 'NSE', years=1)
-                if not df.empty:
-                    current_price = df['close'].iloc[-1]
-                    current_prices[symbol] = current_price
-                    position_value = holding['shares'] * current_price
-                    cost_basis = holding['shares'] * holding['avg_price']
-                    position_pnl = position_value - cost_basis
-                    
-                    total_holdings_value += position_value
-                    unrealized_pnl += position_pnl
-            except:
-                current_prices[symbol] = holding['avg_price']
-        
-        total_value = account['cash'] + total_holdings_value
-        total_pnl = account['realized_pnl'] + unrealized_pnl
-        total_return = (total_pnl / account['initial_balance']) * 100
-        
         return {
             'user_id': user_id,
             'cash': account['cash'],
+            'initial_balance': account['initial_balance'],
+            'realized_pnl': account['realized_pnl'],
+            'total_trades': account['total_trades'],
+            'holdings': account['holdings'].to_dict()
+        }
+    
+    def get_account_summary(self, user_id: str, include_prices: bool = True) -> Dict:
+        """
+        Get account summary with current positions and P&L.
+        
+        With include_prices=False this is get_cash_summary, which skips the
+        price lookups for every holding.
+        """
+        if user_id not in self.accounts:
+            return {}
+        
+        # Snapshot on the account thread, then price outside it so orders
+        # are not held up by the price lookups
+        summary, symbols, all_shares, avg_price = self._run(user_id, self._position_snapshot, user_id)
+        if not include_prices:
+            return summary
+        
+        # Get current prices
+        prices = self.get_last_closes(symbols, 'NSE')
+        price_arr = np.array([prices.get(s, np.nan) for s in symbols], dtype=float)
+        priced = ~np.isnan(price_arr)
+        current_prices = dict(zip(symbols, np.where(priced, price_arr, avg_price).tolist()))
+        
+        shares = all_shares[priced]
+        position_value = shares * price_arr[priced]
+        total_holdings_value = float(position_value.sum())
+        unrealized_pnl = float((position_value - shares * avg_price[priced]).sum())
+        
+        total_value = summary['cash'] + total_holdings_value
+        total_pnl = summary['realized_pnl'] + unrealized_pnl
+        total_return = (total_pnl / summary['initial_balance']) * 100
+        
+        summary.update({
             'holdings_value': total_holdings_value,
             'total_value': total_value,
-            'realized_pnl': account['realized_pnl'],
             'unrealized_pnl': unrealized_pnl,
             'total_pnl': total_pnl,
             'total_return_pct': total_return,
-            'total_trades': account['total_trades'],
-            'holdings': holdings,
             'current_prices': current_prices
-        }
+        })
+        return summary
+    
+    def _position_snapshot(self, user_id: str) -> tuple:
+        holdings = self.accounts[user_id]['holdings']
+        return (self._cash_summary(user_id), list(holdings.symbols),
+                holdings.shares.copy(), holdings.avg_price.copy())
     
     def get_trade_history(self, user_id: str, limit: int = 50) -> List[Dict]:
         """Get trade history for user."""
         if user_id not in self.trades:
             return []
         
-        trades = self.trades[user_id]
-        return trades[-limit:] if limit else trades
+        return self._run(user_id, self._trade_history, user_id, limit)
+    
+    def _trade_history(self, user_id: str, limit: int) -> List[Dict]:
+        log = self.trades[user_id]
+        start = max(len(log) - limit, 0) if limit else 0
+        return log.records(range(start, len(log)))
     
     def get_daily_summary(self, user_id: str, date: Optional[datetime] = None) -> Dict:
         """Get daily trading summary."""
@@ -276,14 +526,16 @@ class PaperTrading:
         if user_id not in self.trades:
             return {}
         
+        return self._run(user_id, self._daily_summary, user_id, date)
+    
+    def _daily_summary(self, user_id: str, date: datetime) -> Dict:
         # Filter trades for the day
+        log = self.trades[user_id]
         date_str = date.strftime('%Y-%m-%d')
-        daily_trades = [
-            t for t in self.trades[user_id]
-            if t['timestamp'].startswith(date_str)
-        ]
+        mask = log.day_mask(date_str)
         
-        daily_pnl = sum(t.get('pnl', 0) for t in daily_trades if t.get('pnl'))
+        daily_pnl = float(np.nansum(log.pnl[:len(log)][mask]))
+        daily_trades = log.records(np.flatnonzero(mask))
         num_trades = len(daily_trades)
         
         return {
@@ -301,16 +553,17 @@ class PaperTrading:
         rating: Optional[int] = None  # 1-5
     ):
         """Add a journal entry for a trade."""
-        if user_id not in self.trades:
+        if user_id in self.trades:
+            self._run(user_id, self._add_journal_entry, user_id, trade_id, notes, rating)
+    
+    def _add_journal_entry(self, user_id: str, trade_id: str, notes: str, rating: Optional[int]):
+        log = self.trades.get(user_id)
+        row = log.index.get(trade_id) if log is not None else None
+        if row is None:
             return
         
-        # Find trade and add journal entry
-        for trade in self.trades[user_id]:
-            if trade['trade_id'] == trade_id:
-                trade['journal'] = {
-                    'notes': notes,
-                    'rating': rating,
-                    'created_at': datetime.now().isoformat()
-                }
-                break
-
+        log.journal[row] = {
+            'notes': notes,
+            'rating': rating,
+            'created_at': datetime.now().isoformat()
+        }
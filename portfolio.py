@@ -8,6 +8,17 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from analytics import Analytics
 
+# Prefer the AOT-compiled extension (python build_kernels.py), then the JIT kernel
+try:
+    from portfolio_aot import simulate_core
+    HAS_KERNELS = True
+except ImportError:
+    try:
+        from portfolio_kernels import simulate_core
+        HAS_KERNELS = True
+    except ImportError:
+        HAS_KERNELS = False
+
 
 class Portfolio:
     """Manages portfolio simulation and analysis."""
@@ -19,46 +30,39 @@ class Portfolio:
         self.cash = initial_capital
         self.trades = []
     
+    def trade(self, symbol: str, shares: int, price: float, date: datetime, commission: float = 0.001) -> bool:
+        """Buy (shares > 0) or sell (shares < 0) at price, charging commission either way."""
+        sign = 1 if shares > 0 else -1
+        held = self.holdings.get(symbol, 0)
+        cash_delta = -shares * price * (1 + sign * commission)
+        
+        # Reject buys that exceed cash and sells that exceed the position
+        if -cash_delta > self.cash or held + shares < 0:
+            return False
+        
+        if held + shares:
+            self.holdings[symbol] = held + shares
+        else:
+            self.holdings.pop(symbol, None)
+        
+        self.cash += cash_delta
+        self.trades.append({
+            'date': date,
+            'symbol': symbol,
+            'action': 'BUY' if sign > 0 else 'SELL',
+            'shares': abs(shares),
+            'price': price,
+            'value': abs(cash_delta)
+        })
+        return True
+    
     def add_position(self, symbol: str, shares: int, price: float, date: datetime, commission: float = 0.001):
         """Add a position to the portfolio."""
-        cost = shares * price * (1 + commission)
-        if cost <= self.cash:
-            if symbol in self.holdings:
-                self.holdings[symbol] += shares
-            else:
-                self.holdings[symbol] = shares
-            
-            self.cash -= cost
-            self.trades.append({
-                'date': date,
-                'symbol': symbol,
-                'action': 'BUY',
-                'shares': shares,
-                'price': price,
-                'value': cost
-            })
-            return True
-        return False
+        return self.trade(symbol, shares, price, date, commission)
     
     def remove_position(self, symbol: str, shares: int, price: float, date: datetime, commission: float = 0.001):
         """Remove a position from the portfolio."""
-        if symbol in self.holdings and self.holdings[symbol] >= shares:
-            proceeds = shares * price * (1 - commission)
-            self.holdings[symbol] -= shares
-            if self.holdings[symbol] == 0:
-                del self.holdings[symbol]
-            
-            self.cash += proceeds
-            self.trades.append({
-                'date': date,
-                'symbol': symbol,
-                'action': 'SELL',
-                'shares': shares,
-                'price': price,
-                'value': proceeds
-            })
-            return True
-        return False
+        return self.trade(symbol, -shares, price, date, commission)
     
     def get_portfolio_value(self, prices: Dict[str, float]) -> float:
         """Get current portfolio value."""
@@ -75,22 +79,41 @@ class Portfolio:
         """Rebalance portfolio to target weights."""
         current_value = self.get_portfolio_value(prices)
         
-        for symbol, target_weight in target_weights.items():
-            if symbol not in prices:
-                continue
-            
-            target_value = current_value * target_weight
-            target_shares = int(target_value / prices[symbol])
-            current_shares = self.holdings.get(symbol, 0)
-            
-            if target_shares > current_shares:
-                # Buy more
-                shares_to_buy = target_shares - current_shares
-                self.add_position(symbol, shares_to_buy, prices[symbol], date, commission)
-            elif target_shares < current_shares:
-                # Sell some
-                shares_to_sell = current_shares - target_shares
-                self.remove_position(symbol, shares_to_sell, prices[symbol], date, commission)
+        symbols = [symbol for symbol in target_weights if symbol in prices]
+        if not symbols:
+            return
+        
+        n = len(symbols)
+        weight = np.fromiter((target_weights[s] for s in symbols), dtype=np.float64, count=n)
+        price = np.fromiter((prices[s] for s in symbols), dtype=np.float64, count=n)
+        current = np.fromiter((self.holdings.get(s, 0) for s in symbols), dtype=np.int64, count=n)
+        
+        delta = (current_value * weight / price).astype(np.int64) - current
+        cash_flow = -delta * price * (1 + np.sign(delta) * commission)
+        
+        # Trades execute in order; if a buy would overdraw cash, replay them one at a time
+        if (self.cash + np.cumsum(cash_flow) < 0).any():
+            for symbol, shares, px in zip(symbols, delta.tolist(), price.tolist()):
+                if shares:
+                    self.trade(symbol, shares, px, date, commission)
+            return
+        
+        for i in np.flatnonzero(delta):
+            symbol, shares = symbols[i], int(delta[i])
+            held = self.holdings.get(symbol, 0) + shares
+            if held:
+                self.holdings[symbol] = held
+            else:
+                self.holdings.pop(symbol, None)
+            self.trades.append({
+                'date': date,
+                'symbol': symbol,
+                'action': 'BUY' if shares > 0 else 'SELL',
+                'shares': abs(shares),
+                'price': price[i],
+                'value': abs(cash_flow[i])
+            })
+        self.cash += float(cash_flow.sum())
     
     def simulate_portfolio(
         self,
@@ -98,7 +121,8 @@ class Portfolio:
         weights: Dict[str, float],
         rebalance_frequency: str = 'M',  # 'D', 'W', 'M'
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        commission: float = 0.001
     ) -> pd.DataFrame:
         """
         Simulate portfolio performance.
@@ -109,69 +133,151 @@ class Portfolio:
             rebalance_frequency: How often to rebalance
             start_date: Start date for simulation
             end_date: End date for simulation
+            commission: Commission rate applied on every rebalance trade
         
         Returns:
             DataFrame with portfolio value over time
         """
-        # Align all dataframes
-        all_dates = set()
-        for df in data_dict.values():
-            if 'date' in df.columns:
-                df = df.set_index('date')
-            all_dates.update(df.index)
-        
-        all_dates = sorted(list(all_dates))
+        # Align all closes into one dates x symbols matrix, indexing only the close column
+        closes = pd.concat(
+            {
+                symbol: pd.Series(df['close'].to_numpy(), index=df['date']) if 'date' in df.columns else df['close']
+                for symbol, df in data_dict.items()
+            },
+            axis=1
+        ).sort_index().ffill()
         
         if start_date:
-            all_dates = [d for d in all_dates if d >= pd.to_datetime(start_date)]
+            closes = closes.loc[pd.to_datetime(start_date):]
         if end_date:
-            all_dates = [d for d in all_dates if d <= pd.to_datetime(end_date)]
-        
-        portfolio_values = []
-        
-        for date in all_dates:
-            # Get prices for this date
-            prices = {}
-            for symbol, df in data_dict.items():
-                if 'date' in df.columns:
-                    df = df.set_index('date')
-                if date in df.index:
-                    prices[symbol] = df.loc[date, 'close']
-            
-            # Rebalance if needed
-            if date == all_dates[0] or self._should_rebalance(date, all_dates, rebalance_frequency):
-                self.rebalance(weights, prices, date)
-            
-            # Calculate portfolio value
-            portfolio_value = self.get_portfolio_value(prices)
-            portfolio_values.append({
-                'date': date,
-                'portfolio_value': portfolio_value,
-                'cash': self.cash,
-                'holdings_value': portfolio_value - self.cash
-            })
+            closes = closes.loc[:pd.to_datetime(end_date)]
+        
+        if closes.empty:
+            return pd.DataFrame(columns=['date', 'portfolio_value', 'cash', 'holdings_value'])
+        
+        dates = closes.index
+        symbols = list(closes.columns)
+        close_values = closes.to_numpy(dtype=float)
+        
+        rebalance_mask = self._rebalance_mask(dates, rebalance_frequency)
+        
+        if HAS_KERNELS:
+            portfolio_value, cash = self._simulate_kernel(
+                symbols, dates, close_values, weights, rebalance_mask, commission
+            )
+        else:
+            portfolio_value, cash = self._simulate_python(
+                symbols, dates, close_values, weights, rebalance_mask, commission
+            )
+        holdings_value = portfolio_value - cash
+        
+        return pd.DataFrame({
+            'date': dates,
+            'portfolio_value': portfolio_value,
+            'cash': cash,
+            'holdings_value': holdings_value
+        })
+    
+    def _simulate_kernel(
+        self,
+        symbols: List[str],
+        dates: pd.DatetimeIndex,
+        close_values: np.ndarray,
+        weights: Dict[str, float],
+        rebalance_mask: np.ndarray,
+        commission: float
+    ):
+        """Run the simulation in the compiled kernel and replay its trades onto the portfolio."""
+        weight_vec = np.array([weights.get(symbol, 0.0) for symbol in symbols], dtype=np.float64)
+        
+        # Trade columns in the order rebalance() visits target_weights
+        column = {symbol: j for j, symbol in enumerate(symbols)}
+        traded = np.array([column[s] for s in weights if s in column], dtype=np.int64)
+        start_holdings = np.array([self.holdings.get(symbol, 0) for symbol in symbols], dtype=np.float64)
+        
+        portfolio_value, cash, holdings = simulate_core(
+            np.ascontiguousarray(close_values, dtype=np.float64), weight_vec, traded,
+            rebalance_mask, float(self.cash), start_holdings, commission
+        )
         
-        return pd.DataFrame(portfolio_values)
+        # Record trades from the share deltas on each rebalance date
+        previous = start_holdings
+        for row in np.flatnonzero(rebalance_mask):
+            for j in np.flatnonzero(holdings[row] != previous):
+                shares = int(holdings[row, j] - previous[j])
+                sign = 1 if shares > 0 else -1
+                price = close_values[row, j]
+                self.trades.append({
+                    'date': dates[row],
+                    'symbol': symbols[j],
+                    'action': 'BUY' if sign > 0 else 'SELL',
+                    'shares': abs(shares),
+                    'price': price,
+                    'value': abs(shares) * price * (1 + sign * commission)
+                })
+            previous = holdings[row]
+        
+        for symbol, shares in zip(symbols, holdings[-1]):
+            if shares:
+                self.holdings[symbol] = int(shares)
+            else:
+                self.holdings.pop(symbol, None)
+        self.cash = float(cash[-1])
+        
+        return portfolio_value, cash
     
-    def _should_rebalance(self, current_date: pd.Timestamp, all_dates: List, frequency: str) -> bool:
-        """Check if portfolio should be rebalanced."""
+    def _simulate_python(
+        self,
+        symbols: List[str],
+        dates: pd.DatetimeIndex,
+        close_values: np.ndarray,
+        weights: Dict[str, float],
+        rebalance_mask: np.ndarray,
+        commission: float
+    ):
+        """Run the simulation through rebalance(), valuing every date in one pass."""
+        # Holdings and cash only change on rebalance dates
+        rebalance_rows = np.flatnonzero(rebalance_mask)
+        holdings_at = np.zeros((len(rebalance_rows), len(symbols)))
+        cash_at = np.empty(len(rebalance_rows))
+        for k, row in enumerate(rebalance_rows):
+            prices = {
+                symbol: price for symbol, price in zip(symbols, close_values[row])
+                if not np.isnan(price)
+            }
+            self.rebalance(weights, prices, dates[row], commission)
+            holdings_at[k] = [self.holdings.get(symbol, 0) for symbol in symbols]
+            cash_at[k] = self.cash
+        
+        # Holdings are constant between rebalances: one matmul per segment
+        prices = np.nan_to_num(close_values)
+        bounds = np.r_[rebalance_rows, len(dates)]
+        holdings_value = np.empty(len(dates))
+        for k in range(len(rebalance_rows)):
+            holdings_value[bounds[k]:bounds[k + 1]] = prices[bounds[k]:bounds[k + 1]] @ holdings_at[k]
+        cash = np.repeat(cash_at, np.diff(bounds))
+        
+        return cash + holdings_value, cash
+    
+    def _rebalance_mask(self, dates: pd.DatetimeIndex, frequency: str) -> np.ndarray:
+        """Flag the dates on which the portfolio is rebalanced; the first date always is."""
+        dates = pd.DatetimeIndex(dates)
         if frequency == 'D':
-            return True
+            mask = np.ones(len(dates), dtype=bool)
         elif frequency == 'W':
             # Rebalance weekly (every 7 days or on Monday)
-            idx = all_dates.index(current_date)
-            if idx == 0:
-                return False
-            prev_date = all_dates[idx - 1]
-            return (current_date - prev_date).days >= 7 or current_date.weekday() == 0
+            gap_days = np.diff(dates.values).astype('timedelta64[D]').astype(np.int64)
+            mask = np.r_[True, (gap_days >= 7) | (np.asarray(dates.weekday)[1:] == 0)]
         elif frequency == 'M':
             # Rebalance monthly (first trading day of month)
-            idx = all_dates.index(current_date)
-            if idx == 0:
-                return False
-            prev_date = all_dates[idx - 1]
-            return current_date.month != prev_date.month
-        return False
+            months = np.asarray(dates.year) * 12 + np.asarray(dates.month)
+            mask = np.r_[True, months[1:] != months[:-1]]
+        else:
+            mask = np.zeros(len(dates), dtype=bool)
+        
+        if len(mask):
+            mask[0] = True
+        return mask
     
     def compare_with_benchmark(
         self,
@@ -187,24 +293,38 @@ class Portfolio:
         
         common_dates = portfolio_df.index.intersection(benchmark_df.index)
         
-        portfolio_returns = portfolio_df.loc[common_dates, 'portfolio_value'].pct_change().dropna()
-        benchmark_returns = benchmark_df.loc[common_dates, 'close'].pct_change().dropna()
+        p = portfolio_df.loc[common_dates, 'portfolio_value'].to_numpy(dtype=float)
+        b = benchmark_df.loc[common_dates, 'close'].to_numpy(dtype=float)
+        
+        # Daily returns on dates where both series have a valid return
+        portfolio_returns = np.diff(p) / p[:-1]
+        benchmark_returns = np.diff(b) / b[:-1]
+        valid = np.isfinite(portfolio_returns) & np.isfinite(benchmark_returns)
+        portfolio_returns = portfolio_returns[valid]
+        benchmark_returns = benchmark_returns[valid]
         
         # Calculate metrics
-        portfolio_total_return = (portfolio_df.loc[common_dates[-1], 'portfolio_value'] / portfolio_df.loc[common_dates[0], 'portfolio_value'] - 1) * 100
-        benchmark_total_return = (benchmark_df.loc[common_dates[-1], 'close'] / benchmark_df.loc[common_dates[0], 'close'] - 1) * 100
+        portfolio_total_return = (p[-1] / p[0] - 1) * 100
+        benchmark_total_return = (b[-1] / b[0] - 1) * 100
         
         # Calculate alpha (excess return)
         alpha = portfolio_total_return - benchmark_total_return
         
         # Calculate beta
-        if benchmark_returns.std() > 0:
-            beta = portfolio_returns.cov(benchmark_returns) / benchmark_returns.var()
+        benchmark_var = benchmark_returns.var() if len(benchmark_returns) else 0.0
+        if benchmark_var > 0:
+            covariance = np.mean(
+                (portfolio_returns - portfolio_returns.mean()) * (benchmark_returns - benchmark_returns.mean())
+            )
+            beta = covariance / benchmark_var
         else:
             beta = 0
         
         # Calculate correlation
-        correlation = portfolio_returns.corr(benchmark_returns)
+        if len(portfolio_returns) > 1 and benchmark_var > 0 and portfolio_returns.std() > 0:
+            correlation = np.corrcoef(portfolio_returns, benchmark_returns)[0, 1]
+        else:
+            correlation = np.nan
         
         return {
             'portfolio_return': portfolio_total_return,
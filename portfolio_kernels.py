@@ -0,0 +1,76 @@
+"""
+Numba kernels for the portfolio simulation loop and position valuation.
+simulate_core mirrors Portfolio.rebalance / add_position / remove_position on
+a dense dates x symbols close matrix; value_core marks PortfolioManager
+positions to market. Both are JIT-compiled at first use.
+"""
+
+import numpy as np
+from numba import njit
+
+
+def simulate_core_py(closes, weights, traded, rebalance_mask, initial_cash, initial_holdings, commission):
+    """
+    Run a fixed-weight rebalancing simulation.
+    
+    Args:
+        closes: (D, N) close matrix; NaN where a symbol has no price yet
+        weights: (N,) target weights
+        traded: Column indices of the symbols that have a target weight
+        rebalance_mask: (D,) True on rebalance dates
+        initial_cash: Cash at the start of the simulation
+        initial_holdings: (N,) shares held at the start of the simulation
+        commission: Commission rate applied to buys and sells
+    
+    Returns:
+        Tuple of (portfolio_values, cash_series, holdings_series)
+    """
+    n_dates, n_symbols = closes.shape
+    values = np.empty(n_dates)
+    cash_series = np.empty(n_dates)
+    holdings_series = np.empty((n_dates, n_symbols))
+    holdings = initial_holdings.copy()
+    cash = initial_cash
+    
+    for t in range(n_dates):
+        if rebalance_mask[t]:
+            total = cash
+            for j in range(n_symbols):
+                if not np.isnan(closes[t, j]):
+                    total += holdings[j] * closes[t, j]
+            
+            for j in traded:
+                price = closes[t, j]
+                if np.isnan(price) or price <= 0.0:
+                    continue
+                delta = np.floor(total * weights[j] / price) - holdings[j]
+                sign = 1.0 if delta > 0.0 else -1.0
+                cash_delta = -delta * price * (1.0 + sign * commission)
+                if -cash_delta <= cash:
+                    cash += cash_delta
+                    holdings[j] += delta
+        
+        value = cash
+        for j in range(n_symbols):
+            if not np.isnan(closes[t, j]):
+                value += holdings[j] * closes[t, j]
+        values[t] = value
+        cash_series[t] = cash
+        holdings_series[t] = holdings
+    
+    return values, cash_series, holdings_series
+
+
+def value_core_py(shares, avg_price, prices):
+    """Return (holdings_value, unrealized_pnl) for parallel position arrays."""
+    total = 0.0
+    pnl = 0.0
+    for i in range(shares.shape[0]):
+        value = shares[i] * prices[i]
+        total += value
+        pnl += value - shares[i] * avg_price[i]
+    return total, pnl
+
+
+simulate_core = njit(cache=True)(simulate_core_py)
+value_core = njit(cache=True, fastmath=True)(value_core_py)
@@ -7,17 +7,124 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import time
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
 from config import Config
 from data_manager import DataManager
 from analytics import Analytics
+from paper_trading import Holdings
+from utils import LRUCache
+
+# Prefer the AOT-compiled extension (python build_kernels.py), then the JIT kernel
+try:
+    from portfolio_aot import value_core
+    HAS_KERNELS = True
+except ImportError:
+    try:
+        from portfolio_kernels import value_core
+        HAS_KERNELS = True
+    except ImportError:
+        HAS_KERNELS = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class PortfolioTradeLog:
+    """Append-only portfolio trade log stored as growable numpy columns."""
+    
+    TYPES = ('BUY', 'SELL')
+    COLUMNS = ('date', 'type', 'symbol', 'shares', 'price', 'value', 'pnl')
+    
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.symbols = []  # symbol code -> symbol
+        self._codes = {}  # symbol -> symbol code
+        self.date = np.empty(capacity, dtype='datetime64[us]')
+        self.type = np.empty(capacity, dtype=np.int8)  # index into TYPES
+        self.symbol = np.empty(capacity, dtype=np.int32)  # index into symbols
+        self.shares = np.empty(capacity, dtype=np.int64)
+        self.price = np.empty(capacity, dtype=np.float64)
+        self.value = np.empty(capacity, dtype=np.float64)
+        self.pnl = np.empty(capacity, dtype=np.float64)  # NaN for buys
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def append(
+        self,
+        date: str,
+        trade_type: str,
+        symbol: str,
+        shares: int,
+        price: float,
+        value: float,
+        pnl: Optional[float] = None
+    ):
+        """Append one trade."""
+        if self.size == len(self.type):
+            capacity = max(2 * self.size, 64)
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                setattr(self, name, grown)
+        
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        
+        row = self.size
+        self.date[row] = np.datetime64(date)
+        self.type[row] = self.TYPES.index(trade_type)
+        self.symbol[row] = code
+        self.shares[row] = shares
+        self.price[row] = price
+        self.value[row] = value
+        self.pnl[row] = np.nan if pnl is None else pnl
+        self.size += 1
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Trades as a DataFrame with categorical type and symbol columns."""
+        n = self.size
+        return pd.DataFrame({
+            'date': self.date[:n],
+            'type': pd.Categorical.from_codes(self.type[:n], categories=list(self.TYPES)),
+            'symbol': pd.Categorical.from_codes(self.symbol[:n], categories=self.symbols),
+            'shares': self.shares[:n],
+            'price': self.price[:n],
+            'value': self.value[:n],
+            'pnl': self.pnl[:n]
+        })
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'PortfolioTradeLog':
+        """Rebuild a log from the frame produced by to_frame()."""
+        log = cls(capacity=max(len(df), 64))
+        for row in df.itertuples(index=False):
+            pnl = None if pd.isna(row.pnl) else row.pnl
+            log.append(row.date, str(row.type), str(row.symbol), row.shares, row.price, row.value, pnl)
+        return log
 
 
 class PortfolioManager:
     """Manages user portfolios with comprehensive tracking."""
     
+    _DERIVED_KEYS = ('_positions', 'trades', 'covariance_matrix')  # rebuilt by load()
+    _HISTORY_COLUMNS = ('date', 'close', 'volume')
+    
     def __init__(self, data_manager: DataManager):
         self.data_manager = data_manager
         self.portfolios = {}
+        self._history_cache = LRUCache(maxsize=256)  # {(symbol, exchange, years): (df, fetched_at)}
+        self._history_ttl = 900.0
     
     def create_portfolio(
         self,
@@ -34,9 +141,10 @@ class PortfolioManager:
             'benchmark': benchmark,
             'description': description,
             'holdings': {},  # {symbol: {'shares': int, 'avg_price': float, 'entry_date': date}}
+            '_positions': Holdings(),  # shares/avg_price as arrays for valuation math
             'cash': initial_capital,
             'created_at': datetime.now().isoformat(),
-            'trades': [],
+            'trades': PortfolioTradeLog(),
             'realized_pnl': 0,
             'unrealized_pnl': 0
         }
@@ -51,53 +159,47 @@ class PortfolioManager:
         shares: int,
         price: float,
         exchange: str = 'NSE',
-        commission: float = 0.001
+        commission: float = 0.001,
+        timestamp: Optional[str] = None
     ) -> bool:
-        """Add a position to portfolio."""
-        if portfolio_name not in self.portfolios:
+        """
+        Add a position to portfolio.
+        
+        Backtests replaying fills can pass the bar date as `timestamp` to
+        skip reading the clock.
+        """
+        portfolio = self.portfolios.get(portfolio_name)
+        if portfolio is None:
             return False
         
-        portfolio = self.portfolios[portfolio_name]
         cost = shares * price * (1 + commission)
-        
         if cost > portfolio['cash']:
             return False
         
-        # Update holdings
-        if symbol in portfolio['holdings']:
-            # Average price calculation
-            old_shares = portfolio['holdings'][symbol]['shares']
-            old_avg_price = portfolio['holdings'][symbol]['avg_price']
-            total_cost = (old_shares * old_avg_price) + (shares * price)
-            new_shares = old_shares + shares
-            new_avg_price = total_cost / new_shares
-            
-            portfolio['holdings'][symbol] = {
-                'shares': new_shares,
-                'avg_price': new_avg_price,
-                'entry_date': portfolio['holdings'][symbol]['entry_date'],
-                'exchange': exchange
-            }
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        
+        # Update holdings, averaging the price in place
+        holding = portfolio['holdings'].get(symbol)
+        if holding:
+            total_cost = holding['shares'] * holding['avg_price'] + shares * price
+            holding['shares'] += shares
+            holding['avg_price'] = total_cost / holding['shares']
+            holding['exchange'] = exchange
         else:
             portfolio['holdings'][symbol] = {
                 'shares': shares,
                 'avg_price': price,
-                'entry_date': datetime.now().isoformat(),
+                'entry_date': timestamp,
                 'exchange': exchange
             }
         
+        portfolio['_positions'].buy(symbol, shares, price)
         portfolio['cash'] -= cost
         portfolio['current_capital'] -= cost
         
         # Record trade
-        portfolio['trades'].append({
-            'date': datetime.now().isoformat(),
-            'type': 'BUY',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'value': cost
-        })
+        portfolio['trades'].append(timestamp, 'BUY', symbol, shares, price, cost)
         
         return True
     
@@ -107,20 +209,16 @@ class PortfolioManager:
         symbol: str,
         shares: int,
         price: float,
-        commission: float = 0.001
+        commission: float = 0.001,
+        timestamp: Optional[str] = None
     ) -> bool:
         """Remove a position from portfolio."""
-        if portfolio_name not in self.portfolios:
+        portfolio = self.portfolios.get(portfolio_name)
+        if portfolio is None:
             return False
         
-        portfolio = self.portfolios[portfolio_name]
-        
-        if symbol not in portfolio['holdings']:
-            return False
-        
-        holding = portfolio['holdings'][symbol]
-        
-        if shares > holding['shares']:
+        holding = portfolio['holdings'].get(symbol)
+        if holding is None or shares > holding['shares']:
             return False
         
         # Calculate P&L
@@ -133,28 +231,76 @@ class PortfolioManager:
             del portfolio['holdings'][symbol]
         else:
             holding['shares'] -= shares
+        portfolio['_positions'].sell(symbol, shares)
         
         portfolio['cash'] += proceeds
         portfolio['current_capital'] += proceeds
         portfolio['realized_pnl'] += pnl
         
         # Record trade
-        portfolio['trades'].append({
-            'date': datetime.now().isoformat(),
-            'type': 'SELL',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'value': proceeds,
-            'pnl': pnl
-        })
+        portfolio['trades'].append(
+            timestamp or datetime.now().isoformat(), 'SELL', symbol, shares, price, proceeds, pnl
+        )
         
         return True
     
+    def _fetch_history(self, symbol: str, holding: Dict, years: int) -> Optional[pd.DataFrame]:
+        """Fetch history for one holding, returning None when unavailable."""
+        key = (symbol, holding['exchange'], years)
+        hit = self._history_cache.get(key)
+        if hit is not None and time.monotonic() - hit[1] < self._history_ttl:
+            return hit[0]
+        
+        try:
+            df = self.data_manager.get_historical_data(symbol, holding['exchange'], years=years)
+        except Exception as e:
+            print(f"Error fetching {symbol}: {e}")
+            return None
+        if df.empty:
+            return None
+        
+        self._history_cache.put(key, (df, time.monotonic()))
+        return df
+    
+    def _fetch_histories(
+        self,
+        holdings: Dict,
+        years: int,
+        max_workers: int = 8,
+        timeout: Optional[float] = 30
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Fetch history for every holding concurrently.
+        
+        timeout is one deadline for the whole batch; holdings not fetched by
+        then come back as None and the caller does not wait on hung fetches.
+        """
+        if not holdings:
+            return {}
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(holdings)))
+        futures = {
+            symbol: executor.submit(self._fetch_history, symbol, holding, years)
+            for symbol, holding in holdings.items()
+        }
+        done, _ = wait(futures.values(), timeout=timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        results = {}
+        for symbol, future in futures.items():
+            if future in done:
+                results[symbol] = future.result()
+            else:
+                print(f"Timed out fetching {symbol}")
+                results[symbol] = None
+        
+        return results
+    
     def get_portfolio_value(
         self,
         portfolio_name: str,
-        current_prices: Optional[Dict[str, float]] = None
+        current_prices: Optional[Dict[str, float]] = None,
+        max_workers: int = 8
     ) -> Dict:
         """Get current portfolio value and metrics."""
         if portfolio_name not in self.portfolios:
@@ -163,31 +309,43 @@ class PortfolioManager:
         portfolio = self.portfolios[portfolio_name]
         holdings = portfolio['holdings']
         
+        price_dates = {}
         if not current_prices:
-            # Fetch current prices
-            current_prices = {}
+            # Latest closes in one metadata query per exchange; symbols without a
+            # recorded close fall back to a history lookup, then the entry price
+            by_exchange = {}
             for symbol, holding in holdings.items():
-                try:
-                    df = self.data_manager.get_historical_data(
-                        symbol, holding['exchange'], years=1
-                    )
-                    if not df.empty:
+                by_exchange.setdefault(holding['exchange'], []).append(symbol)
+            
+            current_prices = {}
+            for exchange, symbols in by_exchange.items():
+                latest = self.data_manager.get_latest_close(symbols, exchange)
+                for symbol, (close, last_date) in latest.items():
+                    current_prices[symbol] = close
+                    price_dates[symbol] = last_date
+            
+            missing = {s: h for s, h in holdings.items() if s not in current_prices}
+            if missing:
+                histories = self._fetch_histories(missing, years=1, max_workers=max_workers)
+                for symbol, df in histories.items():
+                    if df is not None:
                         current_prices[symbol] = df['close'].iloc[-1]
-                except:
-                    current_prices[symbol] = holding['avg_price']
+                        price_dates[symbol] = str(df['date'].iloc[-1])
+                    else:
+                        current_prices[symbol] = holdings[symbol]['avg_price']
         
         # Calculate values
-        total_value = portfolio['cash']
-        unrealized_pnl = 0
-        
-        for symbol, holding in holdings.items():
-            current_price = current_prices.get(symbol, holding['avg_price'])
-            position_value = holding['shares'] * current_price
-            cost_basis = holding['shares'] * holding['avg_price']
-            position_pnl = position_value - cost_basis
-            
-            total_value += position_value
-            unrealized_pnl += position_pnl
+        positions = portfolio['_positions']
+        prices = np.array([
+            current_prices.get(symbol, avg_price)
+            for symbol, avg_price in zip(positions.symbols, positions.avg_price)
+        ], dtype=np.float64)
+        if HAS_KERNELS:
+            holdings_value, unrealized_pnl = value_core(positions.shares, positions.avg_price, prices)
+        else:
+            holdings_value = float((positions.shares * prices).sum())
+            unrealized_pnl = holdings_value - float((positions.shares * positions.avg_price).sum())
+        total_value = portfolio['cash'] + holdings_value
         
         portfolio['unrealized_pnl'] = unrealized_pnl
         total_pnl = portfolio['realized_pnl'] + unrealized_pnl
@@ -204,7 +362,8 @@ class PortfolioManager:
             'total_pnl': total_pnl,
             'total_return_pct': total_return,
             'holdings': holdings,
-            'current_prices': current_prices
+            'current_prices': current_prices,
+            'price_dates': price_dates
         }
     
     def get_sector_allocation(self, portfolio_name: str) -> Dict:
@@ -224,7 +383,8 @@ class PortfolioManager:
     def calculate_risk_metrics(
         self,
         portfolio_name: str,
-        period_days: int = 252
+        period_days: int = 252,
+        max_workers: int = 8
     ) -> Dict:
         """Calculate portfolio risk metrics."""
         if portfolio_name not in self.portfolios:
@@ -233,43 +393,44 @@ class PortfolioManager:
         portfolio = self.portfolios[portfolio_name]
         holdings = portfolio['holdings']
         
-        # Get historical returns for all holdings
-        returns_data = {}
-        
-        for symbol, holding in holdings.items():
-            try:
-                df = self.data_manager.get_historical_data(
-                    symbol, holding['exchange'], years=2
-                )
-                if not df.empty and len(df) >= period_days:
-                    returns = df['close'].pct_change().dropna()
-                    returns_data[symbol] = returns.tail(period_days)
-            except:
-                continue
-        
-        if not returns_data:
+        # Get historical closes for all holdings as one dates x symbols matrix
+        histories = self._fetch_histories(holdings, years=2, max_workers=max_workers)
+        closes = {
+            symbol: pd.Series(df['close'].to_numpy(dtype=np.float64), index=pd.to_datetime(df['date']))
+            for symbol, df in histories.items() if df is not None
+        }
+        if not closes:
             return {}
+        closes = pd.concat(closes, axis=1).sort_index()
         
-        # Calculate portfolio returns (weighted)
-        portfolio_returns = None
-        
-        for symbol, returns in returns_data.items():
-            holding = holdings[symbol]
-            weight = (holding['shares'] * holding['avg_price']) / portfolio['initial_capital']
-            
-            if portfolio_returns is None:
-                portfolio_returns = returns * weight
-            else:
-                # Align dates and add
-                aligned = returns.reindex(portfolio_returns.index, fill_value=0)
-                portfolio_returns += aligned * weight
+        # Keep symbols with a full period of history
+        closes = closes.loc[:, closes.count() >= period_days]
+        if closes.empty:
+            return {}
         
-        if portfolio_returns is None or len(portfolio_returns) == 0:
+        # Daily returns over the last period_days rows, written straight into
+        # one preallocated float32 buffer (half the bytes of float64 for the
+        # gemv and covariance below)
+        C = closes.to_numpy()[-(period_days + 1):]
+        R = np.empty((len(C) - 1, C.shape[1]), dtype=np.float32)
+        np.divide(np.diff(C, axis=0), C[:-1], out=R, casting='same_kind')
+        dates = closes.index[len(closes) - len(R):]
+        
+        # Calculate portfolio returns (weighted) in one matrix-vector product
+        symbols = list(closes.columns)
+        positions = portfolio['_positions']
+        rows = [positions.index[s] for s in symbols]
+        weights = positions.shares[rows] * positions.avg_price[rows] / portfolio['initial_capital']
+        filled = np.nan_to_num(R, nan=0.0)
+        portfolio_returns = pd.Series((filled @ weights.astype(np.float32)).astype(np.float64), index=dates)
+        
+        if len(portfolio_returns) == 0:
             return {}
         
         # Calculate metrics
-        volatility = portfolio_returns.std() * np.sqrt(Config.TRADING_DAYS_PER_YEAR) * 100
-        mean_return = portfolio_returns.mean() * Config.TRADING_DAYS_PER_YEAR * 100
+        r = portfolio_returns.to_numpy()
+        volatility = r.std(ddof=1) * np.sqrt(Config.TRADING_DAYS_PER_YEAR) * 100 if len(r) > 1 else np.nan
+        mean_return = r.mean() * Config.TRADING_DAYS_PER_YEAR * 100
         
         if volatility > 0:
             sharpe = (mean_return - Config.RISK_FREE_RATE) / volatility
@@ -277,14 +438,22 @@ class PortfolioManager:
             sharpe = 0
         
         # Max drawdown
-        cumulative = (1 + portfolio_returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
-        
-        # Correlation matrix
-        returns_df = pd.DataFrame(returns_data)
-        correlation_matrix = returns_df.corr()
+        cumulative = np.cumprod(1 + r)
+        running_max = np.maximum.accumulate(cumulative)
+        max_drawdown = ((cumulative - running_max) / running_max).min() * 100
+        
+        # Covariance and correlation from one BLAS pass over the aligned returns
+        R = R[~np.isnan(R).any(axis=1)]
+        if len(R) > 1:
+            cov = np.atleast_2d(np.cov(R, rowvar=False, dtype=np.float32)).astype(np.float64)
+            std = np.sqrt(np.diag(cov))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = cov / np.outer(std, std)
+        else:
+            cov = corr = np.full((len(symbols), len(symbols)), np.nan)
+        covariance_matrix = pd.DataFrame(cov, index=symbols, columns=symbols)
+        correlation_matrix = pd.DataFrame(corr, index=symbols, columns=symbols)
+        portfolio['covariance_matrix'] = covariance_matrix
         
         return {
             'volatility_pct': volatility,
@@ -292,6 +461,7 @@ class PortfolioManager:
             'max_drawdown_pct': max_drawdown,
             'mean_return_pct': mean_return,
             'correlation_matrix': correlation_matrix,
+            'covariance_matrix': covariance_matrix,
             'portfolio_returns': portfolio_returns
         }
     
@@ -314,6 +484,78 @@ class PortfolioManager:
             'beta': 0
         }
     
+    def save(self, path: str):
+        """
+        Persist portfolios and cached price histories under `path`.
+        
+        Portfolio metadata goes to portfolios.json, trade logs to trades.parquet
+        and each cached history to hist/<symbol>_<exchange>_<years>.parquet.
+        """
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow is required to save portfolios")
+        
+        root = Path(path)
+        (root / 'hist').mkdir(parents=True, exist_ok=True)
+        
+        meta = {}
+        trades = []
+        for name, portfolio in self.portfolios.items():
+            meta[name] = {k: v for k, v in portfolio.items() if k not in self._DERIVED_KEYS}
+            df = portfolio['trades'].to_frame()
+            if not df.empty:
+                trades.append(df.assign(portfolio=name))
+        
+        with open(root / 'portfolios.json', 'w') as f:
+            json.dump(meta, f, indent=2, default=str)
+        
+        if trades:
+            table = pa.Table.from_pandas(pd.concat(trades, ignore_index=True), preserve_index=False)
+            pq.write_table(table, root / 'trades.parquet', compression='snappy')
+        
+        for (symbol, exchange, years), (df, _) in self._history_cache.items():
+            cols = [c for c in self._HISTORY_COLUMNS if c in df.columns]
+            table = pa.Table.from_pandas(df[cols], preserve_index=False)
+            pq.write_table(table, root / 'hist' / f"{symbol}_{exchange}_{years}.parquet", compression='snappy')
+    
+    def load(self, path: str):
+        """Restore portfolios and cached histories written by save()."""
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow is required to load portfolios")
+        
+        root = Path(path)
+        with open(root / 'portfolios.json', 'r') as f:
+            meta = json.load(f)
+        
+        trades = {}
+        trades_path = root / 'trades.parquet'
+        if trades_path.exists():
+            df = pq.read_table(trades_path).to_pandas()
+            trades = {name: group.drop(columns='portfolio') for name, group in df.groupby('portfolio', sort=False)}
+        
+        for name, portfolio in meta.items():
+            positions = Holdings()
+            for symbol, holding in portfolio['holdings'].items():
+                positions.buy(symbol, holding['shares'], holding['avg_price'])
+            portfolio['_positions'] = positions
+            portfolio['trades'] = (
+                PortfolioTradeLog.from_frame(trades[name]) if name in trades else PortfolioTradeLog()
+            )
+            self.portfolios[name] = portfolio
+        
+        loaded_at = time.monotonic()
+        for hist_path in (root / 'hist').glob('*.parquet'):
+            symbol, exchange, years = hist_path.stem.rsplit('_', 2)
+            schema = pq.read_schema(hist_path)
+            cols = [c for c in self._HISTORY_COLUMNS if c in schema.names]
+            df = pq.read_table(hist_path, columns=cols).to_pandas()
+            self._history_cache.put((symbol, exchange, int(years)), (df, loaded_at))
+    
+    def get_trades(self, portfolio_name: str) -> pd.DataFrame:
+        """Get a portfolio's trade log as a DataFrame."""
+        if portfolio_name not in self.portfolios:
+            return pd.DataFrame()
+        return self.portfolios[portfolio_name]['trades'].to_frame()
+    
     def list_portfolios(self) -> List[str]:
         """List all portfolio names."""
         return list(self.portfolios.keys())
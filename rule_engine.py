@@ -5,13 +5,60 @@ Supports Python-like expressions for screening and strategy rules.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, Tuple
+from types import CodeType
+import ast
 import re
 
+try:
+    import bottleneck as bn
+    HAS_BOTTLENECK = True
+except ImportError:
+    HAS_BOTTLENECK = False
+
+
+class _VectorizeBoolOps(ast.NodeTransformer):
+    """Rewrite and/or/not and chained comparisons into elementwise &, |, ~."""
+    
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return ast.copy_location(result, node)
+    
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.copy_location(ast.UnaryOp(op=ast.Invert(), operand=node.operand), node)
+        return node
+    
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # a < b < c  ->  (a < b) & (b < c)
+        operands = [node.left] + node.comparators
+        result = None
+        for left, op, right in zip(operands, node.ops, operands[1:]):
+            pair = ast.Compare(left=left, ops=[op], comparators=[right])
+            result = pair if result is None else ast.BinOp(left=result, op=ast.BitAnd(), right=pair)
+        return ast.copy_location(result, node)
+
 
 class RuleEngine:
     """Evaluates custom rules/conditions on stock data."""
     
+    # Compiled rules by rule text; parsing only depends on the function names,
+    # so the cache is shared by every engine
+    _compiled: Dict[str, Tuple[CodeType, ...]] = {}
+    
+    _FUNC_CALL_RE = re.compile(r'(\w+)\s*\(\s*(\d+)\s*\)')
+    _STANDALONE_RE = re.compile(
+        r"(?<!')\b(volatility|macd|rsi|volume|price|close|open|high|low)\b(?!\s*\(|')"
+    )
+    
     def __init__(self, df: pd.DataFrame):
         """
         Initialize with DataFrame containing technical indicators.
@@ -19,10 +66,13 @@ class RuleEngine:
         Args:
             df: DataFrame with columns like close, sma_50, rsi, volume, etc.
         """
-        self.df = df.copy()
-        if 'date' in self.df.columns:
-            self.df = self.df.set_index('date')
-        self.df = self.df.sort_index()
+        # The engine never mutates the frame, so no defensive copy is taken
+        self.df = df.set_index('date') if 'date' in df.columns else df
+        if not self.df.index.is_monotonic_increasing:
+            self.df = self.df.sort_index()
+        
+        # Indicator series computed from self.df, keyed by (name, *args)
+        self._cache = {}
         
         # Available functions
         self.functions = {
@@ -42,38 +92,69 @@ class RuleEngine:
             'abs': np.abs,
         }
     
+    def _memo(self, key: tuple, compute: Callable[[], pd.Series]) -> pd.Series:
+        """Return the cached series for key, computing it on first use."""
+        result = self._cache.get(key)
+        if result is None:
+            result = self._cache[key] = compute()
+        return result
+    
+    def _move_mean(self, values: np.ndarray, period: int) -> np.ndarray:
+        """Rolling mean over full windows, in bottleneck's C loop when available."""
+        if HAS_BOTTLENECK:
+            return bn.move_mean(values, window=period, min_count=period)
+        return pd.Series(values).rolling(window=period).mean().to_numpy()
+    
+    def _move_std(self, values: np.ndarray, period: int) -> np.ndarray:
+        """Rolling sample standard deviation over full windows."""
+        if HAS_BOTTLENECK:
+            return bn.move_std(values, window=period, min_count=period, ddof=1)
+        return pd.Series(values).rolling(window=period).std().to_numpy()
+    
+    def _close_values(self) -> np.ndarray:
+        """Close prices as a float64 array."""
+        return self.df['close'].to_numpy(dtype=np.float64)
+    
     def _sma(self, period: int) -> pd.Series:
         """Simple Moving Average."""
         col = f'sma_{period}'
         if col in self.df.columns:
             return self.df[col]
-        return self.df['close'].rolling(window=period).mean()
+        return self._memo(
+            ('sma', period),
+            lambda: pd.Series(self._move_mean(self._close_values(), period), index=self.df.index)
+        )
     
     def _ema(self, period: int) -> pd.Series:
         """Exponential Moving Average."""
         col = f'ema_{period}'
         if col in self.df.columns:
             return self.df[col]
-        return self.df['close'].ewm(span=period).mean()
+        return self._memo(('ema', period), lambda: self.df['close'].ewm(span=period).mean())
     
     def _rsi(self, period: int = 14) -> pd.Series:
         """RSI indicator."""
         if 'rsi' in self.df.columns:
             return self.df['rsi']
-        # Calculate RSI if not present
-        delta = self.df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        return self._memo(('rsi', period), lambda: self._compute_rsi(period))
+    
+    def _compute_rsi(self, period: int) -> pd.Series:
+        """Calculate RSI when the frame does not carry it."""
+        delta = np.diff(self._close_values(), prepend=np.nan)
+        avg_gain = self._move_mean(np.where(delta > 0, delta, 0.0), period)
+        avg_loss = self._move_mean(np.where(delta < 0, -delta, 0.0), period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return pd.Series(rsi, index=self.df.index)
     
     def _macd(self) -> pd.Series:
         """MACD indicator."""
         if 'macd' in self.df.columns:
             return self.df['macd']
-        ema12 = self.df['close'].ewm(span=12).mean()
-        ema26 = self.df['close'].ewm(span=26).mean()
-        return ema12 - ema26
+        return self._memo(
+            ('macd',),
+            lambda: self.df['close'].ewm(span=12).mean() - self.df['close'].ewm(span=26).mean()
+        )
     
     def _price(self) -> pd.Series:
         """Current price (alias for close)."""
@@ -103,8 +184,13 @@ class RuleEngine:
         """Volatility."""
         if 'volatility' in self.df.columns:
             return self.df['volatility']
-        returns = self.df['close'].pct_change()
-        return returns.rolling(window=period).std() * np.sqrt(252)
+        return self._memo(
+            ('volatility', period),
+            lambda: pd.Series(
+                self._move_std(self.df['close'].pct_change().to_numpy(dtype=np.float64), period) * np.sqrt(252),
+                index=self.df.index
+            )
+        )
     
     def _parse_expression(self, expression: str) -> str:
         """Parse and convert expression to valid Python code."""
@@ -112,9 +198,6 @@ class RuleEngine:
         expr = expression.strip()
         
         # Replace function calls like sma(50) with function calls
-        # This is a simplified parser - for production, use a proper AST parser
-        pattern = r'(\w+)\s*\(\s*(\d+)\s*\)'
-        
         def replace_func(match):
             func_name = match.group(1)
             arg = match.group(2)
@@ -122,20 +205,35 @@ class RuleEngine:
                 return f"self.functions['{func_name}']({arg})"
             return match.group(0)
         
-        expr = re.sub(pattern, replace_func, expr)
+        expr = self._FUNC_CALL_RE.sub(replace_func, expr)
         
-        # Replace standalone function names (like price, close, volume)
-        # Do this in reverse order to avoid partial matches
-        func_names = ['volatility', 'macd', 'rsi', 'volume', 'price', 'close', 'open', 'high', 'low']
-        for func_name in func_names:
-            if func_name in self.functions:
-                # Replace standalone words (not part of other words)
-                pattern = r'\b' + func_name + r'\b'
-                # Only replace if not already a function call
-                if not re.search(r'\b' + func_name + r'\s*\(', expr):
-                    expr = re.sub(pattern, f"self.functions['{func_name}']()", expr)
+        # Replace standalone function names (like price, close, volume) that are
+        # neither called nor already inside a self.functions['...'] lookup
+        return self._STANDALONE_RE.sub(lambda m: f"self.functions['{m.group(1)}']()", expr)
+    
+    def _compile_rule(self, rule: str) -> Tuple[CodeType, ...]:
+        """
+        Parse a rule once into code objects with elementwise boolean operators.
         
-        return expr
+        A top-level `and` chain compiles to one code object per operand, so
+        evaluate_rule can stop once the combined mask has no True rows.
+        """
+        codes = self._compiled.get(rule)
+        if codes is None:
+            body = ast.parse(self._parse_expression(rule), mode='eval').body
+            if isinstance(body, ast.BoolOp) and isinstance(body.op, ast.And):
+                operands = body.values
+            else:
+                operands = [body]
+            codes = self._compiled[rule] = tuple(
+                compile(
+                    ast.fix_missing_locations(_VectorizeBoolOps().visit(ast.Expression(body=operand))),
+                    '<rule>',
+                    'eval'
+                )
+                for operand in operands
+            )
+        return codes
     
     def evaluate_rule(self, rule: str) -> pd.Series:
         """
@@ -150,8 +248,8 @@ class RuleEngine:
             Boolean Series indicating where rule is True
         """
         try:
-            # Parse the expression
-            parsed = self._parse_expression(rule)
+            # Parse the expression (cached by rule text)
+            codes = self._compile_rule(rule)
             
             # Create a safe evaluation context
             safe_dict = {
@@ -160,13 +258,16 @@ class RuleEngine:
                 'np': np,
                 'True': True,
                 'False': False,
-                'and': lambda x, y: x & y,
-                'or': lambda x, y: x | y,
-                'not': lambda x: ~x,
             }
             
-            # Evaluate
-            result = eval(parsed, {"__builtins__": {}}, safe_dict)
+            # Evaluate and-operands left to right, skipping the rest (and any
+            # indicators they would compute) once no row can still match
+            result = None
+            for code in codes:
+                value = eval(code, {"__builtins__": {}}, safe_dict)
+                result = value if result is None else result & value
+                if not np.any(result):
+                    break
             
             if isinstance(result, pd.Series):
                 return result.fillna(False)
@@ -178,24 +279,29 @@ class RuleEngine:
         except Exception as e:
             raise ValueError(f"Error evaluating rule '{rule}': {str(e)}")
     
-    def filter_by_rule(self, rule: str) -> pd.DataFrame:
-        """Filter DataFrame by rule, returning only rows where rule is True."""
+    def filter_by_rule(self, rule: str, reset_index: bool = True) -> pd.DataFrame:
+        """
+        Filter DataFrame by rule, returning only rows where rule is True.
+        
+        Pass reset_index=False to keep the date index and skip the extra copy.
+        """
         mask = self.evaluate_rule(rule)
-        return self.df[mask].reset_index()
+        filtered = self.df[mask]
+        return filtered.reset_index() if reset_index else filtered
     
     def get_rule_signals(self, buy_rule: str, sell_rule: str) -> pd.DataFrame:
         """
         Get buy and sell signals based on rules.
         
         Returns:
-            DataFrame with 'signal' column (1 for buy, -1 for sell, 0 for hold)
+            DataFrame with int8 'signal' column (1 for buy, -1 for sell, 0 for hold)
         """
         buy_mask = self.evaluate_rule(buy_rule)
         sell_mask = self.evaluate_rule(sell_rule)
         
-        signals = pd.Series(0, index=self.df.index)
-        signals[buy_mask] = 1
-        signals[sell_mask] = -1
+        signals = np.zeros(len(self.df), dtype=np.int8)
+        signals[buy_mask.to_numpy(dtype=bool)] = 1
+        signals[sell_mask.to_numpy(dtype=bool)] = -1
         
         result = self.df.copy()
         result['signal'] = signals
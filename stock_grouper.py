@@ -36,17 +36,12 @@ class StockGrouper:
     
     def list_groups(self) -> Dict[str, List[str]]:
         """List all available groups."""
-        groups = {}
-        
         # Predefined groups
-        for name, symbols in self.predefined_groups.items():
-            groups[name] = symbols
+        groups = dict(self.predefined_groups)
         
-        # Custom groups
-        custom_groups = self.data_manager.list_stock_groups()
-        for group_name in custom_groups:
+        # Custom groups, fetched in a single query
+        for group_name, group_stocks in self.data_manager.get_all_stock_groups().items():
             if group_name not in groups:
-                group_stocks = self.get_group(group_name)
                 groups[group_name] = [s[0] for s in group_stocks]
         
         return groups
@@ -5,205 +5,427 @@ Fetches complete list of publicly traded stocks.
 
 import pandas as pd
 import requests
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
+import asyncio
+import re
 import json
 import time
 from datetime import datetime
+from config import Config
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    import pyarrow  # Enables Arrow-backed string columns
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Arrow-backed strings keep symbol/name in contiguous buffers instead of PyObjects
+STRING_DTYPE = 'string[pyarrow]' if HAS_PYARROW else object
+
+
+# Built-in listings as (symbol, name, sector, market_cap) rows, used when the
+# exchanges cannot be reached
+_NSE_STOCKS = (
+    # Banking
+    ('HDFCBANK', 'HDFC Bank Ltd', 'Banking', 'Large Cap'),
+    ('ICICIBANK', 'ICICI Bank Ltd', 'Banking', 'Large Cap'),
+    ('KOTAKBANK', 'Kotak Mahindra Bank', 'Banking', 'Large Cap'),
+    ('AXISBANK', 'Axis Bank Ltd', 'Banking', 'Large Cap'),
+    ('SBIN', 'State Bank of India', 'Banking', 'Large Cap'),
+    ('INDUSINDBK', 'IndusInd Bank', 'Banking', 'Mid Cap'),
+    ('FEDERALBNK', 'Federal Bank', 'Banking', 'Mid Cap'),
+    ('BANDHANBNK', 'Bandhan Bank', 'Banking', 'Mid Cap'),
+    
+    # IT
+    ('TCS', 'Tata Consultancy Services', 'IT', 'Large Cap'),
+    ('INFY', 'Infosys Ltd', 'IT', 'Large Cap'),
+    ('WIPRO', 'Wipro Ltd', 'IT', 'Large Cap'),
+    ('HCLTECH', 'HCL Technologies', 'IT', 'Large Cap'),
+    ('TECHM', 'Tech Mahindra', 'IT', 'Large Cap'),
+    ('LTIM', 'LTI Mindtree', 'IT', 'Large Cap'),
+    ('MPHASIS', 'Mphasis Ltd', 'IT', 'Mid Cap'),
+    ('PERSISTENT', 'Persistent Systems', 'IT', 'Mid Cap'),
+    
+    # Oil & Gas
+    ('RELIANCE', 'Reliance Industries', 'Oil & Gas', 'Large Cap'),
+    ('ONGC', 'Oil & Natural Gas Corp', 'Oil & Gas', 'Large Cap'),
+    ('IOC', 'Indian Oil Corporation', 'Oil & Gas', 'Large Cap'),
+    ('BPCL', 'Bharat Petroleum', 'Oil & Gas', 'Large Cap'),
+    ('GAIL', 'GAIL India', 'Oil & Gas', 'Large Cap'),
+    
+    # FMCG
+    ('HINDUNILVR', 'Hindustan Unilever', 'FMCG', 'Large Cap'),
+    ('ITC', 'ITC Ltd', 'FMCG', 'Large Cap'),
+    ('NESTLEIND', 'Nestle India', 'FMCG', 'Large Cap'),
+    ('BRITANNIA', 'Britannia Industries', 'FMCG', 'Large Cap'),
+    ('DABUR', 'Dabur India', 'FMCG', 'Large Cap'),
+    ('MARICO', 'Marico Ltd', 'FMCG', 'Mid Cap'),
+    
+    # Pharma
+    ('SUNPHARMA', 'Sun Pharmaceutical', 'Pharma', 'Large Cap'),
+    ('DRREDDY', 'Dr Reddys Laboratories', 'Pharma', 'Large Cap'),
+    ('CIPLA', 'Cipla Ltd', 'Pharma', 'Large Cap'),
+    ('LUPIN', 'Lupin Ltd', 'Pharma', 'Large Cap'),
+    ('TORNTPHARM', 'Torrent Pharmaceuticals', 'Pharma', 'Mid Cap'),
+    ('GLENMARK', 'Glenmark Pharma', 'Pharma', 'Mid Cap'),
+    
+    # Auto
+    ('MARUTI', 'Maruti Suzuki', 'Auto', 'Large Cap'),
+    ('M&M', 'Mahindra & Mahindra', 'Auto', 'Large Cap'),
+    ('TATAMOTORS', 'Tata Motors', 'Auto', 'Large Cap'),
+    ('BAJAJ-AUTO', 'Bajaj Auto', 'Auto', 'Large Cap'),
+    ('EICHERMOT', 'Eicher Motors', 'Auto', 'Large Cap'),
+    ('HEROMOTOCO', 'Hero MotoCorp', 'Auto', 'Large Cap'),
+    
+    # Cement
+    ('ULTRACEMCO', 'UltraTech Cement', 'Cement', 'Large Cap'),
+    ('SHREECEM', 'Shree Cement', 'Cement', 'Large Cap'),
+    ('ACC', 'ACC Ltd', 'Cement', 'Large Cap'),
+    ('AMBUJACEM', 'Ambuja Cements', 'Cement', 'Large Cap'),
+    
+    # Metals
+    ('TATASTEEL', 'Tata Steel', 'Metals', 'Large Cap'),
+    ('JSWSTEEL', 'JSW Steel', 'Metals', 'Large Cap'),
+    ('HINDALCO', 'Hindalco Industries', 'Metals', 'Large Cap'),
+    ('VEDL', 'Vedanta Ltd', 'Metals', 'Large Cap'),
+    
+    # Power
+    ('NTPC', 'NTPC Ltd', 'Power', 'Large Cap'),
+    ('POWERGRID', 'Power Grid Corp', 'Power', 'Large Cap'),
+    ('TATAPOWER', 'Tata Power', 'Power', 'Large Cap'),
+    
+    # Telecom
+    ('BHARTIARTL', 'Bharti Airtel', 'Telecom', 'Large Cap'),
+    
+    # Consumer Durables
+    ('TITAN', 'Titan Company', 'Consumer Durables', 'Large Cap'),
+    ('WHIRLPOOL', 'Whirlpool India', 'Consumer Durables', 'Mid Cap'),
+    
+    # Paints
+    ('ASIANPAINT', 'Asian Paints', 'Paints', 'Large Cap'),
+    ('BERGEPAINT', 'Berger Paints', 'Paints', 'Mid Cap'),
+    
+    # Infrastructure
+    ('LT', 'Larsen & Toubro', 'Infrastructure', 'Large Cap'),
+    ('ADANIPORTS', 'Adani Ports', 'Infrastructure', 'Large Cap'),
+    
+    # More stocks across sectors
+    ('BAJFINANCE', 'Bajaj Finance', 'Financial Services', 'Large Cap'),
+    ('HDFC', 'HDFC Ltd', 'Financial Services', 'Large Cap'),
+    ('SBILIFE', 'SBI Life Insurance', 'Insurance', 'Large Cap'),
+    ('HDFCLIFE', 'HDFC Life Insurance', 'Insurance', 'Large Cap'),
+)
+
+# BSE stocks (many overlap with NSE)
+_BSE_STOCKS = (
+    ('RELIANCE', 'Reliance Industries', 'Oil & Gas', 'Large Cap'),
+    ('TCS', 'Tata Consultancy Services', 'IT', 'Large Cap'),
+    ('HDFCBANK', 'HDFC Bank Ltd', 'Banking', 'Large Cap'),
+    # Add more BSE-specific stocks
+)
+
+
+def _listing_frame(stocks: Tuple[Tuple[str, str, str, str], ...], exchange: str) -> pd.DataFrame:
+    """Typed DataFrame for a built-in listing, constructed column by column."""
+    symbols, names, sectors, market_caps = zip(*stocks)
+    return pd.DataFrame({
+        'symbol': list(symbols),
+        'name': list(names),
+        'sector': pd.Categorical(sectors),
+        'market_cap': pd.Categorical(market_caps),
+        'exchange': pd.Categorical([exchange] * len(symbols))
+    })
+
+
+# Built once at import; accessors hand out shallow copies
+_NSE_DF = _listing_frame(_NSE_STOCKS, 'NSE')
+_BSE_DF = _listing_frame(_BSE_STOCKS, 'BSE')
+
+
+# Exchange listings change rarely; fetched lists are reused for a day
+LIST_TTL_SECONDS = 24 * 3600
+# After a failed fetch the built-in list is served for a while instead of
+# every new fetcher waiting out the network timeout again
+FAILED_LIST_TTL_SECONDS = 15 * 60
+
+
+class _StockListCache:
+    """Per-exchange stock lists cached on disk with a TTL."""
+    
+    def __init__(self, ttl_seconds: float = LIST_TTL_SECONDS):
+        Config.initialize_directories()
+        self.cache_dir = Config.CACHE_DIR / "stocklist"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+    
+    def get(self, exchange: str) -> Optional[pd.DataFrame]:
+        """Return the cached list for an exchange, or None if missing or stale."""
+        try:
+            with open(self.cache_dir / f"{exchange}.meta.json", 'r') as f:
+                meta = json.load(f)
+            if time.time() - meta['fetched_at'] >= meta.get('ttl_seconds', self.ttl_seconds):
+                return None
+            return pd.read_pickle(self.cache_dir / f"{exchange}.pkl")
+        except (OSError, ValueError, KeyError, EOFError):
+            return None
+    
+    def put(self, exchange: str, df: pd.DataFrame, ttl_seconds: Optional[float] = None):
+        """Store a freshly fetched list, optionally with a shorter TTL than the default."""
+        meta = {'fetched_at': time.time(), 'rows': len(df)}
+        if ttl_seconds is not None:
+            meta['ttl_seconds'] = ttl_seconds
+        try:
+            df.to_pickle(self.cache_dir / f"{exchange}.pkl")
+            with open(self.cache_dir / f"{exchange}.meta.json", 'w') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"Error caching {exchange} stock list: {e}")
 
 
 class StockListFetcher:
     """Fetches complete list of all NSE and BSE listed stocks."""
     
-    def __init__(self):
+    NSE_HOME_URL = "https://www.nseindia.com"
+    NSE_FNO_URL = "https://www.nseindia.com/api/equity-stockIndices?index=SECURITIES%20IN%20F%26O"
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'application/json',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    CATEGORY_COLUMNS = ('sector', 'market_cap', 'exchange')
+    STRING_COLUMNS = ('symbol', 'name')
+    
+    def __init__(self, cache_ttl_seconds: float = LIST_TTL_SECONDS):
         self.nse_stocks = []
         self.bse_stocks = []
         self.stock_metadata = {}
+        self.list_cache = _StockListCache(cache_ttl_seconds)
+        # Pooled keep-alive connection for the synchronous fetch path
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        self._by_exchange = {}  # 'NSE' / 'BSE' / None (both) -> stock list
+        self._blobs = {}  # same keys -> search haystack aligned with _by_exchange
     
     def fetch_nse_stocks(self) -> pd.DataFrame:
         """
         Fetch all NSE listed stocks.
         Uses NSE API to get complete list.
         """
-        try:
-            # NSE API endpoint for equity list
-            url = "https://www.nseindia.com/api/equity-stockIndices?index=SECURITIES%20IN%20F%26O"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-            
-            # Alternative: Use NSE Python library or fetch from CSV
-            # For now, we'll use a comprehensive list of major NSE stocks
-            nse_stocks = self._get_nse_comprehensive_list()
-            
-            df = pd.DataFrame(nse_stocks)
-            df['exchange'] = 'NSE'
-            return df
-        
-        except Exception as e:
-            print(f"Error fetching NSE stocks: {e}")
-            # Fallback to comprehensive list
-            return pd.DataFrame(self._get_nse_comprehensive_list())
+        return self._fetch_exchanges(['NSE'])[0]
     
     def fetch_bse_stocks(self) -> pd.DataFrame:
         """Fetch all BSE listed stocks."""
+        return self._fetch_exchanges(['BSE'])[0]
+    
+    def _fetch_exchanges(self, exchanges: List[str]) -> List[pd.DataFrame]:
+        """
+        Fetch the given exchanges, serving fresh lists from the disk cache and
+        requesting the rest concurrently; falls back to the built-in lists.
+        """
+        frames = {exchange: self.list_cache.get(exchange) for exchange in exchanges}
+        missing = [exchange for exchange, df in frames.items() if df is None]
+        
+        if missing and HAS_AIOHTTP:
+            try:
+                frames.update(zip(missing, asyncio.run(self._fetch_all_async(missing))))
+            except Exception as e:
+                print(f"Error fetching stock lists: {e}")
+                for exchange in missing:
+                    self.list_cache.put(exchange, self._fallback_frame(exchange), ttl_seconds=FAILED_LIST_TTL_SECONDS)
+        elif 'NSE' in missing:
+            frames['NSE'] = self._fetch_nse_sync()
+        
+        return [
+            frames[exchange] if frames[exchange] is not None else self._fallback_frame(exchange)
+            for exchange in exchanges
+        ]
+    
+    async def get_all_stocks_async(self, exchanges: Tuple[str, ...] = ('NSE', 'BSE')) -> pd.DataFrame:
+        """
+        Async counterpart of get_all_stocks: fresh lists come from the disk
+        cache, the rest are fetched concurrently, and the combined list gets
+        the same dedup and dtypes.
+        """
+        frames = {exchange: self.list_cache.get(exchange) for exchange in exchanges}
+        missing = [exchange for exchange, df in frames.items() if df is None]
+        
+        if missing and HAS_AIOHTTP:
+            try:
+                frames.update(zip(missing, await self._fetch_all_async(missing)))
+            except Exception as e:
+                print(f"Error fetching stock lists: {e}")
+                for exchange in missing:
+                    self.list_cache.put(exchange, self._fallback_frame(exchange), ttl_seconds=FAILED_LIST_TTL_SECONDS)
+        
+        return self._prepare(pd.concat([
+            frames[exchange] if frames[exchange] is not None else self._fallback_frame(exchange)
+            for exchange in exchanges
+        ], ignore_index=True))
+    
+    async def _fetch_all_async(self, exchanges: List[str]) -> List[pd.DataFrame]:
+        """Fetch every exchange over one pooled keep-alive session."""
+        fetchers = {'NSE': self._fetch_nse_async, 'BSE': self._fetch_bse_async}
+        connector = aiohttp.TCPConnector(limit_per_host=8)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, headers=self.HEADERS, timeout=timeout) as session:
+            return await asyncio.gather(*(fetchers[exchange](session) for exchange in exchanges))
+    
+    async def _fetch_nse_async(self, session) -> pd.DataFrame:
+        """Built-in NSE list extended with any F&O securities missing from it."""
+        df = self._get_nse_comprehensive_list()
         try:
-            # BSE API or CSV download
-            bse_stocks = self._get_bse_comprehensive_list()
-            df = pd.DataFrame(bse_stocks)
-            df['exchange'] = 'BSE'
+            # The API only answers once the homepage has set its cookies
+            async with session.get(self.NSE_HOME_URL):
+                pass
+            async with session.get(self.NSE_FNO_URL) as resp:
+                resp.raise_for_status()
+                payload = await resp.json(content_type=None)
+        except Exception as e:
+            print(f"Error fetching NSE stocks: {e}")
+            self.list_cache.put('NSE', df, ttl_seconds=FAILED_LIST_TTL_SECONDS)
             return df
+        
+        df = self._with_fno_rows(df, payload)
+        self.list_cache.put('NSE', df)
+        return df
+    
+    def _fetch_nse_sync(self) -> pd.DataFrame:
+        """NSE list over the shared requests session, used without aiohttp."""
+        df = self._get_nse_comprehensive_list()
+        try:
+            # Cookies persist on the session, so the homepage is only hit once
+            if not self.session.cookies:
+                self.session.get(self.NSE_HOME_URL, timeout=10)
+            resp = self.session.get(self.NSE_FNO_URL, timeout=10)
+            resp.raise_for_status()
+            payload = resp.json()
         except Exception as e:
-            print(f"Error fetching BSE stocks: {e}")
-            return pd.DataFrame(self._get_bse_comprehensive_list())
+            print(f"Error fetching NSE stocks: {e}")
+            self.list_cache.put('NSE', df, ttl_seconds=FAILED_LIST_TTL_SECONDS)
+            return df
+        
+        df = self._with_fno_rows(df, payload)
+        self.list_cache.put('NSE', df)
+        return df
+    
+    @staticmethod
+    def _with_fno_rows(df: pd.DataFrame, payload: Dict) -> pd.DataFrame:
+        """Append F&O securities from an NSE index payload that the list is missing."""
+        known = set(df['symbol'])
+        extra = []
+        for row in payload.get('data', []):
+            meta = row.get('meta')
+            if meta and row.get('symbol') not in known:
+                known.add(row['symbol'])
+                extra.append({
+                    'symbol': row['symbol'],
+                    'name': meta.get('companyName', row['symbol']),
+                    'sector': meta.get('industry'),
+                    'market_cap': None,
+                    'exchange': 'NSE'
+                })
+        return pd.concat([df, pd.DataFrame(extra)], ignore_index=True) if extra else df
+    
+    async def _fetch_bse_async(self, session) -> pd.DataFrame:
+        """BSE list; there is no BSE endpoint wired up yet, so this is the built-in list."""
+        df = self._fallback_frame('BSE')
+        self.list_cache.put('BSE', df)
+        return df
     
-    def _get_nse_comprehensive_list(self) -> List[Dict]:
+    def _fallback_frame(self, exchange: str) -> pd.DataFrame:
+        """Built-in list for an exchange."""
+        if exchange == 'NSE':
+            return self._get_nse_comprehensive_list()
+        return self._get_bse_comprehensive_list()
+    
+    def _get_nse_comprehensive_list(self) -> pd.DataFrame:
         """
         Get comprehensive list of NSE stocks.
         This includes major stocks across all sectors.
         """
-        # Comprehensive list of NSE stocks across all sectors
-        nse_stocks = [
-            # Banking
-            {'symbol': 'HDFCBANK', 'name': 'HDFC Bank Ltd', 'sector': 'Banking', 'market_cap': 'Large Cap'},
-            {'symbol': 'ICICIBANK', 'name': 'ICICI Bank Ltd', 'sector': 'Banking', 'market_cap': 'Large Cap'},
-            {'symbol': 'KOTAKBANK', 'name': 'Kotak Mahindra Bank', 'sector': 'Banking', 'market_cap': 'Large Cap'},
-            {'symbol': 'AXISBANK', 'name': 'Axis Bank Ltd', 'sector': 'Banking', 'market_cap': 'Large Cap'},
-            {'symbol': 'SBIN', 'name': 'State Bank of India', 'sector': 'Banking', 'market_cap': 'Large Cap'},
-            {'symbol': 'INDUSINDBK', 'name': 'IndusInd Bank', 'sector': 'Banking', 'market_cap': 'Mid Cap'},
-            {'symbol': 'FEDERALBNK', 'name': 'Federal Bank', 'sector': 'Banking', 'market_cap': 'Mid Cap'},
-            {'symbol': 'BANDHANBNK', 'name': 'Bandhan Bank', 'sector': 'Banking', 'market_cap': 'Mid Cap'},
-            
-            # IT
-            {'symbol': 'TCS', 'name': 'Tata Consultancy Services', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'INFY', 'name': 'Infosys Ltd', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'WIPRO', 'name': 'Wipro Ltd', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'HCLTECH', 'name': 'HCL Technologies', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'TECHM', 'name': 'Tech Mahindra', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'LTIM', 'name': 'LTI Mindtree', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'MPHASIS', 'name': 'Mphasis Ltd', 'sector': 'IT', 'market_cap': 'Mid Cap'},
-            {'symbol': 'PERSISTENT', 'name': 'Persistent Systems', 'sector': 'IT', 'market_cap': 'Mid Cap'},
-            
-            # Oil & Gas
-            {'symbol': 'RELIANCE', 'name': 'Reliance Industries', 'sector': 'Oil & Gas', 'market_cap': 'Large Cap'},
-            {'symbol': 'ONGC', 'name': 'Oil & Natural Gas Corp', 'sector': 'Oil & Gas', 'market_cap': 'Large Cap'},
-            {'symbol': 'IOC', 'name': 'Indian Oil Corporation', 'sector': 'Oil & Gas', 'market_cap': 'Large Cap'},
-            {'symbol': 'BPCL', 'name': 'Bharat Petroleum', 'sector': 'Oil & Gas', 'market_cap': 'Large Cap'},
-            {'symbol': 'GAIL', 'name': 'GAIL India', 'sector': 'Oil & Gas', 'market_cap': 'Large Cap'},
-            
-            # FMCG
-            {'symbol': 'HINDUNILVR', 'name': 'Hindustan Unilever', 'sector': 'FMCG', 'market_cap': 'Large Cap'},
-            {'symbol': 'ITC', 'name': 'ITC Ltd', 'sector': 'FMCG', 'market_cap': 'Large Cap'},
-            {'symbol': 'NESTLEIND', 'name': 'Nestle India', 'sector': 'FMCG', 'market_cap': 'Large Cap'},
-            {'symbol': 'BRITANNIA', 'name': 'Britannia Industries', 'sector': 'FMCG', 'market_cap': 'Large Cap'},
-            {'symbol': 'DABUR', 'name': 'Dabur India', 'sector': 'FMCG', 'market_cap': 'Large Cap'},
-            {'symbol': 'MARICO', 'name': 'Marico Ltd', 'sector': 'FMCG', 'market_cap': 'Mid Cap'},
-            
-            # Pharma
-            {'symbol': 'SUNPHARMA', 'name': 'Sun Pharmaceutical', 'sector': 'Pharma', 'market_cap': 'Large Cap'},
-            {'symbol': 'DRREDDY', 'name': 'Dr Reddys Laboratories', 'sector': 'Pharma', 'market_cap': 'Large Cap'},
-            {'symbol': 'CIPLA', 'name': 'Cipla Ltd', 'sector': 'Pharma', 'market_cap': 'Large Cap'},
-            {'symbol': 'LUPIN', 'name': 'Lupin Ltd', 'sector': 'Pharma', 'market_cap': 'Large Cap'},
-            {'symbol': 'TORNTPHARM', 'name': 'Torrent Pharmaceuticals', 'sector': 'Pharma', 'market_cap': 'Mid Cap'},
-            {'symbol': 'GLENMARK', 'name': 'Glenmark Pharma', 'sector': 'Pharma', 'market_cap': 'Mid Cap'},
-            
-            # Auto
-            {'symbol': 'MARUTI', 'name': 'Maruti Suzuki', 'sector': 'Auto', 'market_cap': 'Large Cap'},
-            {'symbol': 'M&M', 'name': 'Mahindra & Mahindra', 'sector': 'Auto', 'market_cap': 'Large Cap'},
-            {'symbol': 'TATAMOTORS', 'name': 'Tata Motors', 'sector': 'Auto', 'market_cap': 'Large Cap'},
-            {'symbol': 'BAJAJ-AUTO', 'name': 'Bajaj Auto', 'sector': 'Auto', 'market_cap': 'Large Cap'},
-            {'symbol': 'EICHERMOT', 'name': 'Eicher Motors', 'sector': 'Auto', 'market_cap': 'Large Cap'},
-            {'symbol': 'HEROMOTOCO', 'name': 'Hero MotoCorp', 'sector': 'Auto', 'market_cap': 'Large Cap'},
-            
-            # Cement
-            {'symbol': 'ULTRACEMCO', 'name': 'UltraTech Cement', 'sector': 'Cement', 'market_cap': 'Large Cap'},
-            {'symbol': 'SHREECEM', 'name': 'Shree Cement', 'sector': 'Cement', 'market_cap': 'Large Cap'},
-            {'symbol': 'ACC', 'name': 'ACC Ltd', 'sector': 'Cement', 'market_cap': 'Large Cap'},
-            {'symbol': 'AMBUJACEM', 'name': 'Ambuja Cements', 'sector': 'Cement', 'market_cap': 'Large Cap'},
-            
-            # Metals
-            {'symbol': 'TATASTEEL', 'name': 'Tata Steel', 'sector': 'Metals', 'market_cap': 'Large Cap'},
-            {'symbol': 'JSWSTEEL', 'name': 'JSW Steel', 'sector': 'Metals', 'market_cap': 'Large Cap'},
-            {'symbol': 'HINDALCO', 'name': 'Hindalco Industries', 'sector': 'Metals', 'market_cap': 'Large Cap'},
-            {'symbol': 'VEDL', 'name': 'Vedanta Ltd', 'sector': 'Metals', 'market_cap': 'Large Cap'},
-            
-            # Power
-            {'symbol': 'NTPC', 'name': 'NTPC Ltd', 'sector': 'Power', 'market_cap': 'Large Cap'},
-            {'symbol': 'POWERGRID', 'name': 'Power Grid Corp', 'sector': 'Power', 'market_cap': 'Large Cap'},
-            {'symbol': 'TATAPOWER', 'name': 'Tata Power', 'sector': 'Power', 'market_cap': 'Large Cap'},
-            
-            # Telecom
-            {'symbol': 'BHARTIARTL', 'name': 'Bharti Airtel', 'sector': 'Telecom', 'market_cap': 'Large Cap'},
-            {'symbol': 'RELIANCE', 'name': 'Reliance Industries', 'sector': 'Telecom', 'market_cap': 'Large Cap'},
-            
-            # Consumer Durables
-            {'symbol': 'TITAN', 'name': 'Titan Company', 'sector': 'Consumer Durables', 'market_cap': 'Large Cap'},
-            {'symbol': 'WHIRLPOOL', 'name': 'Whirlpool India', 'sector': 'Consumer Durables', 'market_cap': 'Mid Cap'},
-            
-            # Paints
-            {'symbol': 'ASIANPAINT', 'name': 'Asian Paints', 'sector': 'Paints', 'market_cap': 'Large Cap'},
-            {'symbol': 'BERGEPAINT', 'name': 'Berger Paints', 'sector': 'Paints', 'market_cap': 'Mid Cap'},
-            
-            # Infrastructure
-            {'symbol': 'LT', 'name': 'Larsen & Toubro', 'sector': 'Infrastructure', 'market_cap': 'Large Cap'},
-            {'symbol': 'ADANIPORTS', 'name': 'Adani Ports', 'sector': 'Infrastructure', 'market_cap': 'Large Cap'},
-            
-            # More stocks across sectors
-            {'symbol': 'BAJFINANCE', 'name': 'Bajaj Finance', 'sector': 'Financial Services', 'market_cap': 'Large Cap'},
-            {'symbol': 'HDFC', 'name': 'HDFC Ltd', 'sector': 'Financial Services', 'market_cap': 'Large Cap'},
-            {'symbol': 'SBILIFE', 'name': 'SBI Life Insurance', 'sector': 'Insurance', 'market_cap': 'Large Cap'},
-            {'symbol': 'HDFCLIFE', 'name': 'HDFC Life Insurance', 'sector': 'Insurance', 'market_cap': 'Large Cap'},
-        ]
-        
-        # Add more stocks programmatically (you can expand this)
-        # For production, fetch from NSE API or CSV files
-        
-        return nse_stocks
+        return _NSE_DF.copy(deep=False)
     
-    def _get_bse_comprehensive_list(self) -> List[Dict]:
+    def _get_bse_comprehensive_list(self) -> pd.DataFrame:
         """Get comprehensive list of BSE stocks."""
-        # BSE stocks (many overlap with NSE)
-        bse_stocks = [
-            {'symbol': 'RELIANCE', 'name': 'Reliance Industries', 'sector': 'Oil & Gas', 'market_cap': 'Large Cap'},
-            {'symbol': 'TCS', 'name': 'Tata Consultancy Services', 'sector': 'IT', 'market_cap': 'Large Cap'},
-            {'symbol': 'HDFCBANK', 'name': 'HDFC Bank Ltd', 'sector': 'Banking', 'market_cap': 'Large Cap'},
-            # Add more BSE-specific stocks
-        ]
-        return bse_stocks
+        return _BSE_DF.copy(deep=False)
     
     def get_all_stocks(self, exchange: Optional[str] = None) -> pd.DataFrame:
         """Get all stocks from specified exchange or both."""
-        if exchange == 'NSE':
-            return self.fetch_nse_stocks()
-        elif exchange == 'BSE':
-            return self.fetch_bse_stocks()
+        # Shallow copy so callers cannot mutate the cached frame's columns
+        return self._stocks(exchange).copy(deep=False)
+    
+    def _stocks(self, exchange: Optional[str] = None) -> pd.DataFrame:
+        """Stock list for one exchange (or both for None), built once per instance."""
+        self._ensure_loaded()
+        return self._by_exchange[exchange if exchange in ('NSE', 'BSE') else None]
+    
+    def _ensure_loaded(self):
+        """Fetch both exchanges once and build the per-exchange and combined lists."""
+        if self._by_exchange:
+            return
+        # Both exchanges are requested concurrently
+        nse, bse = (self._prepare(df) for df in self._fetch_exchanges(['NSE', 'BSE']))
+        if bse.empty or nse.empty:
+            # Nothing to combine; share the non-empty frame instead of copying it
+            combined = nse if bse.empty else bse
         else:
-            nse_df = self.fetch_nse_stocks()
-            bse_df = self.fetch_bse_stocks()
-            return pd.concat([nse_df, bse_df], ignore_index=True)
-    
-    def search_stocks(self, query: str, exchange: Optional[str] = None) -> pd.DataFrame:
-        """Search stocks by name or symbol."""
-        all_stocks = self.get_all_stocks(exchange)
-        query_upper = query.upper()
+            combined = self._prepare(pd.concat([nse, bse], ignore_index=True))
+        self._by_exchange = {'NSE': nse, 'BSE': bse, None: combined}
+    
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """One row per (symbol, exchange), with low-cardinality columns as categoricals."""
+        df = df.drop_duplicates(subset=['symbol', 'exchange'], keep='first', ignore_index=True)
+        dtypes = {col: STRING_DTYPE for col in self.STRING_COLUMNS if col in df.columns}
+        dtypes.update({col: 'category' for col in self.CATEGORY_COLUMNS if col in df.columns})
+        return df.astype(dtypes)
+    
+    def invalidate(self):
+        """Drop the in-memory lists; the next query reloads them (disk cache first)."""
+        self._by_exchange = {}
+        self._blobs.clear()
+    
+    def search_stocks(self, query: Union[str, List[str]], exchange: Optional[str] = None) -> pd.DataFrame:
+        """
+        Search stocks by name or symbol.
+        
+        A list of queries matches stocks containing any of them, in one pass
+        over the search column.
+        """
+        all_stocks = self._stocks(exchange)
+        blob = self._search_blob(exchange)
         
-        mask = (
-            all_stocks['symbol'].str.upper().str.contains(query_upper, na=False) |
-            all_stocks['name'].str.upper().str.contains(query_upper, na=False)
-        )
+        if isinstance(query, str):
+            mask = blob.str.contains(query.upper(), regex=False, na=False)
+        else:
+            pattern = re.compile('|'.join(re.escape(q.upper()) for q in query if q))
+            if not pattern.pattern:
+                return all_stocks.iloc[:0]
+            mask = blob.str.contains(pattern, na=False)
         return all_stocks[mask]
     
+    def _search_blob(self, exchange: Optional[str] = None) -> pd.Series:
+        """Uppercased symbol and name per row, joined by a unit separator; built once per list."""
+        key = exchange if exchange in ('NSE', 'BSE') else None
+        blob = self._blobs.get(key)
+        if blob is None:
+            df = self._stocks(key)
+            # Object dtype so the compiled patterns from search_stocks apply directly
+            blob = df['symbol'].str.upper() + '\x1f' + df['name'].str.upper()
+            blob = self._blobs[key] = blob.astype(object)
+        return blob
+    
     def get_stocks_by_sector(self, sector: str, exchange: Optional[str] = None) -> pd.DataFrame:
         """Get stocks by sector."""
-        all_stocks = self.get_all_stocks(exchange)
+        all_stocks = self._stocks(exchange)
         return all_stocks[all_stocks['sector'] == sector]
     
     def get_stocks_by_market_cap(self, market_cap: str, exchange: Optional[str] = None) -> pd.DataFrame:
         """Get stocks by market cap category."""
-        all_stocks = self.get_all_stocks(exchange)
+        all_stocks = self._stocks(exchange)
         return all_stocks[all_stocks['market_cap'] == market_cap]
-
-
-
@@ -7,8 +7,94 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# Preset strategies are constant; get_preset_strategies hands out these dicts
+_PRESET_STRATEGIES = (
+    {
+        'name': 'SMA Crossover',
+        'description': 'Buy when short MA crosses above long MA, sell on reverse',
+        'type': 'backtest',
+        'buy_conditions': [
+            {'field': 'sma(20)', 'operator': '>', 'value': 'sma(50)'}
+        ],
+        'sell_conditions': [
+            {'field': 'sma(20)', 'operator': '<', 'value': 'sma(50)'}
+        ],
+        'parameters': {
+            'position_size': 1.0,
+            'stop_loss': 0.05,
+            'take_profit': None
+        },
+        'tags': ['trend', 'momentum', 'technical']
+    },
+    {
+        'name': 'RSI Mean Reversion',
+        'description': 'Buy oversold (RSI < 30), sell overbought (RSI > 70)',
+        'type': 'backtest',
+        'buy_conditions': [
+            {'field': 'rsi(14)', 'operator': '<', 'value': 30}
+        ],
+        'sell_conditions': [
+            {'field': 'rsi(14)', 'operator': '>', 'value': 70}
+        ],
+        'parameters': {
+            'position_size': 1.0,
+            'stop_loss': 0.05,
+            'take_profit': 0.10
+        },
+        'tags': ['mean_reversion', 'oscillator', 'technical']
+    },
+    {
+        'name': 'Breakout Strategy',
+        'description': 'Buy on price breakout above resistance with volume confirmation',
+        'type': 'backtest',
+        'buy_conditions': [
+            {'field': 'close', 'operator': '>', 'value': 'sma(50)'},
+            {'field': 'volume', 'operator': '>', 'value': 'volume_sma(20)'}
+        ],
+        'sell_conditions': [
+            {'field': 'rsi(14)', 'operator': '>', 'value': 70}
+        ],
+        'parameters': {
+            'position_size': 1.0,
+            'stop_loss': 0.05
+        },
+        'tags': ['breakout', 'momentum', 'technical']
+    },
+    {
+        'name': 'Value Screener',
+        'description': 'Find undervalued stocks with good fundamentals',
+        'type': 'screener',
+        'screener_conditions': [
+            {'field': 'pe_ratio', 'operator': '<', 'value': 20},
+            {'field': 'roe', 'operator': '>', 'value': 15},
+            {'field': 'debt_to_equity', 'operator': '<', 'value': 1.0}
+        ],
+        'tags': ['value', 'fundamental', 'screener']
+    },
+    {
+        'name': 'Growth Screener',
+        'description': 'Find high-growth stocks',
+        'type': 'screener',
+        'screener_conditions': [
+            {'field': 'revenue_growth', 'operator': '>', 'value': 20},
+            {'field': 'earnings_growth', 'operator': '>', 'value': 15},
+            {'field': 'roe', 'operator': '>', 'value': 20}
+        ],
+        'tags': ['growth', 'fundamental', 'screener']
+    }
+)
+
 
 class StrategyManager:
     """Manages strategy creation, storage, versioning, and retrieval."""
@@ -17,7 +103,12 @@ class StrategyManager:
         Config.initialize_directories()
         self.strategies_dir = Config.STRATEGIES_DIR
         self.strategies = {}
-        self._load_all_strategies()
+        # Secondary indexes over self.strategies for list_strategies filters
+        self._by_type = defaultdict(set)
+        self._by_tag = defaultdict(set)
+        self._presets = set()
+        # Strategies are read from disk on first use; only the ids are scanned here
+        self._known_ids = {path.stem for path in self.strategies_dir.glob("*.json")}
     
     def create_strategy(
         self,
@@ -45,7 +136,9 @@ class StrategyManager:
             tags: Tags for categorization
             is_preset: Whether this is a preset strategy
         """
-        strategy_id = f"strategy_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        now = datetime.now()
+        created_at = now.isoformat()
+        strategy_id = f"strategy_{now.strftime('%Y%m%d_%H%M%S')}"
         
         strategy = {
             'id': strategy_id,
@@ -58,13 +151,13 @@ class StrategyManager:
             'parameters': parameters or {},
             'tags': tags or [],
             'is_preset': is_preset,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
+            'created_at': created_at,
+            'updated_at': created_at,
             'version': 1,
             'performance_metrics': {}
         }
         
-        self.strategies[strategy_id] = strategy
+        self._add(strategy)
         self._save_strategy(strategy)
         
         return strategy
@@ -75,10 +168,11 @@ class StrategyManager:
         **updates
     ) -> Dict:
         """Update a strategy (creates new version)."""
-        if strategy_id not in self.strategies:
+        current = self.get_strategy(strategy_id)
+        if current is None:
             raise ValueError(f"Strategy {strategy_id} not found")
         
-        strategy = self.strategies[strategy_id].copy()
+        strategy = current.copy()
         strategy['version'] += 1
         strategy['updated_at'] = datetime.now().isoformat()
         
@@ -92,13 +186,15 @@ class StrategyManager:
         strategy['id'] = versioned_id
         strategy['parent_id'] = strategy_id
         
-        self.strategies[versioned_id] = strategy
+        self._add(strategy)
         self._save_strategy(strategy)
         
         return strategy
     
     def get_strategy(self, strategy_id: str) -> Optional[Dict]:
         """Get strategy by ID."""
+        if strategy_id not in self.strategies and strategy_id in self._known_ids:
+            self._load_strategy(self.strategies_dir / f"{strategy_id}.json")
         return self.strategies.get(strategy_id)
     
     def list_strategies(
@@ -108,23 +204,51 @@ class StrategyManager:
         is_preset: Optional[bool] = None
     ) -> List[Dict]:
         """List strategies with optional filters."""
-        strategies = list(self.strategies.values())
+        self._load_all_strategies()
         
+        if not (strategy_type or tags or is_preset is not None):
+            return list(self.strategies.values())
+        
+        ids = set(self.strategies)
         if strategy_type:
-            strategies = [s for s in strategies if s['type'] == strategy_type]
+            ids &= self._by_type.get(strategy_type, set())
         
         if tags:
-            strategies = [s for s in strategies if any(tag in s.get('tags', []) for tag in tags)]
+            ids &= set().union(*(self._by_tag.get(tag, set()) for tag in tags))
         
         if is_preset is not None:
-            strategies = [s for s in strategies if s.get('is_preset', False) == is_preset]
+            ids = ids & self._presets if is_preset else ids - self._presets
         
-        return strategies
+        # Keep insertion order
+        return [strategy for strategy_id, strategy in self.strategies.items() if strategy_id in ids]
+    
+    def _add(self, strategy: Dict):
+        """Register a strategy and index it by type, tags and preset flag."""
+        strategy_id = strategy['id']
+        if strategy_id in self.strategies:
+            self._remove(strategy_id)
+        self.strategies[strategy_id] = strategy
+        self._known_ids.add(strategy_id)
+        self._by_type[strategy.get('type')].add(strategy_id)
+        for tag in strategy.get('tags', []):
+            self._by_tag[tag].add(strategy_id)
+        if strategy.get('is_preset', False):
+            self._presets.add(strategy_id)
+    
+    def _remove(self, strategy_id: str):
+        """Drop a strategy and its index entries."""
+        strategy = self.strategies.pop(strategy_id)
+        self._by_type[strategy.get('type')].discard(strategy_id)
+        for tag in strategy.get('tags', []):
+            self._by_tag[tag].discard(strategy_id)
+        self._presets.discard(strategy_id)
     
     def delete_strategy(self, strategy_id: str):
         """Delete a strategy."""
-        if strategy_id in self.strategies:
-            del self.strategies[strategy_id]
+        if strategy_id in self.strategies or strategy_id in self._known_ids:
+            if strategy_id in self.strategies:
+                self._remove(strategy_id)
+            self._known_ids.discard(strategy_id)
             
             # Delete file
             strategy_file = self.strategies_dir / f"{strategy_id}.json"
@@ -132,101 +256,63 @@ class StrategyManager:
                 strategy_file.unlink()
     
     def get_preset_strategies(self) -> List[Dict]:
-        """Get all preset strategies."""
-        return [
-            {
-                'name': 'SMA Crossover',
-                'description': 'Buy when short MA crosses above long MA, sell on reverse',
-                'type': 'backtest',
-                'buy_conditions': [
-                    {'field': 'sma(20)', 'operator': '>', 'value': 'sma(50)'}
-                ],
-                'sell_conditions': [
-                    {'field': 'sma(20)', 'operator': '<', 'value': 'sma(50)'}
-                ],
-                'parameters': {
-                    'position_size': 1.0,
-                    'stop_loss': 0.05,
-                    'take_profit': None
-                },
-                'tags': ['trend', 'momentum', 'technical']
-            },
-            {
-                'name': 'RSI Mean Reversion',
-                'description': 'Buy oversold (RSI < 30), sell overbought (RSI > 70)',
-                'type': 'backtest',
-                'buy_conditions': [
-                    {'field': 'rsi(14)', 'operator': '<', 'value': 30}
-                ],
-                'sell_conditions': [
-                    {'field': 'rsi(14)', 'operator': '>', 'value': 70}
-                ],
-                'parameters': {
-                    'position_size': 1.0,
-                    'stop_loss': 0.05,
-                    'take_profit': 0.10
-                },
-                'tags': ['mean_reversion', 'oscillator', 'technical']
-            },
-            {
-                'name': 'Breakout Strategy',
-                'description': 'Buy on price breakout above resistance with volume confirmation',
-                'type': 'backtest',
-                'buy_conditions': [
-                    {'field': 'close', 'operator': '>', 'value': 'sma(50)'},
-                    {'field': 'volume', 'operator': '>', 'value': 'volume_sma(20)'}
-                ],
-                'sell_conditions': [
-                    {'field': 'rsi(14)', 'operator': '>', 'value': 70}
-                ],
-                'parameters': {
-                    'position_size': 1.0,
-                    'stop_loss': 0.05
-                },
-                'tags': ['breakout', 'momentum', 'technical']
-            },
-            {
-                'name': 'Value Screener',
-                'description': 'Find undervalued stocks with good fundamentals',
-                'type': 'screener',
-                'screener_conditions': [
-                    {'field': 'pe_ratio', 'operator': '<', 'value': 20},
-                    {'field': 'roe', 'operator': '>', 'value': 15},
-                    {'field': 'debt_to_equity', 'operator': '<', 'value': 1.0}
-                ],
-                'tags': ['value', 'fundamental', 'screener']
-            },
-            {
-                'name': 'Growth Screener',
-                'description': 'Find high-growth stocks',
-                'type': 'screener',
-                'screener_conditions': [
-                    {'field': 'revenue_growth', 'operator': '>', 'value': 20},
-                    {'field': 'earnings_growth', 'operator': '>', 'value': 15},
-                    {'field': 'roe', 'operator': '>', 'value': 20}
-                ],
-                'tags': ['growth', 'fundamental', 'screener']
-            }
-        ]
+        """Get all preset strategies (shared definitions; copy before mutating)."""
+        return list(_PRESET_STRATEGIES)
     
     def _save_strategy(self, strategy: Dict):
         """Save strategy to file."""
         strategy_file = self.strategies_dir / f"{strategy['id']}.json"
-        with open(strategy_file, 'w') as f:
-            json.dump(strategy, f, indent=2)
+        if HAS_ORJSON:
+            payload = orjson.dumps(strategy, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            payload = json.dumps(strategy, indent=2).encode()
+        
+        # One buffered write to a temp file, then an atomic rename so readers
+        # never see a partially written strategy
+        tmp_file = strategy_file.with_suffix('.json.tmp')
+        tmp_file.write_bytes(payload)
+        tmp_file.replace(strategy_file)
     
-    def _load_all_strategies(self):
-        """Load all strategies from disk."""
-        if not self.strategies_dir.exists():
+    def _load_all_strategies(self, max_workers: int = 8):
+        """Load every known strategy that has not been read from disk yet."""
+        paths = [
+            self.strategies_dir / f"{strategy_id}.json"
+            for strategy_id in sorted(self._known_ids - self.strategies.keys())
+        ]
+        if not paths:
             return
         
-        for strategy_file in self.strategies_dir.glob("*.json"):
-            try:
+        # File reads release the GIL, so they overlap across threads; indexing
+        # stays on this thread
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            for path, strategy in zip(paths, executor.map(self._read_strategy, paths)):
+                if strategy is None:
+                    self._known_ids.discard(path.stem)
+                else:
+                    self._add(strategy)
+    
+    def _load_strategy(self, strategy_file: Path):
+        """Load one strategy file."""
+        strategy = self._read_strategy(strategy_file)
+        if strategy is None:
+            self._known_ids.discard(strategy_file.stem)
+        else:
+            self._add(strategy)
+    
+    @staticmethod
+    def _read_strategy(strategy_file: Path) -> Optional[Dict]:
+        """Read and parse one strategy file, or None if it cannot be loaded."""
+        try:
+            if HAS_ORJSON:
+                strategy = orjson.loads(strategy_file.read_bytes())
+            else:
                 with open(strategy_file, 'r') as f:
                     strategy = json.load(f)
-                    self.strategies[strategy['id']] = strategy
-            except Exception as e:
-                print(f"Error loading strategy {strategy_file}: {e}")
-
-
-
+        except Exception as e:
+            print(f"Error loading strategy {strategy_file}: {e}")
+            return None
+        
+        if not isinstance(strategy, dict) or 'id' not in strategy:
+            print(f"Error loading strategy {strategy_file}: not a strategy object")
+            return None
+        return strategy
@@ -3,8 +3,28 @@ Utility functions for the backtester.
 """
 
 import pandas as pd
+import numpy as np
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Iterable, Hashable, Any
+
+try:
+    from tqdm.auto import tqdm
+except ImportError:
+    tqdm = None
+
+try:
+    import xlsxwriter  # Enables the streaming Excel writer in export_to_excel
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+try:
+    from tsdownsample import MinMaxLTTBDownsampler
+    HAS_TSDOWNSAMPLE = True
+except ImportError:
+    HAS_TSDOWNSAMPLE = False
 
 
 def validate_date_range(start_date: str, end_date: str) -> Tuple[bool, Optional[str]]:
@@ -24,6 +44,142 @@ def validate_date_range(start_date: str, end_date: str) -> Tuple[bool, Optional[
         return False, f"Invalid date format: {str(e)}"
 
 
+def progress_iter(iterable: Iterable, total: Optional[int] = None, desc: Optional[str] = None, enabled: bool = True) -> Iterable:
+    """Wrap an iterable in a tqdm progress bar when enabled and tqdm is installed."""
+    if enabled and tqdm is not None:
+        return tqdm(iterable, total=total, desc=desc)
+    return iterable
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+    
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (marking it recently used) or default."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def put(self, key: Hashable, value: Any):
+        """Insert or refresh a value, evicting the oldest entry when full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a value."""
+        with self._lock:
+            return self._data.pop(key, default)
+    
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of (key, value) pairs, oldest first."""
+        with self._lock:
+            return list(self._data.items())
+    
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._data.clear()
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+def lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection over an evenly spaced series.
+    
+    Args:
+        values: 1-D series to downsample
+        n_out: Number of points to keep (including first and last)
+    
+    Returns:
+        Sorted integer positions of the selected points
+    """
+    y = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # Compiled MinMax-preselected LTTB when available
+    if HAS_TSDOWNSAMPLE:
+        return np.asarray(MinMaxLTTBDownsampler().downsample(y, n_out=n_out), dtype=np.int64)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            avg_x, avg_y = n - 1, y[n - 1]
+        else:
+            avg_x = (edges[i + 1] + edges[i + 2] - 1) / 2.0
+            avg_y = y[edges[i + 1]:edges[i + 2]].mean()
+        xs = np.arange(start, end)
+        area = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    
+    return idx
+
+
+def downsample_ohlc(df: pd.DataFrame, max_points: int, value_col: str = 'close',
+                    threshold: Optional[int] = None) -> pd.DataFrame:
+    """
+    Reduce a price frame to at most max_points rows for charting.
+    
+    Rows are picked with LTTB on value_col; open/high/low/close are re-aggregated
+    over each selected bucket so candles keep their true extremes. Other columns
+    are sampled at the selected rows. Frames no longer than threshold (default
+    max_points) are returned unchanged.
+    """
+    n = len(df)
+    if n <= max(max_points, threshold or 0):
+        return df
+    
+    idx = lttb_indices(df[value_col].to_numpy(), max_points)
+    out = df.iloc[idx].reset_index(drop=True)
+    
+    if 'high' in df.columns:
+        out['high'] = np.fmax.reduceat(df['high'].to_numpy(), idx)
+    if 'low' in df.columns:
+        out['low'] = np.fmin.reduceat(df['low'].to_numpy(), idx)
+    if 'close' in df.columns and 'open' in df.columns:
+        last = np.append(idx[1:] - 1, n - 1)
+        out['close'] = df['close'].to_numpy()[last]
+    
+    return out
+
+
+def segment_arrays(x: np.ndarray, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten vertical segments (x, start) -> (x, end) into one line trace.
+    
+    Each segment is followed by a NaN y-value so a single plotly line trace
+    draws all of them as disconnected strokes.
+    """
+    xs = np.repeat(np.asarray(x), 3)
+    ys = np.column_stack([start, end, np.full(len(start), np.nan)]).ravel()
+    return xs, ys
+
+
 def format_number(num: float, decimals: int = 2) -> str:
     """Format number with commas and decimals."""
     if pd.isna(num):
@@ -46,8 +202,13 @@ def get_default_date_range(days: int = 365) -> Tuple[str, str]:
 
 
 def export_to_excel(data: pd.DataFrame, filename: str):
-    """Export DataFrame to Excel."""
-    data.to_excel(filename, index=False)
+    """Export DataFrame to Excel, streaming rows to disk with xlsxwriter when installed."""
+    if HAS_XLSXWRITER:
+        engine_kwargs = {'options': {'constant_memory': True}}
+        with pd.ExcelWriter(filename, engine='xlsxwriter', engine_kwargs=engine_kwargs) as writer:
+            data.to_excel(writer, index=False)
+    else:
+        data.to_excel(filename, index=False)
     return filename
 
 
@@ -57,4 +218,15 @@ def export_to_csv(data: pd.DataFrame, filename: str):
     return filename
 
 
+def export_to_parquet(data: pd.DataFrame, filename: str):
+    """
+    Export DataFrame to Parquet (requires pyarrow).
+    
+    Preferred over CSV/Excel: columns keep their dtypes and reload with
+    pd.read_parquet without re-parsing.
+    """
+    data.to_parquet(filename, engine='pyarrow', compression='snappy', index=False)
+    return filename
+
+
 